@@ -0,0 +1 @@
+# LASER CRM data and analytics layer used by CRMDashboard.py
@@ -0,0 +1,288 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from crm.synthetic import SIZES, synthetic_tables
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'CRMDashboard.py')
+
+# Cells edited in the referral editor write-back benchmark
+EDITED_ROWS = 100
+
+# Concurrent write load test: sessions committing at once, commits per session,
+# and rows edited per commit (drawn from a shared pool, so sessions collide)
+LOAD_SESSIONS = 4
+LOAD_COMMITS = 25
+LOAD_ROWS = 20
+LOAD_POOL = 2_000
+
+# A step counts as a regression when it is this much slower than the baseline
+REGRESSION_RATIO = 1.2
+
+# Login page budget in seconds: the first run in a fresh process, imports
+# included, and each rerun after it. Neither should load the heavy libraries
+# (beyond what importing Streamlit already loads).
+STARTUP_TARGETS = {'login (cold start)': 0.5, 'login (rerun)': 0.05}
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'plotly', 'openpyxl')
+
+STARTUP_SCRIPT = '''
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+preloaded = set(sys.modules)
+app = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+started = time.perf_counter(); app.run(); first = time.perf_counter() - started
+started = time.perf_counter(); app.run(); rerun = time.perf_counter() - started
+print(json.dumps({'first': first, 'rerun': rerun, 'modules': [m for m in sys.argv[3:] if m in set(sys.modules) - preloaded]}))
+'''
+
+
+# Run fn and record its wall time and, while tracemalloc is on, its peak traced
+# memory (Python and NumPy/pandas allocations)
+def measure(results, size, name, fn):
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    error = None
+    try:
+        fn()
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] / 1e6 if tracemalloc.is_tracing() else None
+    results.append({'size': size, 'step': name, 'seconds': round(seconds, 4),
+                    'peak_mb': round(peak, 1) if peak is not None else None, 'error': error})
+    status = f"FAILED ({error})" if error else f"{seconds:8.3f}s" + (f" {peak:9.1f} MB" if peak is not None else "")
+    print(f"  {name:<40} {status}", file=sys.stderr)
+
+
+# Write a synthetic book into a fresh SQLite store and return its path
+def prepare_store(directory, rows, seed):
+    from crm.storage import TABLES, DataStore, SQLiteBackend
+    tables = synthetic_tables(rows, seed)
+    path = os.path.join(directory, f'crm_{rows}.db')
+    store = DataStore(SQLiteBackend(path), seed=lambda: tables)
+    for name in TABLES:
+        store.table(name)
+    return path
+
+
+def _reset_caches():
+    import streamlit as st
+    from crm.metrics import CACHE
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    CACHE.clear()
+
+
+# Every sidebar page through Streamlit's AppTest, logged in as admin: the first
+# visit (cold caches) and a rerun of the same page (warm caches)
+def bench_pages(results, size, timeout):
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    app.run()
+    app.text_input(key="login_username").input("admin")
+    app.text_input(key="login_password").input("admin123")
+    measure(results, size, "login", lambda: app.button[0].click().run())
+    for page in app.sidebar.radio[0].options:
+        measure(results, size, f"{page} (cold)", lambda: app.sidebar.radio[0].set_value(page).run())
+        measure(results, size, f"{page} (warm)", lambda: app.run())
+        if app.exception:
+            results[-1]['error'] = app.exception[0].value
+
+
+# The login page in a fresh interpreter, as a new server process serves it
+def bench_startup(results, timeout):
+    out = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, APP_PATH, str(timeout), *HEAVY_MODULES],
+                         capture_output=True, text=True, timeout=timeout)
+    if out.returncode:
+        error = out.stderr.strip().splitlines()[-1]
+        results += [{'size': 'startup', 'step': step, 'seconds': None, 'peak_mb': None, 'error': error}
+                    for step in STARTUP_TARGETS]
+        return
+    timings = json.loads(out.stdout.strip().splitlines()[-1])
+    loaded = ', '.join(timings['modules'])
+    print("startup", file=sys.stderr)
+    for step, seconds in zip(STARTUP_TARGETS, (timings['first'], timings['rerun'])):
+        results.append({'size': 'startup', 'step': step, 'seconds': round(seconds, 4), 'peak_mb': None,
+                        'error': f"loaded {loaded}" if loaded else None})
+        print(f"  {step:<40} {seconds:8.3f}s (target {STARTUP_TARGETS[step]}s)", file=sys.stderr)
+
+
+# Startup steps slower than their target
+def over_target(report):
+    return [(r['step'], STARTUP_TARGETS[r['step']], r['seconds']) for r in report['results']
+            if r['size'] == 'startup' and r['seconds'] is not None and r['seconds'] > STARTUP_TARGETS[r['step']]]
+
+
+# What export_data() builds: one file per format, waited on until written
+def bench_exports(results, size, data):
+    from crm.export import ExportManager, available_formats
+
+    def export(fmt):
+        job = ExportManager(tempfile.mkdtemp(prefix='crm-bench-')).request(data, fmt)
+        while job.running:
+            time.sleep(0.05)
+        if job.status == 'failed':
+            raise RuntimeError(job.error)
+
+    for fmt in available_formats():
+        measure(results, size, f"export_data ({fmt})", lambda: export(fmt))
+
+
+# The referral editor write-back: EDITED_ROWS edited cells turned into changes,
+# written to the session overlay and committed
+def bench_editor(results, size, data, seed):
+    from crm.editing import editor_changes
+    rng = np.random.default_rng(seed)
+    before = data.table('clients')[['Client Name', 'Referral Source', 'Status',
+                                    'Total Revenue', 'Monthly Recurring Revenue']]
+    positions = rng.choice(len(before), size=min(EDITED_ROWS, len(before)), replace=False)
+    state = {'edited_rows': {int(p): {'Referral Source': f"Edited {i}", 'Total Revenue': float(i)}
+                             for i, p in enumerate(positions)}}
+
+    def write_back():
+        changes = editor_changes(before, state)
+        data.update_cells('clients', changes)
+        data.commit()
+
+    measure(results, size, f"referral editor write-back ({len(positions)} rows)", write_back)
+
+
+# Several sessions editing the same store at once, one thread each, as concurrent
+# Streamlit sessions do: each commit edits LOAD_ROWS clients read from a shared
+# pool and is retried after a conflict. Times the whole load and reports commits
+# per second and the conflicts the row version stamps caught.
+def bench_concurrency(results, size, path, seed, sessions=LOAD_SESSIONS):
+    import threading
+    from crm.storage import ConflictError, DataStore, SessionData, SQLiteBackend
+    store = DataStore(SQLiteBackend(path))
+    keys = store.table('clients').index[:LOAD_POOL].to_numpy()
+    conflicts = []
+    notices = []
+
+    def edit(session, rng):
+        data = SessionData(store, user=f"load-{session}")
+        caught = 0
+        for commit in range(LOAD_COMMITS):
+            while True:
+                rows = rng.choice(keys, size=min(LOAD_ROWS, len(keys)), replace=False)
+                data.update_cells('clients', {'Referral Source': pd.Series(f"Load {session}.{commit}", index=rows)})
+                try:
+                    data.commit()
+                    break
+                except ConflictError:
+                    data.discard()
+                    caught += 1
+        conflicts.append(caught)
+        notices.append(len(data.feed.drain()))
+
+    def run_load():
+        threads = [threading.Thread(target=edit, args=(i, np.random.default_rng(seed + i))) for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    commits = sessions * LOAD_COMMITS
+    measure(results, size, f"concurrent edits ({sessions} sessions x {LOAD_COMMITS} commits)", run_load)
+    seconds = results[-1]['seconds']
+    results[-1]['commits_per_second'] = round(commits / seconds, 1) if seconds else None
+    results[-1]['conflicts'] = sum(conflicts)
+    print(f"  {'':<40} {commits / seconds if seconds else 0:8.1f} commits/s, {sum(conflicts)} conflicts retried, "
+          f"{min(notices, default=0)}+ notices per session", file=sys.stderr)
+
+
+# Tracing memory slows allocation-heavy steps (the Excel export most of all), so
+# timings from runs with and without memory are not comparable
+def run(sizes, seed=0, timeout=600, memory=True, sessions=LOAD_SESSIONS):
+    from crm.storage import DataStore, SessionData, SQLiteBackend
+    results = []
+    directory = tempfile.mkdtemp(prefix='crm-bench-')
+    bench_startup(results, timeout)
+    if memory:
+        tracemalloc.start()
+    for label in sizes:
+        rows = SIZES[label]
+        print(f"{label} ({rows:,} rows per table)", file=sys.stderr)
+        path = prepare_store(directory, rows, seed)
+        os.environ['CRM_STORAGE'] = 'sqlite'
+        os.environ['CRM_DATA_PATH'] = path
+        _reset_caches()
+        bench_pages(results, label, timeout)
+        data = SessionData(DataStore(SQLiteBackend(path)))
+        measure(results, label, "load tables", lambda: [data.table(name) for name in
+                                                        ('clients', 'services', 'issues', 'opportunities')])
+        bench_exports(results, label, data)
+        bench_editor(results, label, data, seed)
+        bench_concurrency(results, label, path, seed, sessions)
+    if memory:
+        tracemalloc.stop()
+    return {
+        'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'seed': seed,
+        'memory_traced': memory,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'results': results
+    }
+
+
+# Steps at least REGRESSION_RATIO slower than in a baseline run
+def regressions(baseline, report, ratio=REGRESSION_RATIO):
+    before = {(r['size'], r['step']): r['seconds'] for r in baseline['results'] if not r.get('error')}
+    out = []
+    for r in report['results']:
+        old = before.get((r['size'], r['step']))
+        if old and not r.get('error') and r['seconds'] > old * ratio:
+            out.append((r['size'], r['step'], old, r['seconds']))
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every dashboard page on synthetic data")
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=600, help="seconds allowed per app rerun")
+    parser.add_argument('--out', default='benchmark.json', help="JSON file for the results")
+    parser.add_argument('--baseline', help="earlier results JSON to compare against")
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="skip tracemalloc for faster, timing-only runs")
+    parser.add_argument('--sessions', type=int, default=LOAD_SESSIONS,
+                        help="sessions committing at once in the concurrent edit load test")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.seed, args.timeout, args.memory, args.sessions)
+    with open(args.out, 'w') as fileobj:
+        json.dump(report, fileobj, indent=2)
+    print(f"Results written to {args.out}")
+
+    failed = [r for r in report['results'] if r['error']]
+    for r in failed:
+        print(f"FAILED {r['size']} {r['step']}: {r['error']}")
+    slow_start = over_target(report)
+    for step, target, seconds in slow_start:
+        print(f"OVER TARGET {step}: {seconds:.3f}s (target {target}s)")
+    if args.baseline:
+        with open(args.baseline) as fileobj:
+            baseline = json.load(fileobj)
+        if baseline.get('memory_traced') != report['memory_traced']:
+            print("Baseline was run with different memory tracing; timings are not comparable")
+        slower = regressions(baseline, report)
+        for size, step, old, new in slower:
+            print(f"SLOWER {size} {step}: {old:.3f}s -> {new:.3f}s")
+        return 1 if failed or slow_start or slower else 0
+    return 1 if failed or slow_start else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
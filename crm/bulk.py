@@ -0,0 +1,39 @@
+import pandas as pd
+
+from crm.clients import delete_clients
+from crm.schema import CLIENT_STATUSES, CLIENT_TIERS, ENGAGEMENT_STATUSES
+
+# Bulk actions besides delete, per table: label -> (column set, allowed values;
+# None for any value, existing or new)
+ACTIONS = {
+    'clients': {
+        "Change status": ('Status', CLIENT_STATUSES),
+        "Reassign consultant": ('Consultants', None),
+        "Change tier": ('Client Tier', CLIENT_TIERS)
+    },
+    'services': {
+        "Change status": ('Status', ENGAGEMENT_STATUSES),
+        "Reassign consultant": ('Consultant Assigned', None)
+    }
+}
+
+
+# Delete many rows of a table with one write to the session overlay; clients take
+# their engagements with them. Returns (rows deleted, engagements deleted with them).
+def delete_rows(data, table, keys):
+    keys = data.table(table).index.intersection(pd.Index(keys))
+    if not len(keys):
+        return 0, 0
+    if table == 'clients':
+        return len(keys), delete_clients(data, keys)
+    data.delete(table, keys)
+    return len(keys), 0
+
+
+# Set one column to one value on many rows with a single vectorized write,
+# skipping the rows that already hold it; returns the number of rows changed
+def set_column(data, table, keys, column, value):
+    current = data.table(table)[column]
+    current = current[current.index.isin(pd.Index(keys))]
+    differs = (current.astype(object) != value).to_numpy() | current.isna().to_numpy()
+    return data.update_cells(table, {column: pd.Series(value, index=current.index[differs])})
@@ -0,0 +1,272 @@
+import json
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from crm.schema import conform
+
+# Append-only log of row-level changes, kept in SQLite next to the data. Each
+# commit is one change set (who, when, and the change it undoes, if any) holding
+# one event per inserted, updated or deleted row:
+#   insert  after = the full new row
+#   update  columns = the cells that changed, before/after = their old/new values
+#   delete  before = the full removed row
+# Events are never rewritten (only a change set whose commit failed is removed
+# again), so the log is both the audit trail and the source of undo. 'change_snapshots' records, per table, the last change already
+# written into the backend's copy of the table; later events are replayed on load.
+# 'row_keys' holds each table's next free row key, shared by every process using
+# the store (the app and command-line imports).
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS change_sets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, at TEXT, user TEXT, undoes INTEGER);
+CREATE TABLE IF NOT EXISTS change_events (
+    change_id INTEGER, tbl TEXT, op TEXT, key INTEGER, columns TEXT, before TEXT, after TEXT);
+CREATE INDEX IF NOT EXISTS ix_change_events_change ON change_events (change_id);
+CREATE INDEX IF NOT EXISTS ix_change_events_key ON change_events (tbl, key, change_id);
+CREATE TABLE IF NOT EXISTS change_snapshots (tbl TEXT PRIMARY KEY, change_id INTEGER);
+CREATE TABLE IF NOT EXISTS row_keys (tbl TEXT PRIMARY KEY, next_key INTEGER);
+"""
+
+# SQLite limits the number of bound parameters per statement
+CHUNK = 500
+
+
+# Rows as one JSON object per row, dates in ISO format
+def _json_rows(df):
+    if not len(df):
+        return []
+    return df.to_json(orient='records', lines=True, date_format='iso').splitlines()
+
+
+# Events turning base into base + rows - deleted, as (op, key, columns, before, after)
+def row_events(base, rows, deleted):
+    events = []
+    if rows is not None and len(rows):
+        inserted = rows.loc[~rows.index.isin(base.index)]
+        events += [('insert', key, None, None, after)
+                   for key, after in zip(inserted.index.tolist(), _json_rows(inserted))]
+        keys = rows.index[rows.index.isin(base.index)]
+        if len(keys):
+            cols = [col for col in rows.columns if col in base.columns]
+            before, after = base.loc[keys, cols].astype(object), rows.loc[keys, cols].astype(object)
+            changed = ~((before == after) | (before.isna() & after.isna()))
+            touched = changed.any(axis=1).to_numpy()
+            columns = changed.columns[changed.any(axis=0).to_numpy()]
+            before, after = before.loc[touched, columns], after.loc[touched, columns]
+            # One JSON list per distinct set of changed columns (a bulk edit has one)
+            patterns, which = np.unique(changed.loc[touched, columns].to_numpy(), axis=0, return_inverse=True)
+            labels = [json.dumps([col for col, hit in zip(columns.tolist(), pattern) if hit]) for pattern in patterns]
+            names = [labels[i] for i in which.ravel()]
+            events += [('update', key, cols_json, b, a) for key, cols_json, b, a in
+                       zip(before.index.tolist(), names, _json_rows(before), _json_rows(after))]
+    removed = base.loc[base.index.isin(pd.Index(list(deleted)))]
+    events += [('delete', key, None, before, None)
+               for key, before in zip(removed.index.tolist(), _json_rows(removed))]
+    return events
+
+
+# Frame of rows from their JSON, indexed by key (columns as logged, not yet typed)
+def rows_from_json(keys, values, name=None):
+    records = [json.loads(value) for value in values]
+    return pd.DataFrame.from_records(records, index=pd.Index(keys, name=name)) if records \
+        else pd.DataFrame(index=pd.Index(keys, name=name))
+
+
+class ChangeLog:
+    # read_only: open the existing log without creating or writing anything (for
+    # processes that only read while the app owns the files)
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        if read_only:
+            return
+        con = self._connect()
+        try:
+            con.executescript(SCHEMA)
+        finally:
+            con.close()
+
+    def _connect(self):
+        if self.read_only:
+            return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        return sqlite3.connect(self.path)
+
+    def _query(self, sql, params=()):
+        con = self._connect()
+        try:
+            return con.execute(sql, params).fetchall()
+        finally:
+            con.close()
+
+    # Log a change set with its events ({table: events}) in one transaction and
+    # return its id
+    def record(self, user, undoes, events):
+        con = self._connect()
+        try:
+            with con:
+                change_id = con.execute("INSERT INTO change_sets (at, user, undoes) VALUES (?, ?, ?)",
+                                        (datetime.now().isoformat(timespec='seconds'), user, undoes)).lastrowid
+                con.executemany(
+                    "INSERT INTO change_events (change_id, tbl, op, key, columns, before, after) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(change_id, table, op, int(key), columns, before, after)
+                     for table, table_events in events.items()
+                     for op, key, columns, before, after in table_events])
+                return change_id
+        finally:
+            con.close()
+
+    # Take back a change set whose commit failed before it took effect
+    def remove(self, change_id):
+        con = self._connect()
+        try:
+            with con:
+                con.execute("DELETE FROM change_events WHERE change_id = ?", (change_id,))
+                con.execute("DELETE FROM change_sets WHERE id = ?", (change_id,))
+        finally:
+            con.close()
+
+    # Reserve count new row keys for a table and return the first. The write lock
+    # is taken before reading, so processes sharing the log never get overlapping
+    # keys. floor is the lowest key the caller knows to be free; keys of rows ever
+    # inserted through the log are skipped as well.
+    def reserve_keys(self, table, count, floor=0):
+        con = self._connect()
+        con.isolation_level = None
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                start = con.execute(
+                    "SELECT MAX(COALESCE((SELECT next_key FROM row_keys WHERE tbl = ?), 0), "
+                    "COALESCE((SELECT MAX(key) + 1 FROM change_events WHERE tbl = ? AND op = 'insert'), 0), ?)",
+                    (table, table, int(floor))).fetchone()[0]
+                con.execute("INSERT OR REPLACE INTO row_keys (tbl, next_key) VALUES (?, ?)", (table, start + count))
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            return start
+        finally:
+            con.close()
+
+    def last_id(self):
+        return self._query("SELECT COALESCE(MAX(id), 0) FROM change_sets")[0][0]
+
+    # Last change already contained in the backend's copy of a table (None if never recorded)
+    def snapshot_of(self, table):
+        rows = self._query("SELECT change_id FROM change_snapshots WHERE tbl = ?", (table,))
+        return rows[0][0] if rows else None
+
+    def mark_snapshot(self, table, change_id):
+        con = self._connect()
+        try:
+            with con:
+                con.execute("INSERT OR REPLACE INTO change_snapshots (tbl, change_id) VALUES (?, ?)",
+                            (table, change_id))
+        finally:
+            con.close()
+
+    # Events of a table after a change, in order: (op, key, columns, after)
+    def events_since(self, table, change_id):
+        return self._query("SELECT op, key, columns, after FROM change_events "
+                           "WHERE tbl = ? AND change_id > ? ORDER BY change_id, rowid", (table, change_id))
+
+    # Events of a table after a change with the change each belongs to, in order:
+    # (change, op, key, columns, after)
+    def changes_after(self, table, change_id):
+        return self._query("SELECT change_id, op, key, columns, after FROM change_events "
+                           "WHERE tbl = ? AND change_id > ? ORDER BY change_id, rowid", (table, change_id))
+
+    # Recent change sets, newest first, with the tables touched and rows per operation
+    def changes(self, limit=100, user=None, table=None):
+        where, params = [], []
+        if user:
+            where.append("s.user = ?")
+            params.append(user)
+        if table:
+            where.append("s.id IN (SELECT change_id FROM change_events WHERE tbl = ?)")
+            params.append(table)
+        rows = self._query(
+            "SELECT s.id, s.at, s.user, group_concat(DISTINCT e.tbl), SUM(e.op = 'insert'), "
+            "SUM(e.op = 'update'), SUM(e.op = 'delete'), s.undoes, "
+            "(SELECT MAX(u.id) FROM change_sets u WHERE u.undoes = s.id) "
+            "FROM change_sets s JOIN change_events e ON e.change_id = s.id "
+            + ("WHERE " + " AND ".join(where) + " " if where else "")
+            + "GROUP BY s.id ORDER BY s.id DESC LIMIT ?", (*params, limit))
+        return pd.DataFrame(rows, columns=['Change', 'When', 'User', 'Tables', 'Inserted', 'Updated',
+                                           'Deleted', 'Undoes', 'Undone By']).set_index('Change').astype(
+            {'Undoes': 'Int64', 'Undone By': 'Int64'})
+
+    # The events of one change set: table, operation, key, columns, before, after
+    def events(self, change_id):
+        rows = self._query("SELECT tbl, op, key, columns, before, after FROM change_events "
+                           "WHERE change_id = ? ORDER BY rowid", (change_id,))
+        return pd.DataFrame(rows, columns=['Table', 'Operation', 'Key', 'Columns', 'Before', 'After'])
+
+    def undone_by(self, change_id):
+        rows = self._query("SELECT MAX(id) FROM change_sets WHERE undoes = ?", (change_id,))
+        return rows[0][0]
+
+    # First change after change_id touching any of the given rows of a table.
+    # Later changes that were undone, and their undos, cancel out and are skipped.
+    def touched_after(self, change_id, table, keys):
+        keys = [int(k) for k in keys]
+        first = None
+        for i in range(0, len(keys), CHUNK):
+            chunk = keys[i:i + CHUNK]
+            found = self._query(
+                f"SELECT MIN(change_id) FROM change_events WHERE tbl = ? AND change_id > ? "
+                f"AND key IN ({','.join('?' * len(chunk))}) "
+                f"AND change_id NOT IN (SELECT undoes FROM change_sets WHERE undoes IS NOT NULL) "
+                f"AND change_id NOT IN (SELECT id FROM change_sets WHERE undoes > ?)",
+                (table, change_id, *chunk, change_id))[0][0]
+            if found is not None and (first is None or found < first):
+                first = found
+        return first
+
+
+# Revert one change set as a new change (the log stays append-only). data is a
+# SessionData without pending edits. Refuses when a later change touched the
+# same rows, since reverting would silently overwrite it.
+def undo(data, change_id):
+    log = data.store.log
+    if data.dirty:
+        raise ValueError("Save or discard pending edits before undoing a change")
+    if log.undone_by(change_id):
+        raise ValueError(f"Change #{change_id} was already undone by change #{log.undone_by(change_id)}")
+    events = log.events(change_id)
+    if events.empty:
+        raise ValueError(f"Change #{change_id} has nothing to undo")
+    for table, group in events.groupby('Table', sort=False):
+        later = log.touched_after(change_id, table, group['Key'])
+        if later is not None:
+            raise ValueError(f"Rows changed by #{change_id} were changed again by change #{later}; "
+                             "undo that change first")
+
+    for table, group in events.groupby('Table', sort=False):
+        current = data.table(table)
+        inserted = group[group['Operation'] == 'insert']
+        if len(inserted):
+            data.delete(table, inserted['Key'].tolist())
+        updated = group[group['Operation'] == 'update']
+        if len(updated):
+            before = rows_from_json(updated['Key'].tolist(), updated['Before'])
+            columns = [json.loads(cols) for cols in updated['Columns']]
+            changes = {}
+            for col in before.columns:
+                keys = [key for key, cols in zip(before.index, columns) if col in cols]
+                values = before.loc[keys, [col]]
+                changes[col] = _typed(values, current)[col]
+            data.update_cells(table, changes)
+        deleted = group[group['Operation'] == 'delete']
+        if len(deleted):
+            rows = rows_from_json(deleted['Key'].tolist(), deleted['Before'], current.index.name)
+            data.restore(table, _typed(rows, current))
+    data.commit(undoes=change_id)
+
+
+# Logged values cast back to the dtypes of the table they return to
+def _typed(rows, base):
+    return conform(rows, base)[0]
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from crm.metrics import METRICS, cached, metric
+from crm.mrr import mrr_series
+from crm.referrals import referral_attribution
+
+# Category charts keep the largest this many categories and fold the rest into one bar/slice
+TOP_N = 15
+OTHER = "Other"
+
+# Line charts with more points than this render with WebGL (scattergl); past
+# MAX_POINTS they are also downsampled, keeping each bucket's min and max
+WEBGL_POINTS = 1_000
+MAX_POINTS = 5_000
+
+# Chart sources that are not metrics: name -> (tables read, function of the session data)
+SERIES = {
+    'mrr_series': (('services',), mrr_series),
+    'referral_attribution': (('clients',), referral_attribution)
+}
+
+
+# Largest n rows by a column (the first by default), plus one "Other" row summing
+# the rest (left out when other is None, for figures that do not add up)
+def top_n(values, n=TOP_N, by=None, other=OTHER):
+    if n is None or len(values) <= n + 1:
+        return values
+    frame = values.to_frame() if isinstance(values, pd.Series) else values
+    by = by or frame.columns[0]
+    order = frame[by].to_numpy().argsort(kind='stable')[::-1]
+    top, rest = frame.iloc[order[:n]], frame.iloc[order[n:]]
+    if other is None:
+        out = top
+    else:
+        rest = rest.sum(numeric_only=True).to_frame(other).T
+        out = pd.concat([top, rest]).rename_axis(frame.index.name)
+    return out.iloc[:, 0].rename(values.name) if isinstance(values, pd.Series) else out
+
+
+# Positions of the min and max of each of max_points / 2 equal buckets, plus the
+# first and last point, so peaks and dips survive downsampling
+def downsample(values, max_points=MAX_POINTS):
+    if len(values) <= max_points:
+        return values
+    y = pd.Series(np.asarray(values.iloc[:, 0] if isinstance(values, pd.DataFrame) else values, dtype='float64'))
+    buckets = np.arange(len(y)) * (max_points // 2) // len(y)
+    groups = y.groupby(buckets)
+    keep = np.unique(np.concatenate([groups.idxmin().to_numpy(), groups.idxmax().to_numpy(), [0, len(y) - 1]]))
+    return values.iloc[keep]
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+# Chart builders: values (a Series, or a frame with y columns) -> figure
+
+def pie(values, title, n=TOP_N):
+    values = top_n(values, n)
+    return px.pie(values=values.values, names=values.index, title=title)
+
+
+def bar(values, title, y=None, labels=None, orientation='v', n=TOP_N, barmode=None, tickangle=None, other=OTHER):
+    if y is not None:
+        values = values[y]
+    values = top_n(values, n, other=other)
+    if isinstance(values, pd.Series):
+        category, amount = values.index, values.values
+        x, y = (amount, category) if orientation == 'h' else (category, amount)
+        fig = px.bar(x=x, y=y, orientation=orientation, title=title, labels=labels)
+    else:
+        fig = px.bar(values, x=values.index, y=list(values.columns), title=title, labels=labels,
+                     barmode=barmode or 'group')
+    if tickangle is not None:
+        fig.update_xaxes(tickangle=tickangle)
+    return fig
+
+
+def line(values, title, y, labels=None):
+    values = values[y]
+    if isinstance(values.index, pd.PeriodIndex):
+        values = values.set_axis(values.index.to_timestamp())
+    values = downsample(values)
+    render_mode = 'webgl' if len(values) > WEBGL_POINTS else 'auto'
+    return px.line(x=values.index, y=values.values, title=title, labels=labels, markers=len(values) <= 60,
+                   render_mode=render_mode)
+
+
+# Bars stacked above and below zero; columns in negative are drawn downwards
+def movements(values, title, columns, negative=(), labels=None):
+    frame = pd.DataFrame({name: -values[col] if col in negative else values[col]
+                          for col, name in columns.items()})
+    if isinstance(frame.index, pd.PeriodIndex):
+        frame.index = frame.index.to_timestamp()
+    return px.bar(frame, x=frame.index, y=list(frame.columns), barmode='relative', title=title, labels=labels)
+
+
+# Cells are labelled with their values up to this many cells
+LABELLED_CELLS = 400
+
+
+# Matrix of values (rows by columns, e.g. cohorts by month of age) as a heatmap;
+# missing cells stay blank
+def heatmap(values, title, labels=None, text_format='.0%', color_scale='Blues'):
+    index = values.index.astype(str) if isinstance(values.index, pd.PeriodIndex) else values.index
+    fig = px.imshow(values.to_numpy(dtype='float64'), x=list(values.columns), y=list(index), title=title,
+                    labels=labels, aspect='auto', color_continuous_scale=color_scale,
+                    text_auto=text_format if values.size <= LABELLED_CELLS else False)
+    fig.update_yaxes(type='category', autorange='reversed')
+    return fig
+
+
+# Forecast band: the median as a line inside a shaded band from low to high
+def fan(values, title, low, mid, high, labels=None):
+    x = values.index.to_timestamp() if isinstance(values.index, pd.PeriodIndex) else values.index
+    labels = labels or {}
+    fig = go.Figure([
+        go.Scatter(x=x, y=values[high], mode='lines', line={'width': 0}, name=high, showlegend=False),
+        go.Scatter(x=x, y=values[low], mode='lines', line={'width': 0}, fill='tonexty', name=f"{low}–{high}"),
+        go.Scatter(x=x, y=values[mid], mode='lines+markers', name=mid)
+    ])
+    fig.update_layout(title=title, xaxis_title=labels.get('x'), yaxis_title=labels.get('y'))
+    return fig
+
+
+# Figure for a metric or series, built once per data version and chart parameters
+# and shared between sessions (Plotly figures are only read when rendered)
+def chart(data, source, draw, **params):
+    if source in METRICS:
+        tables, values = METRICS[source][0], lambda: metric(data, source)
+    else:
+        tables, series = SERIES[source]
+        values = lambda: series(data)
+    key = ('chart', source, draw.__name__, _freeze(params))
+    return cached(data, key, tables, lambda *frames: draw(values(), **params))
@@ -0,0 +1,75 @@
+import pandas as pd
+
+from crm.metrics import cached
+
+
+# Add the 'Client ID' foreign key to engagements that only carry a client name.
+# Names that match several clients link to the first (oldest) of them.
+def link_client_ids(services_df, clients_df):
+    first_id = pd.Series(clients_df.index, index=clients_df['Client Name'].to_numpy())
+    first_id = first_id[~first_id.index.duplicated()]
+    ids = services_df['Client Name'].map(first_id).astype('Int64')
+    services_df = services_df.copy()
+    services_df.insert(0, 'Client ID', ids)
+    return services_df
+
+
+# Hash lookups between clients and their engagements, built in one pass over
+# both tables and cached per data version. Lookups by ID or name are O(1) and
+# fetching a client's engagements is O(k) in the number of engagements.
+class ClientIndex:
+    def __init__(self, clients_df, services_df):
+        self.names = clients_df['Client Name']
+        self._by_name = clients_df.groupby('Client Name', sort=False).groups
+        self._engagements = services_df.groupby('Client ID', sort=False).groups
+
+    def __contains__(self, client_id):
+        return client_id in self.names.index
+
+    def name(self, client_id):
+        return self.names.at[client_id]
+
+    def ids(self, name):
+        return self._by_name.get(name, pd.Index([], dtype='int64'))
+
+    def is_duplicate(self, name):
+        return len(self.ids(name)) > 1
+
+    def duplicate_names(self):
+        return [name for name, ids in self._by_name.items() if len(ids) > 1]
+
+    def engagements(self, client_ids):
+        groups = [self._engagements[cid] for cid in client_ids if cid in self._engagements]
+        if not groups:
+            return pd.Index([], dtype='int64')
+        return groups[0].append(groups[1:])
+
+    # Selectbox label; duplicated names are told apart by their ID
+    def label(self, client_id):
+        name = self.name(client_id)
+        return f"{name} (#{client_id})" if self.is_duplicate(name) else name
+
+
+def client_index(data):
+    return cached(data, 'client_index', ('clients', 'services'), ClientIndex)
+
+
+# Delete clients and cascade to their engagements; returns the engagements removed.
+# The engagements are found with one pass over the services table, which costs
+# the same for one client or thousands and needs no client index.
+def delete_clients(data, client_ids):
+    services = data.table('services')
+    engagements = services.index[services['Client ID'].isin(pd.Index(client_ids)).to_numpy()]
+    if len(engagements):
+        data.delete('services', engagements)
+    data.delete('clients', client_ids)
+    return len(engagements)
+
+
+# Rename a client and the denormalized name on each of its engagements
+def rename_client(data, client_id, new_name):
+    data.update_cells('clients', {'Client Name': pd.Series([new_name], index=[client_id])})
+    engagements = client_index(data).engagements([client_id])
+    if len(engagements):
+        data.update_cells('services', {'Client Name': pd.Series(new_name, index=engagements)})
+    return len(engagements)
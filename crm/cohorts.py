@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+from crm.metrics import cached
+from crm.mrr import EPSILON, MOVEMENTS, _month, client_events, contributions
+
+# Projected lifetimes assume at most this many more months of recurring revenue
+MAX_LIFETIME_MONTHS = 60
+
+# Months of MRR churn behind the projected lifetime
+CHURN_WINDOW = 12
+
+def _ordinal(today):
+    today = pd.Timestamp.today() if today is None else pd.Timestamp(today)
+    return today.year * 12 + today.month - 1
+
+
+def _periods(ordinals):
+    ordinals = np.asarray(ordinals, dtype='int64')
+    return pd.PeriodIndex.from_fields(year=ordinals // 12, month=ordinals % 12 + 1, freq='M')
+
+
+# Billed revenue of a services table as month spans of client positions (0..n-1
+# in the clients table): recurring engagements bill their monthly amount from
+# their first month up to their stop month (ongoing ones through this month);
+# one-time engagements bill their Revenue once, in the month engaged. Engagements
+# not linked to a known client are left out.
+def billing(clients_df, services_df, now):
+    recurring = contributions(services_df)
+    position = clients_df.index.get_indexer(recurring['client'].to_numpy())
+    start = recurring['start'].to_numpy()
+    stop = np.minimum(recurring['stop'].fillna(now + 1).to_numpy(), now + 1)
+    keep = (position >= 0) & (start <= now)
+    spans = pd.DataFrame({'client': position[keep], 'start': start[keep].astype('int64'),
+                          'stop': stop[keep].astype('int64'), 'amount': recurring['amount'].to_numpy()[keep]})
+
+    once = services_df[(services_df['Revenue Type'] == 'One-time').to_numpy()
+                       & services_df['Date Engaged'].notna().to_numpy()]
+    position = clients_df.index.get_indexer(once['Client ID'].astype('float64').to_numpy(na_value=np.nan))
+    month = _month(once['Date Engaged'])
+    revenue = once['Revenue'].fillna(0).to_numpy(dtype='float64')
+    keep = (position >= 0) & (month <= now) & (revenue > 0)
+    one_time = pd.DataFrame({'client': position[keep], 'month': month[keep].astype('int64'),
+                             'revenue': revenue[keep]})
+    return spans, one_time
+
+
+# Cohort month of each client: its First Engagement month, or the month of its
+# first billed engagement when that is missing or earlier; -1 if neither is known
+def cohort_months(clients_df, spans, one_time):
+    first = _month(clients_df['First Engagement'])
+    billed = np.full(len(clients_df), np.inf)
+    np.minimum.at(billed, spans['client'].to_numpy(), spans['start'].to_numpy())
+    np.minimum.at(billed, one_time['client'].to_numpy(), one_time['month'].to_numpy())
+    months = np.fmin(first, billed)
+    return np.where(np.isfinite(months), months, -1).astype('int64')
+
+
+# Retention and revenue of client cohorts (clients grouped by their cohort month)
+# by age in months. Every client's billed months are merged into runs of
+# consecutive active months with one sort and a running count, and each run adds
+# +1 at its first age and -1 past its last to a cohort x age grid, so a cumulative
+# sum along the ages gives the active clients; revenue works the same way with
+# the monthly amounts. Ages after the current month are NaN.
+class Cohorts:
+    def __init__(self, clients_df, services_df, today=None):
+        now = _ordinal(today)
+        spans, one_time = billing(clients_df, services_df, now)
+        cohort = cohort_months(clients_df, spans, one_time)
+        known = (cohort >= 0) & (cohort <= now)
+        first = int(cohort[known].min()) if known.any() else now
+        self.now = now
+        self.months = _periods(np.arange(first, now + 1))
+        width = now - first + 2
+        cells = len(self.months) * width
+        row = np.where(known, cohort - first, 0)
+        self.sizes = np.bincount(row[known], minlength=len(self.months))
+
+        def grid(client, month, weights):
+            age = month - cohort[client]
+            index = row[client] * width + age
+            return np.bincount(index, weights=weights, minlength=cells).reshape(len(self.months), width)
+
+        # Runs of active months per client: +1 where a span starts, -1 where it stops
+        client = np.concatenate([spans['client'], spans['client'], one_time['client'], one_time['client']])
+        month = np.concatenate([spans['start'], spans['stop'], one_time['month'], one_time['month'] + 1])
+        delta = np.repeat([1, -1, 1, -1], [len(spans), len(spans), len(one_time), len(one_time)])
+        events = pd.DataFrame({'client': client, 'month': month, 'delta': delta}) \
+            .groupby(['client', 'month'], sort=True)['delta'].sum().reset_index()
+        running = events.groupby('client', sort=False)['delta'].cumsum().to_numpy()
+        was, now_active = running - events['delta'].to_numpy() > 0, running > 0
+        change = np.where(~was & now_active, 1.0, np.where(was & ~now_active, -1.0, 0.0))
+        active = grid(events['client'].to_numpy(), events['month'].to_numpy(), change).cumsum(axis=1)
+
+        amount = spans['amount'].to_numpy()
+        recurring = (grid(spans['client'].to_numpy(), spans['start'].to_numpy(), amount)
+                     - grid(spans['client'].to_numpy(), spans['stop'].to_numpy(), amount)).cumsum(axis=1)
+        revenue = recurring + grid(one_time['client'].to_numpy(), one_time['month'].to_numpy(),
+                                   one_time['revenue'].to_numpy())
+
+        # Cohort c has ages 0..now - c; the last column only held the stop markers
+        future = np.arange(width)[None, :] > (now - first - np.arange(len(self.months)))[:, None]
+        self.active = np.where(future, np.nan, active.round())[:, :-1]
+        self.revenue = np.where(future, np.nan, np.where(np.abs(revenue) < EPSILON, 0.0, revenue))[:, :-1]
+
+    def _frame(self, values):
+        return pd.DataFrame(values, index=self.months.rename('Cohort'),
+                            columns=pd.RangeIndex(values.shape[1], name='Months Since First Engagement'))
+
+    # Share of each cohort's clients billed in each month of age
+    def retention(self):
+        sizes = np.where(self.sizes > 0, self.sizes, 1)[:, None]
+        return self._frame(np.where(self.sizes[:, None] > 0, self.active / sizes, np.nan))
+
+    # Each cohort's revenue in each month of age relative to its first month
+    def revenue_retention(self):
+        base = self.revenue[:, :1]
+        return self._frame(np.where(base > EPSILON, self.revenue / np.where(base > EPSILON, base, 1), np.nan))
+
+    # Revenue per client accumulated by each month of age: the cohort's LTV curve
+    def ltv_curve(self):
+        sizes = np.where(self.sizes > 0, self.sizes, 1)[:, None]
+        cumulative = np.nancumsum(self.revenue, axis=1)
+        cumulative[np.isnan(self.revenue)] = np.nan
+        return self._frame(np.where(self.sizes[:, None] > 0, cumulative / sizes, np.nan))
+
+    # One row per cohort: size, clients billed this month, revenue to date and per client
+    def summary(self):
+        ages = len(self.months) - 1 - np.arange(len(self.months))
+        rows = np.arange(len(self.months))
+        total = np.nansum(self.revenue, axis=1)
+        out = pd.DataFrame({
+            'Clients': self.sizes,
+            'Active Now': self.active[rows, ages].astype('int64'),
+            'Revenue To Date': total,
+            'Revenue per Client': np.where(self.sizes > 0, total / np.where(self.sizes > 0, self.sizes, 1), 0.0)
+        }, index=self.months.rename('Cohort'))
+        return out[out['Clients'] > 0]
+
+
+# Share of MRR lost per month over the last CHURN_WINDOW months (churned MRR over
+# the MRR the months opened with)
+def churn_rate(services_df, today=None):
+    now = _ordinal(today)
+    events = client_events(contributions(services_df))
+    if not len(events):
+        return 0.0
+    monthly = events.groupby('month')[MOVEMENTS].sum()
+    months = np.arange(min(int(monthly.index.min()), now - CHURN_WINDOW), now, dtype='float64')
+    monthly = monthly.reindex(months, fill_value=0.0)
+    net = monthly['New MRR'] + monthly['Expansion MRR'] - monthly['Contraction MRR'] - monthly['Churned MRR']
+    opening = net.cumsum().shift(1, fill_value=0.0).iloc[-CHURN_WINDOW:].sum()
+    churned = monthly['Churned MRR'].iloc[-CHURN_WINDOW:].sum()
+    return float(churned / opening) if opening > EPSILON else 0.0
+
+
+# Lifetime value of every client, computed from its engagements: revenue billed to
+# date, current MRR, and the projection adding current MRR for the expected
+# remaining lifetime (1 / monthly MRR churn, at most MAX_LIFETIME_MONTHS)
+def client_ltv(clients_df, services_df, today=None):
+    now = _ordinal(today)
+    spans, one_time = billing(clients_df, services_df, now)
+    months = (spans['stop'] - spans['start']).clip(lower=0).to_numpy()
+    to_date = (np.bincount(spans['client'], weights=spans['amount'].to_numpy() * months, minlength=len(clients_df))
+               + np.bincount(one_time['client'], weights=one_time['revenue'], minlength=len(clients_df)))
+    ongoing = (spans['stop'] > now).to_numpy()
+    mrr = np.bincount(spans['client'][ongoing], weights=spans['amount'][ongoing], minlength=len(clients_df))
+    churn = churn_rate(services_df, today)
+    lifetime = min(1 / churn, MAX_LIFETIME_MONTHS) if churn > 0 else MAX_LIFETIME_MONTHS
+    return pd.DataFrame({
+        'Revenue To Date': to_date,
+        'Current MRR': mrr,
+        'Projected Lifetime Value': to_date + mrr * lifetime
+    }, index=clients_df.index)
+
+
+# Session-level accessors, computed once per data version
+
+def cohorts(data):
+    return cached(data, 'cohorts', ('clients', 'services'), Cohorts)
+
+
+def lifetime_value(data):
+    return cached(data, 'lifetime_value', ('clients', 'services'), client_ltv)
+
+
+# Computed lifetime value summed per consultant
+def consultant_ltv(data):
+    def compute(clients, services):
+        ltv = lifetime_value(data)
+        return ltv[['Revenue To Date', 'Projected Lifetime Value']].groupby(
+            clients['Consultants'].astype(object).to_numpy()).sum().rename_axis('Consultants')
+    return cached(data, 'consultant_ltv', ('clients', 'services'), compute)
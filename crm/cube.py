@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from crm.metrics import incremental
+
+# Dimension value standing in for a missing one; roll-ups leave these rows out,
+# as a groupby on the raw column would
+MISSING = '(none)'
+
+# Cube -> (dimension columns, date column bucketed into the 'Month' dimension or
+#          None, count measure, summed measure columns)
+CUBES = {
+    'clients': (['Client Tier', 'Status', 'Service Categories', 'Consultants'],
+                'First Engagement', 'Clients',
+                ['Total Revenue', 'Monthly Recurring Revenue', 'Lifetime Value']),
+    'services': (['Service Category', 'Status', 'Revenue Type', 'Consultant Assigned'],
+                 'Date Engaged', 'Engagements',
+                 ['Revenue', 'Monthly Recurring Revenue']),
+    # Referral sources are free text, nearly one per client: crossed with the
+    # other dimensions they would make the clients cube as large as the table
+    'referrals': (['Referral Source'], None, 'Clients',
+                  ['Total Revenue', 'Monthly Recurring Revenue'])
+}
+
+# Cubes over another table than the one they are named after
+CUBE_TABLES = {'referrals': 'clients'}
+
+
+def table_of(name):
+    return CUBE_TABLES.get(name, name)
+
+
+# The smallest cube over a table having a column as a dimension (None if none has)
+def cube_for(table, column):
+    names = [name for name, spec in CUBES.items() if table_of(name) == table and column in spec[0]]
+    return min(names, key=lambda name: len(CUBES[name][0]), default=None)
+
+
+# Dimensions of a cube's cells, Month included
+def _dimensions(name):
+    dimensions, date_col = CUBES[name][:2]
+    return dimensions + ['Month'] if date_col else dimensions
+
+
+# Column values as strings, converting each distinct value only once
+def _labels(col):
+    codes, uniques = pd.factorize(col)
+    labels = np.append(pd.Index(uniques).astype(str).to_numpy(dtype=object), MISSING)
+    return labels[codes]
+
+
+def _months(dates):
+    months = np.datetime_as_string(dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[M]'))
+    return np.where(dates.isna().to_numpy(), MISSING, months).astype(object)
+
+
+# One fact row per table row: dimensions as plain strings and float measures.
+# The clients cube also counts how many of them pay recurring revenue.
+def facts(name, df):
+    dimensions, date_col, count, measures = CUBES[name]
+    out = {}
+    for col in dimensions:
+        out[col] = _labels(df[col])
+    if date_col:
+        out['Month'] = _months(df[date_col])
+    out[count] = np.ones(len(df))
+    for col in measures:
+        out[col] = df[col].fillna(0).to_numpy(dtype='float64')
+    if name == 'clients':
+        out['Recurring Clients'] = (df['Monthly Recurring Revenue'] > 0).to_numpy(dtype='float64')
+    return pd.DataFrame(out, index=df.index)
+
+
+def _aggregate(name, facts_df):
+    return facts_df.groupby(_dimensions(name), sort=False).sum()
+
+
+# Sums and counts of a table's rows over a cube's dimensions, one row per
+# combination of dimension values that occurs. Inserts, edits and deletes are
+# applied as the difference between the old and new versions of the touched rows only.
+class Cube:
+    def __init__(self, name, df):
+        self.name = name
+        self.cells = _aggregate(name, facts(name, df))
+        self._frame = df
+
+    def update(self, df, keys):
+        keys = pd.Index(keys)
+        if not len(keys):
+            return
+        old = facts(self.name, self._frame[self._frame.index.isin(keys)])
+        new = facts(self.name, df[df.index.isin(keys)])
+        measures = old.columns[len(_dimensions(self.name)):]
+        old[measures] = -old[measures]
+        delta = _aggregate(self.name, pd.concat([new, old]))
+        cells = self.cells.add(delta, fill_value=0)
+        # Combinations whose last row went away
+        self.cells = cells[cells[CUBES[self.name][2]].round() != 0]
+        self._frame = df
+
+    def view(self):
+        return CubeView(self.cells)
+
+
+# Read-only roll-ups of a cube's cells. Updates replace the cells frame rather
+# than mutate it, so a view stays consistent while the cube moves on.
+class CubeView:
+    def __init__(self, cells):
+        self.cells = cells
+
+    # Measures summed by the given dimensions, sorted by dimension value
+    def rollup(self, dimensions):
+        cells = self.cells
+        for dim in dimensions:
+            cells = cells[cells.index.get_level_values(dim) != MISSING]
+        if len(dimensions) == 1:
+            return cells.groupby(level=dimensions[0]).sum()
+        return cells.groupby(level=dimensions).sum()
+
+    def total(self):
+        return self.cells.sum()
+
+
+# A cube for a session, maintained incrementally as its table's rows change
+def cube(data, name):
+    return incremental(data, ('cube', name), table_of(name), lambda df: Cube(name, df), Cube.view)
@@ -0,0 +1,58 @@
+import pandas as pd
+
+# Demo book used to seed an empty storage backend
+def demo_tables():
+    clients_df = pd.DataFrame({
+        'Client Name': ['Between Coffee and Vine', 'TATU Capital', 'Tigzozo Media', 'Tourism Industry Pension Fund'],
+        'Status': ['Active', 'Active', 'Completed', 'Proposal'],
+        'Client Tier': ['Tier 2 - Standard', 'Tier 1 - Premium', 'Tier 1 - Premium', 'Tier 4 - Project-based'],
+        'First Engagement': ['2025-03-01', '2024-03-01', '2024-12-01', '2023-11-01'],
+        'Service Categories': ['HR Administration', 'Training & Development', 'HR Administration', 'Business Consulting'],
+        'Monthly Recurring Revenue': [200, 400, 0, 0],
+        'Total Revenue': [200, 400, 300, 1850],
+        'Lifetime Value': [2400, 7000, 3300, 1850],
+        'Consultants': ['Rebecca', 'Rebecca', 'Rebecca', 'Rebecca'],
+        'Referral Source': ['Patience Mapeza - WBP connection', 'Mrs Phiri', 'Brenald Chinyowa from Mrs Phiri', 'Munja Nheta (UCPF)']
+    })
+
+    services_df = pd.DataFrame({
+        'Client Name': ['TATU Capital', 'Tigzozo Media', 'Between Coffee and Vine', 'Tourism Industry Pension Fund'],
+        'Service Category': ['Training & Development', 'HR Administration', 'HR Administration', 'Business Consulting'],
+        'Nature of Assignment': ['Training and Development', 'HR Administration', 'HR Administration', 'Business Consulting'],
+        'Services Provided': ['Grooming and Deportment Training', 'Payroll Administration, Policy Design', 'Payroll Administration, Policy Design', 'Strategic Review'],
+        'Date Engaged': ['2025-08-03', '2024-12-01', '2025-03-01', '2023-11-01'],
+        'End Date': ['Once off', 'October 2025', None, None],
+        'Status': ['Completed', 'Completed', 'Active', 'Proposal'],
+        'Revenue Type': ['One-time', 'Recurring', 'Recurring', 'One-time'],
+        'Revenue': [250, 300, 200, 0],
+        'Monthly Recurring Revenue': [0, 0, 200, 0],
+        'Consultant Assigned': ['Rebecca', 'Rebecca', 'Rebecca', 'Rebecca']
+    })
+
+    issues_df = pd.DataFrame({
+        'Issue': ['Lost 2 recurring clients (Oct 2025)', 'Only 2 active recurring clients',
+                 '54% churn rate on recurring revenue', 'Low proposal conversion'],
+        'Impact': ['MRR dropped 54.5% ($600 lost)', 'High revenue concentration risk',
+                  'Unsustainable business model', 'Only $700 in active proposals'],
+        'Recommendation': ['Urgent: Win-back campaign + retention strategy',
+                         'Convert proposals to recurring contracts',
+                         'Implement customer success program',
+                         'Accelerate sales cycle, focus on high-value prospects']
+    })
+
+    opportunities_df = pd.DataFrame({
+        'Opportunity': ['IDSS - Strategic Plan', 'NECs (20 Organizations)',
+                      'Convert Tier 4 to Recurring', 'Catering Industry Pension Fund',
+                      'Tourism Industry Pension Fund'],
+        'Potential Value': [2500, 'TBD', '1000+ MRR', 1450, 1200],
+        'Priority': ['HIGH - Largest single opportunity', 'HIGH - Massive expansion potential',
+                    'CRITICAL - Stabilize revenue', 'MEDIUM - Multiple services',
+                    'MEDIUM - Policy Review']
+    })
+
+    return {
+        'clients': clients_df,
+        'services': services_df,
+        'issues': issues_df,
+        'opportunities': opportunities_df
+    }
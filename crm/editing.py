@@ -0,0 +1,55 @@
+import pandas as pd
+
+# Changed cells are passed around as {column: Series of new values indexed by row key}
+
+
+# Cell deltas from st.data_editor's widget state ({'edited_rows': {position: {column: value}}}).
+# Positions refer to rows of the frame handed to the editor; keys are that
+# frame's row keys when before has moved on since it was drawn (rows added,
+# deleted or reordered by other commits), so edits land on the rows they were
+# made on. Rows deleted since are skipped. Only cells that differ from before
+# are returned, so deltas already written back (the widget keeps them until it
+# is reset) are not applied twice.
+def editor_changes(before, editor_state, keys=None):
+    edited_rows = (editor_state or {}).get('edited_rows', {})
+    if not edited_rows:
+        return {}
+    keys = before.index if keys is None else pd.Index(keys)
+    cells = pd.DataFrame(
+        [(int(pos), col, value) for pos, row in edited_rows.items() for col, value in row.items()],
+        columns=['pos', 'column', 'value']
+    )
+    cells = cells[cells['column'].isin(before.columns) & (cells['pos'] < len(keys))]
+    cells = cells.assign(key=keys[cells['pos'].to_numpy()])
+    cells = cells[cells['key'].isin(before.index)]
+    changes = {}
+    for col, group in cells.groupby('column', sort=False):
+        rows = pd.Index(group['key'])
+        new = pd.Series(group['value'].to_numpy(), index=rows)
+        changes[col] = new[_differs(before.loc[rows, col], new)]
+    return {col: values for col, values in changes.items() if len(values)}
+
+
+# Cell deltas between two frames with the same row keys, compared column-wise
+def diff_frames(before, after, columns=None):
+    columns = columns if columns is not None else [c for c in after.columns if c in before.columns]
+    keys = before.index.intersection(after.index)
+    changes = {}
+    for col in columns:
+        old = before.loc[keys, col]
+        new = after.loc[keys, col]
+        mask = _differs(old, new)
+        if mask.any():
+            changes[col] = new[mask]
+    return changes
+
+
+def count_cells(changes):
+    return sum(len(values) for values in changes.values())
+
+
+# Element-wise inequality that treats two missing values as equal
+def _differs(old, new):
+    old = pd.Series(old.to_numpy(dtype=object), index=old.index)
+    new = pd.Series(new.to_numpy(dtype=object), index=old.index)
+    return (old != new) & ~(old.isna() & new.isna())
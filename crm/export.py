@@ -0,0 +1,248 @@
+import importlib.util
+import io
+import os
+import tempfile
+import threading
+import time
+import zipfile
+
+from crm.jobs import JobRunner
+from crm.profiling import section
+from crm.storage import TABLES, arrow_safe
+
+# Sheet/file name of each table in an export
+SHEETS = {
+    'clients': 'Clients',
+    'services': 'Services',
+    'issues': 'Issues',
+    'opportunities': 'Opportunities'
+}
+
+# Export format -> (label, file extension, mime type)
+FORMATS = {
+    'xlsx': ("Excel workbook", '.xlsx', "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    'csv': ("CSV files (zip)", '.zip', "application/zip"),
+    'parquet': ("Parquet files (zip)", '.zip', "application/zip")
+}
+
+# Rows written per step; progress is reported between steps
+CHUNK_ROWS = 10_000
+
+# Exports with fewer rows than this are built inline instead of in the background
+BACKGROUND_ROWS = 50_000
+
+# Excel exports of more rows than this come with a note that CSV or Parquet are
+# far quicker: every cell is an XML element, and openpyxl writes about 100k a second
+XLSX_SLOW_ROWS = 50_000
+
+
+def available_formats():
+    formats = ['xlsx', 'csv']
+    if importlib.util.find_spec('pyarrow') is not None:
+        formats.append('parquet')
+    return formats
+
+
+def _chunks(df):
+    for start in range(0, len(df), CHUNK_ROWS):
+        yield df.iloc[start:start + CHUNK_ROWS]
+
+
+# Excel workbook of the tables. XlsxWriter, when installed, streams each row to
+# disk in constant memory several times faster than openpyxl; openpyxl's
+# write-only mode is the fallback (it also streams rows instead of building every
+# cell in memory).
+def write_excel(tables, fileobj, step=None):
+    if importlib.util.find_spec('xlsxwriter') is not None:
+        return _write_excel_xlsxwriter(tables, fileobj, step)
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    for name, df in tables.items():
+        sheet = workbook.create_sheet(SHEETS.get(name, name))
+        df = df.reset_index()
+        sheet.append([str(c) for c in df.columns])
+        for chunk in _chunks(df):
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                sheet.append(row)
+            if step:
+                step(len(chunk))
+    workbook.save(fileobj)
+
+
+def _write_excel_xlsxwriter(tables, fileobj, step=None):
+    import xlsxwriter
+    # Cell text is written as text: no formulas or links from the data
+    workbook = xlsxwriter.Workbook(fileobj, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd',
+                                             'strings_to_formulas': False, 'strings_to_urls': False})
+    for name, df in tables.items():
+        sheet = workbook.add_worksheet(SHEETS.get(name, name))
+        df = df.reset_index()
+        sheet.write_row(0, 0, [str(c) for c in df.columns])
+        row = 1
+        for chunk in _chunks(df):
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for values in chunk.itertuples(index=False, name=None):
+                sheet.write_row(row, 0, values)
+                row += 1
+            if step:
+                step(len(chunk))
+    workbook.close()
+
+
+# Whether an export of this many rows in this format deserves a "this is slow" note
+def slow_export(fmt, rows):
+    return fmt == 'xlsx' and rows > XLSX_SLOW_ROWS
+
+
+def write_csv_zip(tables, fileobj, step=None):
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, df in tables.items():
+            with archive.open(f"{SHEETS.get(name, name)}.csv", 'w') as raw:
+                text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+                header = True
+                for chunk in _chunks(df):
+                    chunk.to_csv(text, header=header, index=True)
+                    header = False
+                    if step:
+                        step(len(chunk))
+                if header:
+                    df.to_csv(text, index=True)
+                text.flush()
+                text.detach()
+
+
+def write_parquet_zip(tables, fileobj, step=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    # Parquet is already compressed, so the zip only stores the files
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_STORED) as archive:
+        for name, df in tables.items():
+            df = arrow_safe(df).reset_index()
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            with archive.open(f"{SHEETS.get(name, name)}.parquet", 'w') as raw:
+                with pq.ParquetWriter(raw, schema) as writer:
+                    for chunk in _chunks(df):
+                        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                        if step:
+                            step(len(chunk))
+
+
+WRITERS = {
+    'xlsx': write_excel,
+    'csv': write_csv_zip,
+    'parquet': write_parquet_zip
+}
+
+
+# One export file for one data version. Runs inline or on the job runner's
+# threads and exposes progress (0..1) for the page to poll.
+class ExportJob:
+    def __init__(self, fmt, version, tables, path):
+        self.fmt = fmt
+        self.version = version
+        self.path = path
+        self.status = 'pending'
+        self.error = None
+        self.total_rows = max(sum(len(df) for df in tables.values()), 1)
+        self.rows_written = 0
+        self.seconds = None
+        self._tables = tables
+
+    @property
+    def progress(self):
+        if self.status == 'ready':
+            return 1.0
+        return min(self.rows_written / self.total_rows, 0.99)
+
+    @property
+    def ready(self):
+        return self.status == 'ready'
+
+    @property
+    def running(self):
+        return self.status in ('pending', 'running')
+
+    def run(self):
+        self.status = 'running'
+        started = time.perf_counter()
+        tmp = self.path + '.part'
+        try:
+            with open(tmp, 'wb') as fileobj, section(f"export:{self.fmt}"):
+                WRITERS[self.fmt](self._tables, fileobj, step=self._step)
+            os.replace(tmp, self.path)
+            self.status = 'ready'
+        except Exception as exc:
+            self.status = 'failed'
+            self.error = str(exc)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        finally:
+            # The snapshot is no longer needed once the file is written
+            self._tables = None
+            self.seconds = time.perf_counter() - started
+
+    def start(self, executor):
+        executor.submit(self.run)
+
+    def _step(self, rows):
+        self.rows_written += rows
+
+    def read(self):
+        with open(self.path, 'rb') as fileobj:
+            return fileobj.read()
+
+
+# Process-wide export cache: each format is built once per data version and the
+# same file is served to every user until the data changes. Large exports are
+# built on the app's job runner (see crm.jobs).
+class ExportManager:
+    def __init__(self, directory=None, runner=None):
+        self.directory = directory or tempfile.mkdtemp(prefix='crm-exports-')
+        self.runner = runner or JobRunner(workers=1)
+        os.makedirs(self.directory, exist_ok=True)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def version(self, data):
+        return data.version_of(*TABLES)
+
+    # Version of the committed tables (a session's version differs while it holds edits)
+    def committed(self, data):
+        return tuple(data.store.table_versions.get(name, 0) for name in TABLES)
+
+    def get(self, data, fmt):
+        return self._jobs.get((fmt, self.version(data)))
+
+    def request(self, data, fmt):
+        version = self.version(data)
+        with self._lock:
+            job = self._jobs.get((fmt, version))
+            if job is not None and job.status != 'failed':
+                return job
+            tables = {name: data.table(name) for name in TABLES}
+            path = os.path.join(self.directory, f"crm_{fmt}_{abs(hash(version))}{FORMATS[fmt][1]}")
+            job = ExportJob(fmt, version, tables, path)
+            self._jobs[(fmt, version)] = job
+            if version == self.committed(data):
+                self._evict(fmt, version)
+        if job.total_rows >= BACKGROUND_ROWS:
+            job.start(self.runner.executor)
+        else:
+            job.run()
+        return job
+
+    # Drop finished exports of committed data older than version (the current
+    # committed version), and private exports of sessions' edits made on top of
+    # such older data. Only called for committed requests: a session exporting
+    # its uncommitted edits never removes the file other users are served.
+    def _evict(self, fmt, version):
+        def older(key):
+            base = key[0] if isinstance(key[0], tuple) else key
+            return base != version and all(a <= b for a, b in zip(base, version))
+
+        for key, job in list(self._jobs.items()):
+            if key[0] == fmt and older(key[1]) and not job.running:
+                del self._jobs[key]
+                if os.path.exists(job.path):
+                    os.remove(job.path)
@@ -0,0 +1,256 @@
+import numpy as np
+import pandas as pd
+
+from crm.cohorts import _ordinal, _periods, churn_rate
+from crm.metrics import cached
+from crm.mrr import contributions
+
+# Simulated futures, months forecast and months in which an open deal can close
+TRIALS = 100_000
+HORIZON = 12
+CLOSE_MONTHS = 6
+SEED = 0
+
+# The deals with the largest expected value are simulated one by one; the many
+# small ones left are summed per month as a normal distribution with the same
+# mean and variance (their total is what matters, and by then it is near normal)
+EXACT_DEALS = 64
+
+# Trials simulated at once; blocks this small keep the working arrays in cache
+CHUNK_TRIALS = 2_048
+
+# Value ranges: known amounts vary by VALUE_SPREAD either way; minimums ('1000+')
+# reach up to MINIMUM_UPSIDE times the amount; unknown ones ('TBD') span the
+# middle half (PEER_QUANTILES) of comparable deals
+VALUE_SPREAD = 0.2
+MINIMUM_UPSIDE = 2.0
+PEER_QUANTILES = (0.25, 0.75)
+
+# Chance of winning a deal by the opportunity's priority (first word of the
+# label) or the status of the client or engagement in the pipeline
+PRIORITY_WIN = {'CRITICAL': 0.6, 'HIGH': 0.5, 'MEDIUM': 0.35, 'LOW': 0.2}
+DEFAULT_WIN = 0.25
+STATUS_WIN = {'Proposal': 0.4, 'Prospect': 0.15}
+
+PIPELINE_COLUMNS = ['Source', 'Name', 'Basis', 'Low', 'High', 'Win Probability', 'Expected Value']
+PERCENTILES = [10, 50, 90]
+
+
+def _deals(source, names, basis, low, high, win):
+    low, high = np.asarray(low, dtype='float64'), np.asarray(high, dtype='float64')
+    return pd.DataFrame({
+        'Source': source,
+        'Name': np.asarray(names, dtype=object),
+        'Basis': np.asarray(basis, dtype=object),
+        'Low': low,
+        'High': high,
+        'Win Probability': np.asarray(win, dtype='float64'),
+        'Expected Value': np.asarray(win, dtype='float64') * (low + high) / 2
+    })
+
+
+# Low and high value of each amount: known amounts +-VALUE_SPREAD, minimums up
+# to MINIMUM_UPSIDE times, missing ones the peer range given
+def _ranges(amount, minimum, peer_low, peer_high):
+    amount = np.asarray(amount, dtype='float64')
+    known = np.isfinite(amount) & (amount > 0)
+    low = np.where(known, np.where(minimum, amount, amount * (1 - VALUE_SPREAD)), peer_low)
+    high = np.where(known, np.where(minimum, amount * MINIMUM_UPSIDE, amount * (1 + VALUE_SPREAD)), peer_high)
+    return low, high
+
+
+def _quantiles(values):
+    values = values[np.isfinite(values) & (values > 0)]
+    if not len(values):
+        return np.nan, np.nan
+    return tuple(np.quantile(values, PEER_QUANTILES))
+
+
+# Names (casefolded) the opportunities are about, so a client or engagement
+# already listed as an opportunity is not counted twice
+def _opportunity_names(opportunities_df):
+    return set(opportunities_df['Opportunity'].dropna().astype(str).str.strip().str.casefold())
+
+
+# The rows of mask not naming a covered client (only those rows are compared)
+def _uncovered(mask, names, covered):
+    mask = mask.copy()
+    if covered and mask.any():
+        mask[mask] = ~names[mask].astype(str).str.strip().str.casefold().isin(covered).to_numpy()
+    return mask
+
+
+# Open deals, one row each: the opportunities, engagements in Proposal or
+# Prospect status, and Proposal or Prospect clients without any engagement yet.
+# Basis 'MRR' deals add a monthly amount from the month they close; 'Total'
+# deals bill once. Missing values are estimated from comparable won business.
+def pipeline(clients_df, services_df, opportunities_df):
+    covered = _opportunity_names(opportunities_df)
+    deals = []
+
+    # Opportunities; unknown values take the range of the other opportunities with the same basis
+    opp = opportunities_df
+    if len(opp):
+        amount = opp['Potential Value'].to_numpy(dtype='float64', na_value=np.nan)
+        basis = opp['Value Basis'].astype(object).fillna('Total').to_numpy()
+        peer_low, peer_high = np.full(len(opp), np.nan), np.full(len(opp), np.nan)
+        for value in ('Total', 'MRR'):
+            same = basis == value
+            peer_low[same], peer_high[same] = _quantiles(amount[same])
+        low, high = _ranges(amount, opp['Value Is Minimum'].to_numpy(dtype=bool), peer_low, peer_high)
+        priority = opp['Priority'].astype(object).fillna('').astype(str).str.split().str[0].str.upper()
+        win = priority.map(PRIORITY_WIN).fillna(DEFAULT_WIN).to_numpy()
+        deals.append(_deals('Opportunity', opp['Opportunity'], basis, low, high, win))
+
+    # Engagements not yet won; zero values take the middle half of won engagements
+    # of the same category and revenue type
+    status = services_df['Status'].astype(object)
+    open_ = _uncovered(status.isin(list(STATUS_WIN)).to_numpy(), services_df['Client Name'], covered)
+    recurring = (services_df['Revenue Type'] == 'Recurring').to_numpy()
+    mrr = services_df['Monthly Recurring Revenue'].fillna(0).to_numpy(dtype='float64')
+    revenue = services_df['Revenue'].fillna(0).to_numpy(dtype='float64')
+    value = np.where(recurring & (mrr > 0), mrr, revenue)
+    if open_.any():
+        won = pd.DataFrame({'category': services_df['Service Category'].astype(object).fillna('').to_numpy(),
+                            'recurring': recurring, 'value': np.where(value > 0, value, np.nan)})
+        peers = won[~status.isin(list(STATUS_WIN)).to_numpy()].groupby(['category', 'recurring'])['value'] \
+            .quantile(list(PEER_QUANTILES)).unstack()
+        keys = pd.MultiIndex.from_arrays([won['category'][open_], won['recurring'][open_]])
+        peer = peers.reindex(keys) if len(peers) else pd.DataFrame(np.nan, index=keys, columns=list(PEER_QUANTILES))
+        low, high = _ranges(value[open_], np.zeros(open_.sum(), dtype=bool),
+                            peer.iloc[:, 0].to_numpy(), peer.iloc[:, 1].to_numpy())
+        deals.append(_deals('Engagement', services_df['Client Name'][open_].astype(object).fillna('').to_numpy()
+                            + ' — ' + services_df['Service Category'][open_].astype(object).fillna('').to_numpy(),
+                            np.where(recurring[open_], 'MRR', 'Total'), low, high,
+                            status[open_].map(STATUS_WIN).to_numpy()))
+
+    # Prospective clients with no engagement recorded: valued like the active
+    # clients of their tier, as MRR where that tier mostly pays monthly
+    engaged = clients_df.index.isin(services_df['Client ID'].dropna().to_numpy())
+    status = clients_df['Status'].astype(object)
+    open_ = _uncovered(status.isin(list(STATUS_WIN)).to_numpy() & ~engaged, clients_df['Client Name'], covered)
+    if open_.any():
+        tier = clients_df['Client Tier'].astype(object).fillna('')
+        peers = pd.DataFrame({
+            'mrr': clients_df['Monthly Recurring Revenue'].to_numpy(dtype='float64', na_value=np.nan),
+            'total': clients_df['Total Revenue'].to_numpy(dtype='float64', na_value=np.nan)
+        }, index=tier.to_numpy())[(status == 'Active').to_numpy()]
+        monthly = peers['mrr'].groupby(level=0).median() > 0
+        ranges = {}
+        for col in ('mrr', 'total'):
+            paid = peers[col][peers[col] > 0]
+            ranges[col] = paid.groupby(level=0).quantile(list(PEER_QUANTILES)).unstack() if len(paid) \
+                else pd.DataFrame(columns=list(PEER_QUANTILES), dtype='float64')
+        tiers = tier[open_].to_numpy()
+        recurring = monthly.reindex(tiers, fill_value=False).to_numpy()
+        mrr_range = ranges['mrr'].reindex(tiers).to_numpy()
+        total_range = ranges['total'].reindex(tiers).to_numpy()
+        low = np.where(recurring, mrr_range[:, 0], total_range[:, 0])
+        high = np.where(recurring, mrr_range[:, 1], total_range[:, 1])
+        deals.append(_deals('Client', clients_df['Client Name'][open_], np.where(recurring, 'MRR', 'Total'),
+                            low, high, status[open_].map(STATUS_WIN).to_numpy()))
+
+    if not deals:
+        return _deals('Opportunity', [], [], [], [], [])[PIPELINE_COLUMNS]
+    out = pd.concat(deals, ignore_index=True)
+    # Deals nothing comparable could value are left out
+    return out[np.isfinite(out['Low']) & np.isfinite(out['High'])].reset_index(drop=True)
+
+
+# Per-trial new MRR and one-time revenue by month for a set of deals, simulated
+# deal by deal: each is won with its probability, at a uniform value in its
+# range, closing in one of the first CLOSE_MONTHS months. One uniform draw u per
+# deal and trial decides all three: the deal is won when u < p, and then u / p is
+# again uniform, its first 1/CLOSE_MONTHS part giving the month and the rest the value.
+def _simulate_exact(deals, trials, rng):
+    recurring = (deals['Basis'] == 'MRR').to_numpy()
+    out = []
+    for group in (deals[recurring], deals[~recurring]):
+        low, high = group['Low'].to_numpy(), group['High'].to_numpy()
+        win = group['Win Probability'].to_numpy()
+        scale = CLOSE_MONTHS / np.where(win > 0, win, 1)
+        monthly = np.zeros((trials, HORIZON))
+        for start in range(0, trials if len(group) else 0, CHUNK_TRIALS):
+            n = min(CHUNK_TRIALS, trials - start)
+            # Worked in place: these arrays are the bulk of the forecast's time
+            draw = rng.random((n, len(group)))
+            won = draw < win
+            np.multiply(draw, scale, out=draw)
+            cell = draw.astype(np.intp)
+            np.minimum(cell, CLOSE_MONTHS - 1, out=cell)
+            np.subtract(draw, cell, out=draw)
+            np.multiply(draw, high - low, out=draw)
+            np.add(draw, low, out=draw)
+            np.multiply(draw, won, out=draw)
+            cell += np.arange(n)[:, None] * HORIZON
+            monthly[start:start + n] = np.bincount(cell.ravel(), weights=draw.ravel(),
+                                                   minlength=n * HORIZON).reshape(n, HORIZON)
+        out.append(monthly)
+    return out
+
+
+# The same for many small deals at once: per month, a normal draw with the mean
+# and variance of their summed value
+def _simulate_normal(deals, trials, rng):
+    out = []
+    for recurring in (True, False):
+        group = deals[(deals['Basis'] == 'MRR').to_numpy() == recurring]
+        low, high = group['Low'].to_numpy(), group['High'].to_numpy()
+        p = group['Win Probability'].to_numpy() / CLOSE_MONTHS
+        mean = p * (low + high) / 2
+        second = p * (low ** 2 + low * high + high ** 2) / 3
+        monthly = np.zeros((trials, HORIZON))
+        monthly[:, :CLOSE_MONTHS] = rng.normal(mean.sum(), np.sqrt(max((second - mean ** 2).sum(), 0.0)),
+                                               (trials, CLOSE_MONTHS))
+        out.append(np.maximum(monthly, 0.0))
+    return out
+
+
+# Monte Carlo forecast of MRR and revenue over the next HORIZON months. Current
+# MRR erodes at the recent monthly churn rate; won recurring deals add their MRR
+# from the month they close and then erode at the same rate; one-time deals bill
+# once. Returns P10/P50/P90 of month-end MRR and of revenue accumulated from
+# next month on.
+class Forecast:
+    def __init__(self, clients_df, services_df, opportunities_df, today=None, trials=TRIALS, seed=SEED):
+        now = _ordinal(today)
+        rng = np.random.default_rng(seed)
+        self.pipeline = pipeline(clients_df, services_df, opportunities_df)
+        won = ~services_df['Status'].astype(object).isin(list(STATUS_WIN)).to_numpy()
+        contrib = contributions(services_df[won])
+        ongoing = (contrib['start'] <= now) & ~(contrib['stop'] <= now)
+        self.current_mrr = float(contrib.loc[ongoing, 'amount'].sum())
+        self.churn = churn_rate(services_df, today)
+        self.trials = trials
+
+        impact = self.pipeline['Expected Value'] * np.where(self.pipeline['Basis'] == 'MRR', HORIZON / 2, 1)
+        order = np.argsort(-impact.to_numpy(), kind='stable')
+        exact = self.pipeline.iloc[order[:EXACT_DEALS]]
+        rest = self.pipeline.iloc[order[EXACT_DEALS:]]
+        new_mrr, one_time = _simulate_exact(exact, trials, rng)
+        if len(rest):
+            more_mrr, more_once = _simulate_normal(rest, trials, rng)
+            new_mrr += more_mrr
+            one_time += more_once
+
+        # Paths are kept month by month (one contiguous row of trials per month),
+        # which is the layout the percentiles are taken along
+        new_mrr, one_time = np.ascontiguousarray(new_mrr.T), np.ascontiguousarray(one_time.T)
+        mrr = np.empty((HORIZON, trials))
+        level = np.full(trials, self.current_mrr)
+        for month in range(HORIZON):
+            level = level * (1 - self.churn) + new_mrr[month]
+            mrr[month] = level
+        revenue = np.cumsum(mrr + one_time, axis=0)
+
+        bands = {}
+        for name, paths in (('MRR', mrr), ('Revenue', revenue)):
+            for pct, values in zip(PERCENTILES, np.percentile(paths, PERCENTILES, axis=1)):
+                bands[f'{name} P{pct}'] = values
+        self.bands = pd.DataFrame(bands, index=_periods(np.arange(now + 1, now + HORIZON + 1)).rename('Month'))
+        self.baseline = pd.Series(self.current_mrr * (1 - self.churn) ** np.arange(1, HORIZON + 1),
+                                  index=self.bands.index, name='Baseline MRR')
+
+
+def pipeline_forecast(data):
+    return cached(data, 'pipeline_forecast', ('clients', 'services', 'opportunities'), Forecast)
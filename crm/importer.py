@@ -0,0 +1,202 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from crm.schema import CHOICES, COLUMNS, DATES, MONEY, REQUIRED, parse_end_date
+
+DEFAULT_CHUNKSIZE = 50_000
+
+# Rejected rows kept for the report; the count beyond this is still reported
+MAX_REJECTED_ROWS = 10_000
+
+
+# Outcome of one import run
+class ImportReport:
+    def __init__(self, table):
+        self.table = table
+        self.accepted = 0
+        self.rejected = 0
+        self.chunks = 0
+        self.seconds = 0.0
+        self._rejected_rows = []
+        self._kept = 0
+
+    def add_rejected(self, rows):
+        self.rejected += len(rows)
+        room = MAX_REJECTED_ROWS - self._kept
+        if room > 0 and len(rows):
+            self._rejected_rows.append(rows.head(room))
+            self._kept += min(room, len(rows))
+
+    @property
+    def rejected_rows(self):
+        if not self._rejected_rows:
+            return pd.DataFrame(columns=['Row', 'Error'])
+        return pd.concat(self._rejected_rows, ignore_index=True)
+
+    def summary(self):
+        return (f"{self.accepted:,} {self.table} rows imported, {self.rejected:,} rejected "
+                f"({self.chunks} chunks, {self.seconds:.1f}s)")
+
+
+def file_kind(name):
+    ext = os.path.splitext(name)[1].lower()
+    if ext in ('.csv', '.txt'):
+        return 'csv'
+    if ext in ('.xlsx', '.xlsm'):
+        return 'excel'
+    if ext in ('.parquet', '.pq'):
+        return 'parquet'
+    raise ValueError(f"Unsupported import file type '{ext}' (expected .csv, .xlsx or .parquet)")
+
+
+# Stream a CSV, Excel or Parquet source as DataFrame chunks of string/number cells.
+# source is a path or a file-like object (e.g. a Streamlit upload) with a name.
+def read_chunks(source, kind=None, chunksize=DEFAULT_CHUNKSIZE):
+    kind = kind or file_kind(getattr(source, 'name', source))
+    if kind == 'csv':
+        yield from pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False)
+    elif kind == 'excel':
+        from openpyxl import load_workbook
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = [str(h) if h is not None else '' for h in next(rows, [])]
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= chunksize:
+                    yield pd.DataFrame(batch, columns=header)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header)
+        finally:
+            workbook.close()
+    elif kind == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            frame = pd.read_parquet(source)
+            for start in range(0, len(frame), chunksize):
+                yield frame.iloc[start:start + chunksize]
+            return
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unknown import kind '{kind}'")
+
+
+def _text(col):
+    return col.astype(object).where(col.notna(), '').astype(str).str.strip()
+
+
+# Client lookups for linking imported engagements: first client ID per name, and all IDs
+def client_lookup(clients_df):
+    by_name = pd.Series(clients_df.index, index=clients_df['Client Name'].to_numpy())
+    return by_name[~by_name.index.duplicated()], clients_df.index
+
+
+# Normalize one chunk to the table's columns and split it into accepted rows and
+# rejected rows (with an 'Error' column). Every check runs column-wise.
+def validate_chunk(table, chunk, first_row=0, clients=None):
+    chunk = chunk.reset_index(drop=True)
+    chunk.columns = [str(c).strip() for c in chunk.columns]
+    errors = pd.Series('', index=chunk.index)
+
+    def flag(mask, message):
+        nonlocal errors
+        errors = errors.where(~mask, errors + np.where(errors == '', '', '; ') + message)
+
+    out = pd.DataFrame(index=chunk.index)
+    for col in COLUMNS[table]:
+        if col in ('Client ID', 'Value Basis', 'Value Is Minimum'):
+            continue
+        out[col] = _text(chunk[col]) if col in chunk.columns else ''
+
+    for col in REQUIRED[table]:
+        flag(out[col] == '', f"missing {col}")
+
+    for col, allowed in CHOICES[table].items():
+        flag((out[col] != '') & ~out[col].isin(allowed), f"invalid {col}")
+
+    for col in MONEY[table]:
+        raw = out[col].str.replace(r'[$,]', '', regex=True)
+        values = pd.to_numeric(raw.where(raw != '', '0'), errors='coerce')
+        flag(values.isna() | (values < 0), f"invalid {col}")
+        out[col] = values.fillna(0)
+
+    for col in DATES[table]:
+        parsed = pd.to_datetime(out[col], errors='coerce', format='mixed')
+        flag((out[col] != '') & parsed.isna(), f"invalid {col}")
+        out[col] = parsed
+
+    if table == 'services':
+        # Legacy end dates ('Once off', 'October 2025') are normalized by the schema
+        end = out['End Date']
+        parsed = parse_end_date(end.where(end != '', None), out['Date Engaged'])
+        flag((end != '') & parsed.isna(), "invalid End Date")
+        out['End Date'] = parsed
+
+        # Link engagements to clients: an explicit Client ID wins, else the first client with the name
+        if 'Client ID' in chunk.columns:
+            ids = pd.to_numeric(_text(chunk['Client ID']), errors='coerce')
+        else:
+            ids = pd.Series(np.nan, index=chunk.index)
+        by_name, known_ids = clients
+        ids = ids.where(ids.notna(), out['Client Name'].map(by_name))
+        flag(~ids.isin(known_ids), "unknown client")
+        out.insert(0, 'Client ID', ids.astype('Int64'))
+
+    rejected = chunk.assign(Row=np.arange(first_row, first_row + len(chunk)) + 2, Error=errors)
+    rejected = rejected[errors != '']
+    return out[errors == ''], rejected
+
+
+# Import a file into a table, appending accepted rows one batch per chunk.
+# data is a SessionData; progress(rows_read) is called after every chunk.
+def import_file(data, table, source, kind=None, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    report = ImportReport(table)
+    started = time.perf_counter()
+    clients = client_lookup(data.table('clients')) if table == 'services' else None
+    rows_read = 0
+    for chunk in read_chunks(source, kind, chunksize):
+        accepted, rejected = validate_chunk(table, chunk, rows_read, clients)
+        if len(accepted):
+            data.insert(table, accepted)
+            data.commit()
+        report.accepted += len(accepted)
+        report.add_rejected(rejected)
+        report.chunks += 1
+        rows_read += len(chunk)
+        if progress:
+            progress(rows_read)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main(argv=None):
+    from crm.storage import DataStore, SessionData, backend_from_env
+
+    parser = argparse.ArgumentParser(description="Bulk import clients or engagements into the CRM store")
+    parser.add_argument('table', choices=['clients', 'services'])
+    parser.add_argument('path', help="CSV, Excel (.xlsx) or Parquet file")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--rejects', help="write rejected rows with their errors to this CSV")
+    args = parser.parse_args(argv)
+
+    data = SessionData(DataStore(backend_from_env()), user='import')
+    report = import_file(data, args.table, args.path, chunksize=args.chunksize,
+                         progress=lambda n: print(f"  {n:,} rows read", file=sys.stderr))
+    print(report.summary())
+    if args.rejects and report.rejected:
+        report.rejected_rows.to_csv(args.rejects, index=False)
+        print(f"Rejected rows written to {args.rejects}")
+    return 0 if report.accepted or not report.rejected else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
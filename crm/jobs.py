@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from crm.metrics import _label
+from crm.profiling import section
+
+# Worker threads of the app's job runner. Analytics spend most of their time in
+# pandas/numpy, which release the GIL, and threads can read the shared table
+# snapshots without copying them into another process.
+WORKERS = 2
+
+# Finished jobs kept for reuse; older ones age out like metrics cache entries
+MAX_FINISHED = 64
+
+_CURRENT = threading.local()
+
+
+# Report progress from inside a running job (done out of total units of work);
+# does nothing when called outside a job
+def report_progress(done, total=None):
+    job = getattr(_CURRENT, 'job', None)
+    if job is not None:
+        job.done = done
+        if total is not None:
+            job.total = total
+
+
+# One computation of a named result for one data version
+class Job:
+    def __init__(self, key, compute, frames, shared=True):
+        self.key = key
+        self.shared = shared
+        self.status = 'pending'
+        self.result = None
+        self.error = None
+        self.done = 0
+        self.total = None
+        self.seconds = None
+        self._compute = compute
+        self._frames = frames
+        self._finished = threading.Event()
+
+    @property
+    def name(self):
+        return self.key[0]
+
+    @property
+    def ready(self):
+        return self.status == 'ready'
+
+    @property
+    def running(self):
+        return self.status in ('pending', 'running')
+
+    # Share of the work done (0..1), or None if the job reports no progress
+    @property
+    def progress(self):
+        if self.status == 'ready':
+            return 1.0
+        if not self.total:
+            return None
+        return min(self.done / self.total, 0.99)
+
+    def run(self):
+        self.status = 'running'
+        started = time.perf_counter()
+        _CURRENT.job = self
+        try:
+            with section(f"job:{_label(self.name)}"):
+                self.result = self._compute(*self._frames)
+            self.status = 'ready'
+        except Exception as exc:
+            self.status = 'failed'
+            self.error = str(exc)
+        finally:
+            _CURRENT.job = None
+            # The snapshots are no longer needed once the result is computed
+            self._frames = None
+            self.seconds = time.perf_counter() - started
+            self._finished.set()
+
+    # Block until the job finishes or the timeout passes; True if it finished
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+
+# Process-wide pool for heavy analytics. Jobs are keyed like cached() entries, on
+# a name and the data version of the tables they read, so every session asking
+# for the same result while it is being computed gets the one job in flight, and
+# sessions arriving later get the finished result. The newest finished result of
+# each name over committed data is kept so pages can show it while a newer
+# version is computed (results over a session's uncommitted edits stay private).
+class JobRunner:
+    def __init__(self, workers=WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='crm-job')
+        self._jobs = OrderedDict()
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    # Start compute(*frames) for the tables' current version, unless a job for that
+    # version is already running or finished. Failed jobs are retried.
+    def submit(self, data, name, tables, compute):
+        key = (name, data.version_of(*tables))
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != 'failed':
+                self._jobs.move_to_end(key)
+                return job
+            shared = key[1] == tuple(data.store.table_versions.get(t, 0) for t in tables)
+            job = Job(key, compute, [data.table(t) for t in tables], shared)
+            self._jobs[key] = job
+            self._evict()
+        self.executor.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        job.run()
+        if job.ready and job.shared:
+            with self._lock:
+                latest = self._latest.get(job.name)
+                if latest is None or latest.key[1] < job.key[1]:
+                    self._latest[job.name] = job
+
+    # Finished job of a name over the newest committed data seen so far
+    def latest(self, name):
+        with self._lock:
+            return self._latest.get(name)
+
+    # Drop the oldest finished jobs beyond MAX_FINISHED
+    def _evict(self):
+        finished = [key for key, job in self._jobs.items() if not job.running]
+        for key in finished[:max(len(finished) - MAX_FINISHED, 0)]:
+            del self._jobs[key]
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,203 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+from crm.profiling import section
+
+# Bounded LRU of computed KPIs and aggregates, shared by all sessions. Entries are
+# keyed on the data version of the tables they read, so a commit (add, delete or
+# edit) makes the old entries unreachable and they age out of the cache.
+class MetricsCache:
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        value = compute()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+CACHE = MetricsCache()
+
+
+# Executive Summary
+def executive_kpis(clients):
+    totals = clients.total()
+    return {
+        'total_clients': int(totals['Clients']),
+        'active_clients': int(clients.rollup(['Status'])['Clients'].get('Active', 0)),
+        'total_mrr': totals['Monthly Recurring Revenue'],
+        'total_arr': totals['Monthly Recurring Revenue'] * 12,
+        'total_revenue': totals['Total Revenue']
+    }
+
+
+def tier_counts(clients):
+    counts = clients.rollup(['Client Tier'])['Clients'].astype('int64')
+    return counts[counts > 0].sort_values(ascending=False).rename('count')
+
+
+def revenue_by_service(services):
+    return services.rollup(['Service Category'])['Revenue'].sort_values(ascending=False)
+
+
+# Revenue Analytics
+def revenue_kpis(clients, services):
+    totals = clients.total()
+    return {
+        'total_mrr': totals['Monthly Recurring Revenue'],
+        'total_arr': totals['Monthly Recurring Revenue'] * 12,
+        'total_project_revenue': services.rollup(['Revenue Type'])['Revenue'].get('One-time', 0.0),
+        'recurring_clients': int(totals['Recurring Clients']),
+        'avg_revenue_per_client': totals['Total Revenue'] / totals['Clients'] if totals['Clients'] else float('nan')
+    }
+
+
+def mrr_by_tier(clients):
+    return clients.rollup(['Client Tier'])['Monthly Recurring Revenue']
+
+
+def revenue_by_status(clients):
+    return clients.rollup(['Status'])['Total Revenue']
+
+
+def revenue_breakdown(clients):
+    return clients.rollup(['Service Categories'])[
+        ['Total Revenue', 'Monthly Recurring Revenue', 'Clients']
+    ].rename(columns={'Clients': 'Number of Clients'}).astype({'Number of Clients': 'int64'})
+
+
+# Consultant Performance
+def consultant_metrics(clients):
+    metrics = clients.rollup(['Consultants'])[
+        ['Clients', 'Total Revenue', 'Monthly Recurring Revenue']
+    ].rename(columns={'Clients': 'Unique Clients'}).astype({'Unique Clients': 'int64'})
+    metrics['Annual Recurring Revenue'] = metrics['Monthly Recurring Revenue'] * 12
+    metrics['Avg Revenue per Client'] = (
+        metrics['Total Revenue'] / metrics['Unique Clients']
+    ).round(0)
+    return metrics
+
+
+# Referral Sources
+def referral_metrics(clients):
+    return clients.rollup(['Referral Source'])[
+        ['Clients', 'Total Revenue', 'Monthly Recurring Revenue']
+    ].rename(columns={'Clients': 'Clients Referred'}).astype(
+        {'Clients Referred': 'int64'}).sort_values('Total Revenue', ascending=False)
+
+
+# Metric name -> (tables it reads, function computing it from those tables' cubes)
+METRICS = {
+    'executive_kpis': (('clients',), executive_kpis),
+    'tier_counts': (('clients',), tier_counts),
+    'revenue_by_service': (('services',), revenue_by_service),
+    'revenue_kpis': (('clients', 'services'), revenue_kpis),
+    'mrr_by_tier': (('clients',), mrr_by_tier),
+    'revenue_by_status': (('clients',), revenue_by_status),
+    'revenue_breakdown': (('clients',), revenue_breakdown),
+    'consultant_metrics': (('clients',), consultant_metrics),
+    'referral_metrics': (('clients',), referral_metrics)
+}
+
+# Cubes a metric is computed from, where they are not those of its tables
+METRIC_CUBES = {'referral_metrics': ('referrals',)}
+
+
+# Compute a value from some tables once per version of those tables.
+# Results are shared between sessions and must be treated as read-only.
+def cached(data, name, tables, compute, cache=CACHE):
+    key = (name, data.version_of(*tables))
+
+    def run():
+        with section(_label(name)):
+            return compute(*(data.table(t) for t in tables))
+    return cache.get_or_compute(key, run)
+
+
+# Profiling label of a cache entry: its name and the first parts of a composite key
+def _label(name):
+    if isinstance(name, tuple):
+        return ':'.join(str(part) for part in name[:3] if not isinstance(part, tuple))
+    return name
+
+
+# Look up a named metric for a session, computing it only when its tables changed.
+# Metrics are roll-ups of the tables' aggregate cubes (see crm.cube).
+def metric(data, name, cache=CACHE):
+    from crm.cube import cube  # crm.cube builds on the cache helpers below
+    tables, compute = METRICS[name]
+    cubes = METRIC_CUBES.get(name, tables)
+    return cached(data, name, tables, lambda *frames: compute(*(cube(data, c) for c in cubes)), cache)
+
+
+# Keeps a derived structure (built from one table) in step with the store's
+# committed snapshots by replaying its change journal: build(frame) creates the
+# structure and structure.update(frame, keys) applies the rows touched since.
+# Falls back to a full build when the journal does not reach back far enough.
+class Tracker:
+    def __init__(self, table, build):
+        self.table = table
+        self.build = build
+        self._state = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    # Bring the structure up to date and return read(structure), under the lock
+    def sync(self, store, read):
+        with self._lock:
+            frame, version = store.snapshot(self.table)
+            if self._state is not None and version != self._version:
+                keys = store.changes_since(self.table, self._version)
+                if keys is None:
+                    self._state = None
+                else:
+                    self._state.update(frame, keys)
+            if self._state is None:
+                self._state = self.build(frame)
+            self._version = version
+            return read(self._state)
+
+
+_TRACKERS = weakref.WeakKeyDictionary()
+_TRACKERS_LOCK = threading.Lock()
+
+
+def tracker(store, name, table, build):
+    with _TRACKERS_LOCK:
+        trackers = _TRACKERS.setdefault(store, {})
+        if name not in trackers:
+            trackers[name] = Tracker(table, build)
+        return trackers[name]
+
+
+# Like cached(), for structures that are cheaper to update than to rebuild:
+# committed data goes through the store's tracker, while a session holding
+# uncommitted edits to the table gets a private build from its overlay.
+def incremental(data, name, table, build, read, cache=CACHE):
+    def compute(frame):
+        if data.version_of(table) == (data.store.table_versions.get(table, 0),):
+            return tracker(data.store, name, table, build).sync(data.store, read)
+        return read(build(frame))
+    return cached(data, name, (table,), compute, cache)
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+from crm.metrics import incremental
+
+# MRR below this is treated as zero (float noise from adding and removing amounts)
+EPSILON = 0.005
+
+MOVEMENTS = ['New MRR', 'Expansion MRR', 'Contraction MRR', 'Churned MRR']
+EVENT_COLUMNS = MOVEMENTS + ['New Clients', 'Churned Clients']
+
+
+def _month(dates):
+    return (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype='float64')
+
+
+# One row per recurring engagement: client, first billed month, first month no
+# longer billed (NaN while ongoing) and the monthly amount. Months are ordinals
+# (year * 12 + month - 1). Completed engagements have their MRR zeroed, so their
+# Revenue (the monthly fee of a recurring engagement) is used instead.
+def contributions(services_df):
+    recurring = services_df[(services_df['Revenue Type'] == 'Recurring').to_numpy()
+                            & services_df['Date Engaged'].notna().to_numpy()]
+    mrr = recurring['Monthly Recurring Revenue'].fillna(0)
+    amount = mrr.where(mrr > 0, recurring['Revenue'].fillna(0)).to_numpy(dtype='float64')
+    start = _month(recurring['Date Engaged'])
+    stop = np.maximum(_month(recurring['End Date']) + 1, start + 1)
+    # Engagements not linked to a client count as a client of their own
+    client = recurring['Client ID'].astype('float64').to_numpy(na_value=np.nan)
+    client = np.where(np.isnan(client), -1.0 - recurring.index.to_numpy(), client)
+    out = pd.DataFrame({'client': client, 'start': start, 'stop': stop, 'amount': amount},
+                       index=recurring.index)
+    return out[out['amount'] > 0]
+
+
+# Classify every change in a client's MRR. Each engagement adds its amount in its
+# first month and removes it in its stop month; a running sum per client gives the
+# client's MRR before and after each change, which decides whether it is new
+# business, an expansion, a contraction or churn.
+def client_events(contrib):
+    if not len(contrib):
+        return pd.DataFrame(columns=['client', 'month'] + EVENT_COLUMNS, dtype='float64')
+    ended = contrib[contrib['stop'].notna()]
+    deltas = pd.DataFrame({
+        'client': np.concatenate([contrib['client'].to_numpy(), ended['client'].to_numpy()]),
+        'month': np.concatenate([contrib['start'].to_numpy(), ended['stop'].to_numpy()]),
+        'delta': np.concatenate([contrib['amount'].to_numpy(), -ended['amount'].to_numpy()])
+    }).groupby(['client', 'month'], sort=True)['delta'].sum().reset_index()
+    after = deltas.groupby('client', sort=False)['delta'].cumsum().to_numpy()
+    delta = deltas['delta'].to_numpy()
+    before = after - delta
+    was, now = before > EPSILON, after > EPSILON
+    return pd.DataFrame({
+        'client': deltas['client'].to_numpy(),
+        'month': deltas['month'].to_numpy(),
+        'New MRR': np.where(~was & now, after, 0.0),
+        'Expansion MRR': np.where(was & now & (delta > 0), delta, 0.0),
+        'Contraction MRR': np.where(was & now & (delta < 0), -delta, 0.0),
+        'Churned MRR': np.where(was & ~now, before, 0.0),
+        'New Clients': (~was & now).astype('float64'),
+        'Churned Clients': (was & ~now).astype('float64')
+    })
+
+
+def _by_month(events):
+    return events.groupby('month')[EVENT_COLUMNS].sum()
+
+
+# Monthly MRR movements of a services table. Built once, then kept current by
+# update(), which re-derives only the clients whose engagements changed and
+# adjusts the monthly totals by the difference.
+class MRRSeries:
+    def __init__(self, services_df):
+        self._contrib = contributions(services_df)
+        self._events = client_events(self._contrib)
+        self._monthly = _by_month(self._events)
+
+    # Apply inserted, edited or deleted engagements (keys) from the new services table
+    def update(self, services_df, keys):
+        keys = pd.Index(keys)
+        if not len(keys):
+            return
+        changed = contributions(services_df.loc[services_df.index.isin(keys)])
+        old = self._contrib[self._contrib.index.isin(keys)]
+        clients = np.union1d(old['client'].to_numpy(), changed['client'].to_numpy())
+        kept = self._contrib[~self._contrib.index.isin(keys)]
+        self._contrib = pd.concat([kept, changed]) if len(changed) else kept
+
+        stale = self._events['client'].isin(clients).to_numpy()
+        fresh = client_events(self._contrib[self._contrib['client'].isin(clients).to_numpy()])
+        monthly = self._monthly.sub(_by_month(self._events[stale]), fill_value=0)
+        self._monthly = monthly.add(_by_month(fresh), fill_value=0)
+        self._events = pd.concat([self._events[~stale], fresh], ignore_index=True)
+
+    # Month-by-month series up to the later of this month and the last change:
+    # movements, Net New MRR, MRR and active clients at month end, and churn rates
+    # relative to the start of the month
+    def frame(self, today=None):
+        today = pd.Timestamp.today() if today is None else pd.Timestamp(today)
+        monthly = self._monthly[(self._monthly[EVENT_COLUMNS].abs() > EPSILON).any(axis=1)]
+        if not len(monthly):
+            return pd.DataFrame(columns=MOVEMENTS + ['Net New MRR', 'MRR', 'Active Clients',
+                                                     'New Clients', 'Churned Clients', 'Churn Rate',
+                                                     'Client Churn Rate'],
+                                index=pd.PeriodIndex([], freq='M', name='Month'))
+        first = int(monthly.index.min())
+        last = max(int(monthly.index.max()), today.year * 12 + today.month - 1)
+        out = monthly.reindex(np.arange(first, last + 1, dtype='float64'), fill_value=0.0)
+        out['Net New MRR'] = (out['New MRR'] + out['Expansion MRR']
+                              - out['Contraction MRR'] - out['Churned MRR'])
+        out['MRR'] = out['Net New MRR'].cumsum().round(2)
+        out['Active Clients'] = (out['New Clients'] - out['Churned Clients']).cumsum()
+        opening = out['MRR'].shift(1, fill_value=0.0)
+        opening_clients = out['Active Clients'].shift(1, fill_value=0.0)
+        out['Churn Rate'] = np.where(opening > EPSILON, out['Churned MRR'] / opening.where(opening > EPSILON, 1), 0.0)
+        out['Client Churn Rate'] = np.where(opening_clients > 0,
+                                            out['Churned Clients'] / opening_clients.where(opening_clients > 0, 1), 0.0)
+        for col in ['New Clients', 'Churned Clients', 'Active Clients']:
+            out[col] = out[col].round().astype('int64')
+        ordinals = out.index.to_numpy(dtype='int64')
+        out.index = pd.PeriodIndex.from_fields(year=ordinals // 12, month=ordinals % 12 + 1, freq='M')
+        return out.rename_axis('Month')
+
+
+# Monthly MRR series for a session, kept current incrementally as engagements change
+def mrr_series(data):
+    return incremental(data, 'mrr_series', 'services', MRRSeries, lambda series: series.frame())
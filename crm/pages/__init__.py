@@ -0,0 +1,70 @@
+# Dashboard pages: sidebar label -> (module under crm.pages, page function, admin only).
+# A page's module, and the libraries it needs, are imported the first time the
+# page is opened, so the login page and the other pages never pay for them.
+import importlib
+
+import streamlit as st
+
+PAGES = {
+    "📊 Executive Summary": ('executive_summary', 'executive_summary', False),
+    "👥 Client Master List": ('client_master_list', 'client_master_list', False),
+    "📋 Service Engagements": ('service_engagements', 'service_engagements', False),
+    "💰 Revenue Analytics": ('revenue_analytics', 'revenue_analytics', False),
+    "👤 Consultant Performance": ('consultant_performance', 'consultant_performance', False),
+    "🔗 Referral Sources": ('referral_sources', 'referral_sources', False),
+    "📈 Cohorts & LTV": ('cohorts', 'cohorts_page', False),
+    "⚠️ Issues & Opportunities": ('issues_opportunities', 'issues_opportunities', False),
+    "📥 Bulk Import": ('bulk_import', 'bulk_import', True),
+    "🧾 Change Log": ('change_log', 'change_log', True),
+    "🧮 Reconciliation": ('reconciliation', 'reconciliation_page', True),
+    "⏱ Performance": ('performance', 'performance_page', True)
+}
+
+# Seconds between checks for commits made by other sessions
+NOTICE_SECONDS = 5
+
+
+# Sidebar labels a user with the given role may open, in menu order
+def page_labels(role):
+    return [label for label, (_, _, admin) in PAGES.items() if role == 'admin' or not admin]
+
+
+# Draw a page. A commit refused because another session changed the same rows
+# first is reported on the page, and the session's pending edits are dropped.
+def render(label):
+    from crm.storage import ConflictError
+    module, function, _ = PAGES[label]
+    try:
+        getattr(importlib.import_module(f'{__name__}.{module}'), function)()
+    except ConflictError as exc:
+        st.session_state.data.discard()
+        st.error(f"⚠️ {exc}")
+
+
+# Sidebar note of the commits other sessions made since this run. A full run
+# already reads the latest snapshot, so it starts with nothing to report; between
+# runs a fragment polls the session's change feed, and Refresh reruns the page
+# (derived data is then updated for the changed rows only).
+def change_notices():
+    st.session_state.data.feed.drain()
+    st.session_state.change_notices = []
+    st.fragment(run_every=NOTICE_SECONDS)(_change_notices)()
+
+
+def _change_notices():
+    pending = st.session_state.change_notices
+    pending += st.session_state.data.feed.drain()
+    if not pending:
+        return
+    rows = {}
+    for notice in pending:
+        for table, keys in notice.tables.items():
+            if keys is None or rows.get(table, set()) is None:
+                rows[table] = None
+            else:
+                rows.setdefault(table, set()).update(keys.tolist())
+    users = ", ".join(sorted({notice.user or "system" for notice in pending}))
+    tables = ", ".join(f"all {table}" if keys is None else f"{len(keys):,} {table}" for table, keys in rows.items())
+    st.info(f"🔔 {len(pending)} change{'s' if len(pending) != 1 else ''} by {users}: {tables}")
+    if st.button("🔄 Refresh", key="refresh_changes", use_container_width=True):
+        st.rerun()
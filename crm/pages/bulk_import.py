@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import streamlit as st
+
+from crm.importer import DEFAULT_CHUNKSIZE, import_file
+from crm.schema import COLUMNS, REQUIRED
+
+
+# Bulk Import (admin only)
+def bulk_import():
+    st.title("📥 Bulk Import")
+    if st.session_state.user_role != 'admin':
+        st.error("Only administrators can import data.")
+        return
+    
+    st.info("💡 Upload a CSV, Excel or Parquet file with the same columns as the export. "
+            "Rows are validated and appended in batches; rejected rows are listed with the reason.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        table = st.selectbox("Import into", ['clients', 'services'],
+                             format_func={'clients': 'Clients', 'services': 'Service Engagements'}.get)
+    with col2:
+        chunksize = st.number_input("Rows per batch", min_value=1000, value=DEFAULT_CHUNKSIZE, step=1000)
+    
+    st.caption(f"**Columns:** {', '.join(COLUMNS[table])}  \n**Required:** {', '.join(REQUIRED[table])}"
+               + ("  \nEngagements are linked by `Client ID`, or by `Client Name` when no ID is given."
+                  if table == 'services' else ""))
+    uploaded = st.file_uploader("File", type=['csv', 'xlsx', 'parquet'])
+    
+    if uploaded is not None and st.button("Import", type="primary"):
+        progress = st.empty()
+        with st.spinner("Importing..."):
+            report = import_file(st.session_state.data, table, uploaded, chunksize=int(chunksize),
+                                 progress=lambda rows: progress.caption(f"{rows:,} rows read"))
+        st.success(report.summary())
+        if report.rejected:
+            rejected = report.rejected_rows
+            st.subheader("Rejected Rows")
+            st.dataframe(rejected.head(1000), use_container_width=True, hide_index=True)
+            st.download_button(
+                label="📥 Download Rejected Rows",
+                data=rejected.to_csv(index=False),
+                file_name=f"rejected_{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv"
+            )
@@ -0,0 +1,69 @@
+import json
+
+import streamlit as st
+import pandas as pd
+
+from crm.changelog import undo
+from crm.storage import TABLES
+
+# Change sets listed, newest first
+CHANGES_SHOWN = 200
+
+
+def _short(value, limit=80):
+    text = str(value)
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+# One readable line per row event
+def _details(event):
+    if event['Operation'] == 'update':
+        before, after = json.loads(event['Before']), json.loads(event['After'])
+        return "; ".join(f"{col}: {_short(before.get(col))} → {_short(after.get(col))}"
+                         for col in json.loads(event['Columns']))
+    row = json.loads(event['After'] if event['Operation'] == 'insert' else event['Before'])
+    return _short(", ".join(f"{col}={value}" for col, value in row.items() if value is not None), 200)
+
+
+# Change Log (admin only): audit trail of every commit, with undo
+def change_log():
+    st.title("🧾 Change Log")
+    data = st.session_state.data
+    log = data.store.log
+    # Result of the last undo, kept across the rerun that follows it
+    undone = st.session_state.pop("change_log_undone", None)
+    if undone:
+        st.success(undone)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        table = st.selectbox("Table", ["All"] + list(TABLES), key="change_log_table")
+    with col2:
+        user = st.text_input("User", key="change_log_user")
+    changes = log.changes(CHANGES_SHOWN, user=user or None, table=None if table == "All" else table)
+    if changes.empty:
+        st.info("No changes recorded yet.")
+        return
+    st.dataframe(changes, use_container_width=True)
+
+    st.markdown("---")
+    st.subheader("🔎 Change Details")
+    change = st.selectbox(
+        "Change", changes.index.tolist(), key="change_log_change",
+        format_func=lambda c: f"#{c} — {changes.at[c, 'When']} by {changes.at[c, 'User'] or 'system'} "
+                              f"({changes.at[c, 'Tables']})")
+    events = log.events(change)
+    st.dataframe(events[['Table', 'Operation', 'Key']].assign(Details=events.apply(_details, axis=1)),
+                 use_container_width=True, hide_index=True)
+
+    undone_by = changes.at[change, 'Undone By']
+    if pd.notna(undone_by):
+        st.caption(f"Undone by change #{undone_by}")
+    elif st.button("↩️ Undo this change", type="primary"):
+        try:
+            undo(data, change)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.session_state.change_log_undone = f"Change #{change} undone"
+            st.rerun()
@@ -0,0 +1,88 @@
+import streamlit as st
+import pandas as pd
+
+from crm.clients import client_index, rename_client
+from crm.pages.common import bulk_actions, paginated_table, search_select
+from crm.schema import CLIENT_STATUSES, CLIENT_TIERS
+
+
+# Client Master List
+def client_master_list():
+    st.title("👥 Client Master List")
+    index = client_index(st.session_state.data)
+    
+    # Messages about a client just added or renamed, kept across the rerun that follows it
+    for kind, message in st.session_state.pop("client_messages", []):
+        getattr(st, kind)(message)
+    
+    # Add/Edit controls
+    if st.session_state.user_role == 'admin':
+        with st.expander("➕ Add New Client"):
+            with st.form("add_client_form"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    client_name = st.text_input("Client Name")
+                    status = st.selectbox("Status", CLIENT_STATUSES)
+                    client_tier = st.selectbox("Client Tier", CLIENT_TIERS)
+                    first_engagement = st.date_input("First Engagement")
+                    service_categories = st.text_input("Service Categories")
+                
+                with col2:
+                    mrr = st.number_input("Monthly Recurring Revenue", min_value=0, value=0)
+                    total_revenue = st.number_input("Total Revenue", min_value=0, value=0)
+                    lifetime_value = st.number_input("Lifetime Value", min_value=0, value=0)
+                    consultants = st.text_input("Consultants")
+                    referral_source = st.text_input("Referral Source")
+                
+                if st.form_submit_button("Add Client"):
+                    new_client = pd.DataFrame({
+                        'Client Name': [client_name],
+                        'Status': [status],
+                        'Client Tier': [client_tier],
+                        'First Engagement': [pd.Timestamp(first_engagement)],
+                        'Service Categories': [service_categories],
+                        'Monthly Recurring Revenue': [mrr],
+                        'Total Revenue': [total_revenue],
+                        'Lifetime Value': [lifetime_value],
+                        'Consultants': [consultants],
+                        'Referral Source': [referral_source]
+                    })
+                    client_id = st.session_state.data.insert('clients', new_client)[0]
+                    st.session_state.data.commit()
+                    messages = [('success', f"Client '{client_name}' added successfully!")]
+                    if index.ids(client_name).size:
+                        messages.append(('warning', f"A client named '{client_name}' already exists; "
+                                                    f"added as a separate client #{client_id}."))
+                    st.session_state.client_messages = messages
+                    st.rerun()
+    
+    # Display and edit table
+    st.subheader("Client List")
+    
+    # Filtered, sorted and paginated table (the index is the Client ID)
+    matching = paginated_table('clients', {'Status': 'Status', 'Tier': 'Client Tier', 'Consultant': 'Consultants'},
+                               key="clients_table")
+    
+    # Rename functionality
+    if st.session_state.user_role == 'admin':
+        st.markdown("---")
+        st.subheader("✏️ Rename Client")
+        col1, col2 = st.columns(2)
+        with col1:
+            client_to_rename = search_select("Select client to rename", 'clients', index.label,
+                                             key="rename_client_id", prompt="Find client")
+        with col2:
+            new_name = st.text_input("New name", key="rename_client_name")
+        if st.button("Rename Client") and client_to_rename is not None and new_name:
+            old_name = index.name(client_to_rename)
+            renamed = rename_client(st.session_state.data, client_to_rename, new_name)
+            st.session_state.data.commit()
+            st.session_state.client_messages = [
+                ('success', f"Client '{old_name}' renamed to '{new_name}' ({renamed} engagements updated)")]
+            st.rerun()
+    
+    # Bulk delete, status, consultant and tier changes
+    if st.session_state.user_role == 'admin':
+        st.markdown("---")
+        st.subheader("🧰 Bulk Actions")
+        bulk_actions('clients', matching, index.label, key="client_bulk")
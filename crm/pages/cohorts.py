@@ -0,0 +1,83 @@
+import streamlit as st
+
+from crm import charts
+from crm.cohorts import MAX_LIFETIME_MONTHS, Cohorts, churn_rate, lifetime_value
+from crm.metrics import cached
+from crm.pages.common import background_section, show_chart
+
+# Heatmap views: label -> (Cohorts method, cell format, colour scale)
+VIEWS = {
+    "Client retention": ('retention', '.0%', 'Blues'),
+    "Revenue retention": ('revenue_retention', '.0%', 'Greens'),
+    "Cumulative revenue per client": ('ltv_curve', ',.0f', 'Purples')
+}
+
+# Cohorts shown in the heatmap: label -> newest cohorts kept (None for all)
+WINDOWS = {"Last 12 months": 12, "Last 24 months": 24, "Last 36 months": 36, "All cohorts": None}
+
+# Clients listed by projected lifetime value
+TOP_CLIENTS = 100
+
+
+# Cohorts & Lifetime Value
+def cohorts_page():
+    st.title("📈 Cohorts & Lifetime Value")
+    data = st.session_state.data
+    st.caption("Clients are grouped by the month of their first engagement. A client counts as retained in a "
+               "month when it is billed that month: a recurring engagement running or a one-time engagement "
+               "starting.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        view = st.selectbox("Show", list(VIEWS), key="cohort_view")
+    with col2:
+        window = st.selectbox("Cohorts", list(WINDOWS), index=1, key="cohort_window")
+
+    # The cohort matrices are built on the job runner; switching view or window
+    # only slices the finished result
+    background_section('cohorts', ('clients', 'services'), Cohorts,
+                       lambda result: show_cohorts(result, view, WINDOWS[window]), "Cohort analysis")
+
+    st.markdown("---")
+    st.subheader("💎 Lifetime Value")
+    ltv = lifetime_value(data)
+    churn = cached(data, 'mrr_churn_rate', ('services',), churn_rate)
+    lifetime = min(1 / churn, MAX_LIFETIME_MONTHS) if churn > 0 else MAX_LIFETIME_MONTHS
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Avg Revenue To Date", f"${ltv['Revenue To Date'].mean():,.0f}" if len(ltv) else "$0")
+    with col2:
+        st.metric("Avg Projected LTV", f"${ltv['Projected Lifetime Value'].mean():,.0f}" if len(ltv) else "$0")
+    with col3:
+        st.metric("Monthly MRR Churn (12 mo)", f"{churn:.1%}")
+    with col4:
+        st.metric("Expected Remaining Lifetime", f"{lifetime:,.0f} months")
+    st.caption("Revenue to date adds up every month billed so far. The projection adds current MRR for the "
+               f"expected remaining lifetime (1 / monthly MRR churn, at most {MAX_LIFETIME_MONTHS} months).")
+
+    top = ltv.nlargest(TOP_CLIENTS, 'Projected Lifetime Value')
+    clients = data.table('clients')
+    st.dataframe(top.assign(**{'Client Name': clients.loc[top.index, 'Client Name'],
+                               'Client Tier': clients.loc[top.index, 'Client Tier']})[
+        ['Client Name', 'Client Tier', 'Revenue To Date', 'Current MRR', 'Projected Lifetime Value']
+    ].style.format({'Revenue To Date': '${:,.0f}', 'Current MRR': '${:,.0f}',
+                    'Projected Lifetime Value': '${:,.0f}'}), use_container_width=True)
+
+
+def show_cohorts(result, view, window):
+    method, text_format, color_scale = VIEWS[view]
+    summary = result.summary()
+    if summary.empty:
+        st.info("No clients with a first engagement to group into cohorts yet.")
+        return
+    values = getattr(result, method)().loc[summary.index]
+    if window is not None:
+        values = values.iloc[-window:, :window]
+    values = values.dropna(axis=1, how='all')
+    fig = charts.heatmap(values, title=f"{view} by Cohort", text_format=text_format, color_scale=color_scale,
+                         labels={'x': 'Months Since First Engagement', 'y': 'Cohort', 'color': view})
+    show_chart(fig)
+
+    with st.expander("Cohort sizes and revenue"):
+        st.dataframe(summary.iloc[::-1].style.format({'Revenue To Date': '${:,.0f}', 'Revenue per Client': '${:,.0f}'}),
+                     use_container_width=True)
@@ -0,0 +1,175 @@
+import streamlit as st
+
+from crm import profiling
+from crm.bulk import ACTIONS, delete_rows, set_column
+from crm.jobs import JobRunner
+from crm.paging import DEFAULT_PAGE_SIZE, PAGE_SIZES, match_count, page_count, query_page, row_order
+from crm.search import SEARCH_LIMIT, facet_counts, search
+
+
+# Seconds between checks on a background job, and how long a page waits for a
+# new job before showing the previous result instead (small data never flickers)
+POLL_SECONDS = 1.0
+INLINE_WAIT = 0.2
+
+
+# Job runner shared by all sessions: identical jobs in flight are computed once
+@st.cache_resource
+def get_jobs():
+    return JobRunner()
+
+
+# Render a Plotly figure (timed as its own section when profiling)
+def show_chart(fig):
+    with profiling.section("render: plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+# Paginated table: search, filters, sorting and the page window are applied to
+# the shared snapshot, so only the visible page is materialized and sent to the
+# browser. Returns the keys of all rows matching the search and filters.
+def paginated_table(table, filter_columns, key):
+    data = st.session_state.data
+    frame = data.table(table)
+    
+    query = st.text_input("🔍 Search", key=f"{key}_search", placeholder="Start typing a name, source or service")
+    
+    # Filters, with the number of rows holding each value
+    filters = {}
+    cols = st.columns(len(filter_columns))
+    for col, (label, column) in zip(cols, filter_columns.items()):
+        with col:
+            counts = facet_counts(data, table, column)
+            options = counts.index.tolist()
+            filters[column] = st.multiselect(f"Filter by {label}", options, default=options,
+                                             format_func=lambda value, counts=counts: f"{value} ({counts[value]:,})",
+                                             key=f"{key}_filter_{column}")
+    
+    # Sorting and page size
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+    with col1:
+        sort_by = st.selectbox("Sort by", [frame.index.name] + list(frame.columns), key=f"{key}_sort")
+    with col2:
+        ascending = st.radio("Order", ["Ascending", "Descending"], horizontal=True,
+                             key=f"{key}_order") == "Ascending"
+    with col3:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+                                 key=f"{key}_page_size")
+    
+    pages = page_count(match_count(data, table, filters, query), page_size)
+    with col4:
+        page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+    
+    page_df, total = query_page(data, table, filters, sort_by, ascending, page=int(page), page_size=page_size,
+                                query=query)
+    with profiling.section("render: dataframe"):
+        st.dataframe(page_df, use_container_width=True)
+    first = (int(page) - 1) * page_size + 1 if total else 0
+    st.caption(f"Showing {first:,}–{first + len(page_df) - 1 if total else 0:,} of {total:,} rows")
+    return frame.index[row_order(data, table, filters, sort_by, ascending, query)]
+
+
+# Pick one row of a large table: a search box narrows the choice to at most
+# SEARCH_LIMIT matches, so the selectbox never ships the whole table
+def search_select(label, table, format_func, key, prompt="Search"):
+    data = st.session_state.data
+    query = st.text_input(prompt, key=f"{key}_query", placeholder="Start typing to search")
+    matches = search(data, table, query)
+    if matches is None:
+        matches = data.table(table).index
+    if len(matches) > SEARCH_LIMIT:
+        st.caption(f"Showing the first {SEARCH_LIMIT} of {len(matches):,} matches; type more to narrow the list")
+    return st.selectbox(label, matches[:SEARCH_LIMIT].tolist(), format_func=format_func, key=key)
+
+
+# Pick several rows of a large table: like search_select, but rows already picked
+# stay picked while the search changes
+def search_multiselect(label, table, format_func, key, prompt="Search"):
+    data = st.session_state.data
+    query = st.text_input(prompt, key=f"{key}_query", placeholder="Start typing to search")
+    matches = search(data, table, query)
+    if matches is None:
+        matches = data.table(table).index
+    if len(matches) > SEARCH_LIMIT:
+        st.caption(f"Showing the first {SEARCH_LIMIT} of {len(matches):,} matches; type more to narrow the list")
+    current = data.table(table).index
+    picked = [k for k in st.session_state.get(key, []) if k in current]
+    seen = set(picked)
+    options = picked + [k for k in matches[:SEARCH_LIMIT].tolist() if k not in seen]
+    return st.multiselect(label, options, default=picked, format_func=format_func, key=key)
+
+
+# Bulk actions (admin): delete, or set a column (crm.bulk.ACTIONS) on the rows
+# picked by search or on every row matching the table's search and filters.
+# Each action is one vectorized write, committed as one change set, then one rerun.
+def bulk_actions(table, matching, format_func, key):
+    data = st.session_state.data
+    # Result of the last action, kept across the rerun that follows it
+    message = st.session_state.pop(f"{key}_message", None)
+    if message:
+        st.success(message)
+    scope = st.radio("Apply to", ["Picked rows", "All rows matching the search and filters"],
+                     horizontal=True, key=f"{key}_scope")
+    if scope == "Picked rows":
+        keys = search_multiselect("Rows", table, format_func, key=f"{key}_rows", prompt="Find rows")
+    else:
+        keys = matching
+    actions = ACTIONS[table]
+    col1, col2 = st.columns(2)
+    with col1:
+        action = st.selectbox("Action", ["Delete"] + list(actions), key=f"{key}_action")
+    value = None
+    with col2:
+        if action != "Delete":
+            column, options = actions[action]
+            if options is None:
+                value = st.selectbox(f"New {column}", facet_counts(data, table, column).index.tolist(),
+                                     accept_new_options=True, key=f"{key}_value_{column}")
+            else:
+                value = st.selectbox(f"New {column}", options, key=f"{key}_value_{column}")
+    confirmed = True
+    if action == "Delete":
+        note = " and their service engagements" if table == 'clients' else ""
+        confirmed = st.checkbox(f"Yes, delete {len(keys):,} rows{note}", key=f"{key}_confirm")
+    if st.button(f"{action} ({len(keys):,} rows)", type="primary", key=f"{key}_apply",
+                 disabled=not len(keys) or not confirmed or (action != "Delete" and value is None)):
+        if action == "Delete":
+            deleted, cascaded = delete_rows(data, table, keys)
+            message = f"{deleted:,} rows deleted" + (f" with {cascaded:,} service engagements" if cascaded else "")
+        else:
+            changed = set_column(data, table, keys, column, value)
+            message = f"{column} set to '{value}' on {changed:,} rows"
+        data.commit()
+        st.session_state[f"{key}_message"] = message
+        st.rerun()
+
+
+# A page section computed on the job runner. compute(*frames) runs in the
+# background for the tables' current version; render(result) draws it. While the
+# job runs the section shows the previous result (if any) with a progress note,
+# and only the section reruns to check on the job.
+def background_section(name, tables, compute, render, label):
+    job = get_jobs().submit(st.session_state.data, name, tables, compute)
+    job.wait(INLINE_WAIT)
+    polling = job.running
+    st.fragment(run_every=POLL_SECONDS if polling else None)(_job_panel)(job, render, label, polling)
+
+
+def _job_panel(job, render, label, polling):
+    if job.ready:
+        if polling:
+            # Finished in the background: re-render once to stop polling
+            st.rerun()
+        render(job.result)
+    elif job.status == 'failed':
+        st.error(f"{label} failed: {job.error}")
+    else:
+        text = f"Computing {label.lower()}..."
+        if job.progress is None:
+            st.caption(f"⏳ {text}")
+        else:
+            st.progress(job.progress, text=text)
+        previous = get_jobs().latest(job.name)
+        if previous is not None:
+            st.caption("Showing the last computed result until the update finishes.")
+            render(previous.result)
@@ -0,0 +1,24 @@
+import streamlit as st
+
+from crm import charts
+from crm.cohorts import consultant_ltv
+from crm.metrics import metric
+from crm.pages.common import show_chart
+
+
+# Consultant Performance
+def consultant_performance():
+    st.title("👤 Consultant Performance")
+    
+    # Calculate performance metrics (cached per data version), with lifetime
+    # value computed from each consultant's clients' engagements
+    consultant_metrics = metric(st.session_state.data, 'consultant_metrics').join(
+        consultant_ltv(st.session_state.data).rename(columns={'Revenue To Date': 'Lifetime Value (to date)'}))
+    
+    st.dataframe(consultant_metrics, use_container_width=True)
+    
+    # Visualization
+    fig = charts.chart(st.session_state.data, 'consultant_metrics', charts.bar,
+                       y=['Total Revenue', 'Monthly Recurring Revenue'],
+                       title="Consultant Revenue Comparison", barmode='group')
+    show_chart(fig)
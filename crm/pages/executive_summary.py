@@ -0,0 +1,105 @@
+from datetime import datetime
+
+import streamlit as st
+
+from crm import charts
+from crm.export import FORMATS, ExportManager, available_formats, slow_export
+from crm.metrics import metric
+from crm.pages.common import get_jobs, show_chart
+from crm.storage import TABLES
+
+
+# Executive Summary
+def executive_summary():
+    st.title("📊 Executive Summary")
+    data = st.session_state.data
+    
+    # Calculate metrics (cached per data version)
+    kpis = metric(data, 'executive_kpis')
+    
+    # KPI Cards
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    with col1:
+        st.metric("Total Clients", kpis['total_clients'])
+    with col2:
+        st.metric("Active Clients", kpis['active_clients'])
+    with col3:
+        st.metric("Monthly Recurring Revenue", f"${kpis['total_mrr']:,.0f}")
+    with col4:
+        st.metric("Annual Recurring Revenue", f"${kpis['total_arr']:,.0f}")
+    with col5:
+        st.metric("Total Revenue", f"${kpis['total_revenue']:,.0f}")
+    
+    st.markdown("---")
+    
+    # Charts
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Client distribution by tier
+        fig = charts.chart(data, 'tier_counts', charts.pie, title="Client Distribution by Tier")
+        show_chart(fig)
+    
+    with col2:
+        # Revenue by service category
+        fig = charts.chart(data, 'revenue_by_service', charts.bar,
+                           orientation='h', title="Revenue by Service Category",
+                           labels={'x': 'Revenue ($)', 'y': 'Service Category'})
+        show_chart(fig)
+    
+    # Export
+    st.markdown("---")
+    export_data()
+
+
+# Export cache shared by all sessions: one file per format and data version
+@st.cache_resource
+def get_exports():
+    return ExportManager(runner=get_jobs())
+
+
+# Export function
+def export_data():
+    exports = get_exports()
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        fmt = st.selectbox("Export format", available_formats(),
+                           format_func=lambda f: FORMATS[f][0], key="export_format")
+    
+    # Poll for progress only while a background export is being built
+    job = exports.get(st.session_state.data, fmt)
+    polling = job is not None and job.running
+    with col2:
+        st.fragment(run_every=1.0 if polling else None)(export_panel)(exports, fmt, polling)
+
+
+def export_panel(exports, fmt, polling):
+    label, ext, mime = FORMATS[fmt]
+    job = exports.get(st.session_state.data, fmt)
+    
+    if job is None or job.status == 'failed':
+        if job is not None:
+            st.error(f"Export failed: {job.error}")
+        rows = sum(len(st.session_state.data.table(name)) for name in TABLES)
+        if slow_export(fmt, rows):
+            st.caption(f"⚠️ An Excel workbook of {rows:,} rows takes a while to build; "
+                       "CSV or Parquet exports of the same data are much faster.")
+        if st.button("📥 Export Executive Summary"):
+            job = exports.request(st.session_state.data, fmt)
+            if job.running:
+                # Re-render with polling switched on
+                st.rerun()
+    
+    if job is not None and job.running:
+        st.progress(job.progress, text=f"Building {label.lower()}... {job.rows_written:,} of {job.total_rows:,} rows")
+    elif job is not None and job.ready:
+        if polling:
+            # Finished in the background: re-render once to stop polling
+            st.rerun()
+        st.download_button(
+            label=f"📥 Download {label}",
+            data=job.read(),
+            file_name=f"CRM_Dashboard_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}",
+            mime=mime
+        )
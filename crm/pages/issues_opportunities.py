@@ -0,0 +1,118 @@
+import streamlit as st
+import pandas as pd
+
+from crm import charts
+from crm.forecast import (CLOSE_MONTHS, HORIZON, MINIMUM_UPSIDE, PEER_QUANTILES, PRIORITY_WIN, STATUS_WIN,
+                          VALUE_SPREAD, pipeline_forecast)
+from crm.pages.common import show_chart
+from crm.schema import PRIORITIES
+
+# Open deals listed under the forecast, by expected value
+DEALS_SHOWN = 100
+
+
+# Issues and Opportunities
+def issues_opportunities():
+    st.title("⚠️ Critical Issues & Growth Opportunities")
+    issues_df = st.session_state.data.table('issues')
+    opportunities_df = st.session_state.data.table('opportunities')
+    
+    # Critical Issues
+    st.subheader("🚨 Critical Issues & Risks")
+    st.dataframe(issues_df, use_container_width=True, hide_index=True)
+    
+    # Add/Delete issues (admin only)
+    if st.session_state.user_role == 'admin':
+        with st.expander("➕ Add New Issue"):
+            with st.form("add_issue_form"):
+                issue = st.text_input("Issue")
+                impact = st.text_area("Impact")
+                recommendation = st.text_area("Recommendation")
+                
+                if st.form_submit_button("Add Issue"):
+                    new_issue = pd.DataFrame({
+                        'Issue': [issue],
+                        'Impact': [impact],
+                        'Recommendation': [recommendation]
+                    })
+                    st.session_state.data.insert('issues', new_issue)
+                    st.session_state.data.commit()
+                    st.success("Issue added successfully!")
+                    st.rerun()
+    
+    st.markdown("---")
+    
+    # Growth Opportunities
+    st.subheader("🎯 Growth Opportunities")
+    st.dataframe(opportunities_df, use_container_width=True, hide_index=True)
+    
+    # Add/Delete opportunities (admin only)
+    if st.session_state.user_role == 'admin':
+        with st.expander("➕ Add New Opportunity"):
+            with st.form("add_opportunity_form"):
+                opportunity = st.text_input("Opportunity")
+                potential_value = st.text_input("Potential Value")
+                priority = st.selectbox("Priority", PRIORITIES)
+                
+                if st.form_submit_button("Add Opportunity"):
+                    new_opp = pd.DataFrame({
+                        'Opportunity': [opportunity],
+                        'Potential Value': [potential_value],
+                        'Priority': [priority]
+                    })
+                    st.session_state.data.insert('opportunities', new_opp)
+                    st.session_state.data.commit()
+                    st.success("Opportunity added successfully!")
+                    st.rerun()
+    
+    st.markdown("---")
+    pipeline_section()
+
+
+# Pipeline forecast: Monte Carlo bands of MRR and revenue over the next HORIZON months
+def pipeline_section():
+    st.subheader("🔮 Pipeline Forecast")
+    forecast = pipeline_forecast(st.session_state.data)
+    bands, deals = forecast.bands, forecast.pipeline
+    last = bands.iloc[-1]
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Current MRR", f"${forecast.current_mrr:,.0f}")
+    with col2:
+        st.metric(f"MRR in {HORIZON} Months (P50)", f"${last['MRR P50']:,.0f}",
+                  f"{last['MRR P50'] - forecast.current_mrr:+,.0f}")
+    with col3:
+        st.metric(f"{HORIZON}-Month Revenue (P50)", f"${last['Revenue P50']:,.0f}")
+    with col4:
+        st.metric("Open Deals", f"{len(deals):,}")
+    st.caption(f"P10–P90: MRR ${last['MRR P10']:,.0f}–${last['MRR P90']:,.0f}, "
+               f"revenue ${last['Revenue P10']:,.0f}–${last['Revenue P90']:,.0f} "
+               f"over {forecast.trials:,} simulated futures.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = charts.fan(bands, "Forecast MRR", 'MRR P10', 'MRR P50', 'MRR P90',
+                         labels={'x': 'Month', 'y': 'MRR ($)'})
+        show_chart(fig)
+    with col2:
+        fig = charts.fan(bands, "Forecast Revenue (cumulative)", 'Revenue P10', 'Revenue P50', 'Revenue P90',
+                         labels={'x': 'Month', 'y': 'Revenue ($)'})
+        show_chart(fig)
+    
+    with st.expander("Open deals and assumptions"):
+        st.caption(
+            "Deals are the opportunities, engagements in Proposal or Prospect status, and Proposal or Prospect "
+            "clients with no engagement yet (those named by an opportunity are counted once). Known values vary "
+            f"by ±{VALUE_SPREAD:.0%}, minimums ('1000+') up to {MINIMUM_UPSIDE:g} times the amount, and unknown "
+            f"values ('TBD', zero) span the P{PEER_QUANTILES[0] * 100:g}–P{PEER_QUANTILES[1] * 100:g} range of "
+            "comparable won business. Win chances by priority: "
+            + ", ".join(f"{k.title()} {v:.0%}" for k, v in PRIORITY_WIN.items())
+            + "; by status: " + ", ".join(f"{k} {v:.0%}" for k, v in STATUS_WIN.items())
+            + f". Won deals close in one of the next {CLOSE_MONTHS} months; current and won MRR erode at the "
+            f"recent monthly churn rate ({forecast.churn:.1%}).")
+        st.dataframe(deals.nlargest(DEALS_SHOWN, 'Expected Value').style.format({
+            'Low': '${:,.0f}', 'High': '${:,.0f}', 'Win Probability': '{:.0%}', 'Expected Value': '${:,.0f}'
+        }), use_container_width=True, hide_index=True)
+        if len(deals) > DEALS_SHOWN:
+            st.caption(f"Showing the {DEALS_SHOWN} largest of {len(deals):,} deals by expected value")
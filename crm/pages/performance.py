@@ -0,0 +1,59 @@
+import os
+
+import streamlit as st
+
+from crm import profiling
+from crm.metrics import CACHE
+
+
+# Performance (admin only): opt-in rerun profiling
+def performance_page():
+    st.title("⏱ Performance")
+    profiler = profiling.PROFILER
+    
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        enabled = st.toggle("Record timings", value=profiler.enabled)
+    with col2:
+        memory = st.toggle("Trace memory", value=profiler.memory, disabled=not enabled,
+                           help="Records peak allocated memory per page and section; slows reruns down. "
+                                "The peak is process-wide, so it includes other sessions running at the same time")
+    if (enabled, enabled and memory) != (profiler.enabled, profiler.memory):
+        profiler.configure(enabled, memory)
+        st.rerun()
+    with col3:
+        if st.button("Reset statistics"):
+            profiler.reset()
+            st.rerun()
+    
+    if not profiler.enabled:
+        st.info("Profiling is off. Switch on **Record timings** (or start the app with `CRM_PROFILE=1`, "
+                "or `CRM_PROFILE=memory` to also trace memory) and browse the dashboard.")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Metrics Cache Entries", len(CACHE))
+    with col2:
+        lookups = CACHE.hits + CACHE.misses
+        st.metric("Metrics Cache Hit Rate", f"{CACHE.hits / lookups:.0%}" if lookups else "-")
+    with col3:
+        st.metric("Sessions Seen", len(profiler.sessions))
+    
+    st.subheader("Pages")
+    st.dataframe(profiler.frame('page'), use_container_width=True)
+    st.subheader("Sections")
+    st.caption("Cached computations (metrics, cubes, figures, page queries), rendering and exports")
+    st.dataframe(profiler.frame('section'), use_container_width=True)
+    st.subheader("Sessions")
+    st.dataframe(profiler.session_frame(), use_container_width=True)
+    
+    # Only the file the operator configured is ever written from here
+    st.subheader("Metrics File")
+    path = os.environ.get('CRM_METRICS_FILE')
+    if not path:
+        st.caption("Set `CRM_METRICS_FILE` when starting the app to have these numbers written to a file.")
+    elif st.button("Write metrics file now"):
+        profiler.write_metrics(path, CACHE)
+        st.success(f"Metrics written to {path}")
+    with st.expander("Preview"):
+        st.code(profiler.metrics_text(CACHE), language="text")
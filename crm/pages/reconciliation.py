@@ -0,0 +1,52 @@
+import streamlit as st
+
+from crm.reconcile import CHECKS, DERIVED, derive, engagement_totals, mismatches, reconciliation
+
+# Flagged clients listed at once
+ROWS_SHOWN = 500
+
+
+# Reconciliation (admin only): client figures checked against their engagements
+def reconciliation_page():
+    st.title("🧮 Reconciliation")
+    data = st.session_state.data
+    report = reconciliation(data)
+    # Result of the last derive, kept across the rerun that follows it
+    derived_message = st.session_state.pop("reconcile_derived", None)
+    if derived_message:
+        st.success(derived_message)
+    st.caption("Each client's revenue, MRR, status and consultant are compared with what its service "
+               "engagements say. Clients without engagements are expected to have no revenue or MRR.")
+
+    columns = st.columns(len(CHECKS))
+    for col, (check, description) in zip(columns, CHECKS.items()):
+        with col:
+            st.metric(f"{check} Mismatches", f"{int(report[f'{check} Mismatch'].sum()):,}", help=description)
+    unlinked = engagement_totals(data).unlinked
+    if unlinked:
+        st.caption(f"{unlinked:,} engagements are not linked to a client and are left out.")
+
+    checks = st.multiselect("Checks", list(CHECKS), default=list(CHECKS), key="reconcile_checks")
+    flagged = mismatches(report, checks) if checks else report.iloc[:0]
+    if flagged.empty:
+        st.success("No mismatches found.")
+        return
+    st.dataframe(flagged.head(ROWS_SHOWN).style.format({
+        'Total Revenue': '${:,.0f}', 'Engagement Revenue': '${:,.0f}',
+        'Monthly Recurring Revenue': '${:,.0f}', 'Engagement MRR': '${:,.0f}'}), use_container_width=True)
+    if len(flagged) > ROWS_SHOWN:
+        st.caption(f"Showing {ROWS_SHOWN:,} of {len(flagged):,} flagged clients.")
+
+    st.markdown("---")
+    st.subheader("🔧 Derive From Engagements")
+    with st.form("derive_form"):
+        derived = st.multiselect("Columns", list(DERIVED), key="reconcile_derive")
+        submitted = st.form_submit_button("Update flagged clients")
+        if submitted:
+            if not derived:
+                st.error("Choose the columns to derive")
+            else:
+                changed = derive(data, flagged.index, derived)
+                data.commit()
+                st.session_state.reconcile_derived = f"✅ {changed} cell{'s' if changed != 1 else ''} updated from the engagements"
+                st.rerun()
@@ -0,0 +1,127 @@
+import streamlit as st
+
+from crm import charts, profiling
+from crm.editing import editor_changes
+from crm.metrics import metric
+from crm.pages.common import show_chart
+from crm.referrals import referral_attribution
+from crm.schema import CLIENT_STATUSES
+from crm.storage import ConflictError
+
+# Client columns shown in the referral editor
+EDITED_COLUMNS = ['Client Name', 'Referral Source', 'Status', 'Total Revenue', 'Monthly Recurring Revenue']
+
+
+# Referral Sources
+def referral_sources():
+    st.title("🔗 Referral Source Analysis")
+    clients_df = st.session_state.data.table('clients')
+    
+    # Editable table for admin users
+    if st.session_state.user_role == 'admin':
+        st.subheader("✏️ Edit Client Information")
+        st.info("💡 Click on any cell to edit it directly. You can edit Referral Source, Status, Total Revenue, and Monthly Recurring Revenue. Changes are saved automatically.")
+        
+        # Edits refused because another user changed the rows first are dropped
+        # from the editor before it is drawn again
+        conflict = st.session_state.pop("referral_editor_conflict", None)
+        if conflict:
+            st.session_state.pop("referral_editor", None)
+            st.error(f"⚠️ {conflict}")
+        
+        # Write back only the cells the editor reports as changed. Its edits
+        # address rows by position in the frame last drawn, so they are mapped to
+        # client IDs through that frame's keys and checked against commits newer
+        # than the clients version it was drawn from.
+        rendered = st.session_state.get("referral_editor_version")
+        if rendered is not None:
+            changes = editor_changes(clients_df[EDITED_COLUMNS], st.session_state.get("referral_editor"),
+                                     keys=st.session_state.get("referral_editor_keys"))
+            if changes:
+                changed_cells = st.session_state.data.update_cells('clients', changes, since=rendered)
+                try:
+                    st.session_state.data.commit()
+                except ConflictError as exc:
+                    st.session_state.data.discard()
+                    st.session_state.referral_editor_conflict = str(exc)
+                    st.rerun()
+                st.success(f"✅ Client data updated successfully! ({changed_cells} cell{'s' if changed_cells != 1 else ''} changed)")
+        
+        # The editor's positions only fit the rows they were made on: once the
+        # clients have changed (here or in another session) it starts afresh
+        version = st.session_state.data.read_version('clients')
+        if version != rendered:
+            st.session_state.pop("referral_editor", None)
+        clients_df = st.session_state.data.table('clients')
+        
+        # Create editable dataframe with all editable columns
+        referral_edit_df = clients_df[EDITED_COLUMNS].copy()
+        
+        # Use data_editor for inline editing
+        with profiling.section("render: data_editor"):
+            st.data_editor(
+                referral_edit_df,
+                use_container_width=True,
+                hide_index=True,
+                disabled=['Client Name'],  # Only Client Name is read-only
+                column_config={
+                    "Client Name": st.column_config.TextColumn("Client Name", width="medium"),
+                    "Referral Source": st.column_config.TextColumn("Referral Source", width="large"),
+                    "Status": st.column_config.SelectboxColumn(
+                        "Status",
+                        width="small",
+                        options=CLIENT_STATUSES,
+                        required=True
+                    ),
+                    "Total Revenue": st.column_config.NumberColumn(
+                        "Total Revenue",
+                        format="$%d",
+                        min_value=0,
+                        step=1
+                    ),
+                    "Monthly Recurring Revenue": st.column_config.NumberColumn(
+                        "Monthly Recurring Revenue (MRR)",
+                        format="$%d",
+                        min_value=0,
+                        step=1
+                    )
+                },
+                key="referral_editor"
+            )
+        st.session_state.referral_editor_version = version
+        st.session_state.referral_editor_keys = clients_df.index
+        
+        st.markdown("---")
+    else:
+        # Read-only view for non-admin users
+        st.subheader("📋 Client Information")
+        referral_display = clients_df[EDITED_COLUMNS].sort_values('Client Name')
+        st.dataframe(referral_display, use_container_width=True, hide_index=True)
+        st.markdown("---")
+    
+    # Referral performance metrics
+    st.subheader("📊 Referral Performance Metrics")
+    referral_metrics = metric(st.session_state.data, 'referral_metrics')
+    
+    st.dataframe(referral_metrics, use_container_width=True)
+    
+    # Visualization
+    fig = charts.chart(st.session_state.data, 'referral_metrics', charts.bar, y='Total Revenue',
+                       title="Total Revenue by Referral Source",
+                       labels={'x': 'Referral Source', 'y': 'Total Revenue ($)'}, tickangle=-45)
+    show_chart(fig)
+    
+    # Referral network: chains in the sources ("A from B") credit everyone upstream
+    st.markdown("---")
+    st.subheader("🕸️ Referral Network Attribution")
+    st.caption("Sources are read as chains of people and organizations (e.g. \"Brenald Chinyowa from Mrs Phiri\"). "
+               "Direct figures count the clients a referrer brought in themselves; attributed figures add every "
+               "client referred further down their chain.")
+    attribution = referral_attribution(st.session_state.data)
+    st.dataframe(attribution, use_container_width=True)
+    
+    fig = charts.chart(st.session_state.data, 'referral_attribution', charts.bar,
+                       y=['Attributed Total Revenue', 'Direct Total Revenue'], other=None,
+                       title="Attributed vs Direct Revenue (Top Referrers)",
+                       labels={'value': 'Revenue ($)', 'variable': ''}, tickangle=-45)
+    show_chart(fig)
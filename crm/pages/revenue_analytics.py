@@ -0,0 +1,104 @@
+import streamlit as st
+
+from crm import charts
+from crm.metrics import metric
+from crm.mrr import MRRSeries
+from crm.pages.common import background_section, show_chart
+
+
+# Revenue Analytics
+def revenue_analytics():
+    st.title("💰 Revenue Analytics")
+    data = st.session_state.data
+    
+    # Calculate metrics (cached per data version)
+    kpis = metric(data, 'revenue_kpis')
+    
+    # KPIs
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Total MRR", f"${kpis['total_mrr']:,.0f}")
+    with col2:
+        st.metric("Annual Recurring Revenue", f"${kpis['total_arr']:,.0f}")
+    with col3:
+        st.metric("Total Project Revenue", f"${kpis['total_project_revenue']:,.0f}")
+    with col4:
+        st.metric("Recurring Clients", kpis['recurring_clients'])
+    with col5:
+        st.metric("Avg Revenue/Client", f"${kpis['avg_revenue_per_client']:,.0f}")
+    
+    st.markdown("---")
+    
+    # MRR trend, derived month by month from the recurring engagements on the
+    # job runner, so the rest of the page does not wait for it
+    st.subheader("MRR Trend")
+    background_section('mrr_trend', ('services',), mrr_trend, show_mrr_trend, "MRR trend")
+    
+    st.markdown("---")
+    
+    # Charts
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # MRR by client tier
+        fig = charts.chart(data, 'mrr_by_tier', charts.bar,
+                           title="Monthly Recurring Revenue by Client Tier",
+                           labels={'x': 'Client Tier', 'y': 'MRR ($)'})
+        show_chart(fig)
+    
+    with col2:
+        # Revenue by status
+        fig = charts.chart(data, 'revenue_by_status', charts.pie, title="Total Revenue by Client Status")
+        show_chart(fig)
+    
+    # Detailed table
+    st.subheader("Revenue Breakdown")
+    revenue_summary = metric(data, 'revenue_breakdown')
+    st.dataframe(revenue_summary, use_container_width=True)
+
+
+# The MRR series and its two figures, built together in the background from the
+# services snapshot the job was given (never from a session, whose uncommitted
+# edits must not end up in a result other sessions are shown)
+def mrr_trend(services):
+    trend = MRRSeries(services).frame()
+    if trend.empty:
+        return trend, None, None
+    line = charts.line(trend, y='MRR', title="Monthly Recurring Revenue", labels={'x': 'Month', 'y': 'MRR ($)'})
+    movements = charts.movements(trend, title="MRR Movements",
+                                 columns={'New MRR': 'New', 'Expansion MRR': 'Expansion',
+                                          'Contraction MRR': 'Contraction', 'Churned MRR': 'Churned'},
+                                 negative=['Contraction MRR', 'Churned MRR'],
+                                 labels={'x': 'Month', 'value': 'MRR ($)', 'variable': 'Movement'})
+    return trend, line, movements
+
+
+def show_mrr_trend(result):
+    trend, line, movements = result
+    if trend.empty:
+        st.info("No recurring engagements to chart yet.")
+        return
+    last = trend.iloc[-1]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("MRR This Month", f"${last['MRR']:,.0f}", f"{last['Net New MRR']:+,.0f}")
+    with col2:
+        st.metric("Churned MRR (12 mo)", f"${trend['Churned MRR'].tail(12).sum():,.0f}")
+    with col3:
+        st.metric("Peak MRR", f"${trend['MRR'].max():,.0f}")
+    with col4:
+        worst = trend['Churn Rate'].idxmax()
+        st.metric("Highest Monthly Churn", f"{trend['Churn Rate'].max():.0%}", str(worst), delta_color="off")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        show_chart(line)
+    with col2:
+        show_chart(movements)
+    
+    with st.expander("Monthly MRR and churn"):
+        st.dataframe(trend.iloc[::-1].style.format({
+            'New MRR': '${:,.0f}', 'Expansion MRR': '${:,.0f}', 'Contraction MRR': '${:,.0f}',
+            'Churned MRR': '${:,.0f}', 'Net New MRR': '${:,.0f}', 'MRR': '${:,.0f}',
+            'Churn Rate': '{:.1%}', 'Client Churn Rate': '{:.1%}'
+        }), use_container_width=True)
@@ -0,0 +1,68 @@
+import streamlit as st
+import pandas as pd
+
+from crm.clients import client_index
+from crm.pages.common import bulk_actions, paginated_table, search_select
+from crm.schema import ENGAGEMENT_STATUSES, REVENUE_TYPES
+
+
+# Service Engagements
+def service_engagements():
+    st.title("📋 Service Engagements")
+    services_df = st.session_state.data.table('services')
+    index = client_index(st.session_state.data)
+    
+    # Add service
+    if st.session_state.user_role == 'admin':
+        with st.expander("➕ Add New Service Engagement"):
+            # Chosen outside the form so the list follows the search as it is typed
+            client_id = search_select("Client Name", 'clients', index.label, key="add_service_client",
+                                      prompt="Find client")
+            with st.form("add_service_form"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    service_category = st.text_input("Service Category")
+                    nature = st.text_input("Nature of Assignment")
+                    services_provided = st.text_area("Services Provided")
+                    date_engaged = st.date_input("Date Engaged")
+                
+                with col2:
+                    end_date = st.date_input("End Date (optional)", value=None)
+                    status = st.selectbox("Status", ENGAGEMENT_STATUSES)
+                    revenue_type = st.selectbox("Revenue Type", REVENUE_TYPES)
+                    revenue = st.number_input("Revenue", min_value=0, value=0)
+                    mrr = st.number_input("Monthly Recurring Revenue", min_value=0, value=0)
+                    consultant = st.text_input("Consultant Assigned")
+                
+                if st.form_submit_button("Add Service Engagement") and client_id is not None:
+                    new_service = pd.DataFrame({
+                        'Client ID': [client_id],
+                        'Client Name': [index.name(client_id)],
+                        'Service Category': [service_category],
+                        'Nature of Assignment': [nature],
+                        'Services Provided': [services_provided],
+                        'Date Engaged': [pd.Timestamp(date_engaged)],
+                        'End Date': [pd.Timestamp(end_date) if end_date else pd.NaT],
+                        'Status': [status],
+                        'Revenue Type': [revenue_type],
+                        'Revenue': [revenue],
+                        'Monthly Recurring Revenue': [mrr],
+                        'Consultant Assigned': [consultant]
+                    })
+                    st.session_state.data.insert('services', new_service)
+                    st.session_state.data.commit()
+                    st.success("Service engagement added successfully!")
+                    st.rerun()
+    
+    # Display services (the index is the Engagement ID)
+    st.subheader("Service Engagements List")
+    matching = paginated_table('services', {'Status': 'Status', 'Revenue Type': 'Revenue Type',
+                                            'Consultant': 'Consultant Assigned'}, key="services_table")
+    
+    # Bulk delete, status and consultant changes
+    if st.session_state.user_role == 'admin':
+        st.markdown("---")
+        st.subheader("🧰 Bulk Actions")
+        bulk_actions('services', matching,
+                     lambda eid: f"#{eid} - {services_df.at[eid, 'Client Name']} - {services_df.at[eid, 'Service Category']}",
+                     key="service_bulk")
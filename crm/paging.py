@@ -0,0 +1,53 @@
+import numpy as np
+
+from crm.metrics import cached
+from crm.search import search
+
+PAGE_SIZES = [25, 50, 100, 250, 500]
+DEFAULT_PAGE_SIZE = 50
+
+
+# Row positions matching the filters (and, given the row keys a search matched,
+# the search), in sort order. Cached per table version, filters, search and sort
+# so paging through a result only slices this array.
+def _row_order(df, filters, sort_by, ascending, matches=None):
+    mask = np.ones(len(df), dtype=bool)
+    for col, values in filters:
+        mask &= df[col].isin(values).to_numpy()
+    if matches is not None:
+        mask &= df.index.isin(matches)
+    positions = np.flatnonzero(mask)
+    if sort_by is None:
+        return positions
+    keys = df.index.to_series() if sort_by == df.index.name else df[sort_by]
+    keys = keys.iloc[positions]
+    # Stable sort with missing values last, in either direction
+    order = keys.reset_index(drop=True).sort_values(ascending=ascending, kind='stable', na_position='last').index
+    return positions[order.to_numpy()]
+
+
+def row_order(data, table, filters=None, sort_by=None, ascending=True, query=None):
+    filters = tuple(sorted((col, tuple(values)) for col, values in (filters or {}).items()))
+    terms = (query or '').strip().lower()
+    return cached(data, ('row_order', table, filters, sort_by, ascending, terms), (table,),
+                  lambda df: _row_order(df, filters, sort_by, ascending, search(data, table, terms)))
+
+
+# Number of rows matching the filters and search query
+def match_count(data, table, filters=None, query=None):
+    return len(row_order(data, table, filters, query=query))
+
+
+# One page of a table with filters ({column: allowed values}), a search query
+# and sorting pushed down to the shared snapshot. Only the rows of the requested
+# page are copied out; returns (page frame, total matching rows).
+def query_page(data, table, filters=None, sort_by=None, ascending=True, page=1, page_size=DEFAULT_PAGE_SIZE,
+               query=None):
+    order = row_order(data, table, filters, sort_by, ascending, query)
+    total = len(order)
+    start = (max(page, 1) - 1) * page_size
+    return data.table(table).iloc[order[start:start + page_size]], total
+
+
+def page_count(total, page_size):
+    return max((total + page_size - 1) // page_size, 1)
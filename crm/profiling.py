@@ -0,0 +1,241 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# CRM_PROFILE=1 records timings from startup, CRM_PROFILE=memory also traces
+# allocations; admins can switch both on and off from the Performance page.
+# CRM_METRICS_FILE names a text file rewritten (at most every METRICS_INTERVAL
+# seconds) with the current numbers, in the Prometheus text format. pandas is
+# only imported once there is something to show, so the login page never loads it.
+METRICS_INTERVAL = 15.0
+
+# Sessions without a rerun for this long are dropped from the session table
+SESSION_IDLE_SECONDS = 3600
+
+
+class Stat:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+        self.max_memory = 0
+
+    def add(self, seconds, memory):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.max = max(self.max, seconds)
+        self.max_memory = max(self.max_memory, memory)
+
+    def row(self):
+        return {'Runs': self.count, 'Total (s)': self.total, 'Mean (ms)': 1000 * self.total / max(self.count, 1),
+                'Last (ms)': 1000 * self.last, 'Max (ms)': 1000 * self.max,
+                'Peak Process Memory (MB)': self.max_memory / 1e6}
+
+
+# Section currently being timed on one thread, for nesting peak memory
+class _Frame:
+    def __init__(self, start_memory):
+        self.start_memory = start_memory
+        self.peak = start_memory
+
+
+# Process-wide timings of pages and named sections, and per-session rerun
+# counts and session_state sizes. Everything is a no-op while disabled.
+# tracemalloc's peak is process-wide, so with several sessions running at once
+# a block's memory figure includes what other threads allocated meanwhile.
+class Profiler:
+    def __init__(self, mode=None):
+        mode = (mode or '').lower()
+        self.enabled = mode in ('1', 'true', 'on', 'memory')
+        self.memory = mode == 'memory'
+        self.pages = {}
+        self.sections = {}
+        self.sessions = {}
+        self._seen = {}
+        self.started = time.time()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._written = 0.0
+        if self.memory:
+            tracemalloc.start()
+
+    def configure(self, enabled, memory=False):
+        self.enabled = enabled
+        self.memory = enabled and memory
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def reset(self):
+        with self._lock:
+            self.pages = {}
+            self.sections = {}
+            self.sessions = {}
+            self._seen = {}
+            self.started = time.time()
+
+    # Time a block (kind 'page' or 'section'). With memory tracing on, also
+    # record the peak memory allocated inside it; nested blocks pass their
+    # peaks up so the outer one still sees them.
+    @contextmanager
+    def timed(self, kind, name):
+        if not self.enabled:
+            yield
+            return
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        tracing = self.memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            stack.append(_Frame(current))
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            memory = 0
+            if tracing and stack:
+                frame = stack.pop()
+                frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+                memory = frame.peak - frame.start_memory
+                if stack:
+                    stack[-1].peak = max(stack[-1].peak, frame.peak)
+            stats = self.pages if kind == 'page' else self.sections
+            with self._lock:
+                stats.setdefault(name, Stat()).add(seconds, memory)
+
+    def rerun(self, session, user, state):
+        if not self.enabled:
+            return
+        import pandas as pd
+        size = state_size(state)
+        now = time.time()
+        with self._lock:
+            entry = self.sessions.setdefault(session, {'User': user, 'Reruns': 0})
+            entry.update({'User': user, 'Reruns': entry['Reruns'] + 1, 'State (MB)': size / 1e6,
+                          'Last Rerun': pd.Timestamp.now().floor('s')})
+            self._seen[session] = now
+            self._evict_idle(now)
+
+    # Forget sessions idle for SESSION_IDLE_SECONDS (closed tabs never say goodbye)
+    def _evict_idle(self, now):
+        for session in [s for s, seen in self._seen.items() if now - seen > SESSION_IDLE_SECONDS]:
+            del self._seen[session]
+            self.sessions.pop(session, None)
+
+    def frame(self, kind):
+        import pandas as pd
+        stats = self.pages if kind == 'page' else self.sections
+        with self._lock:
+            rows = {name: stat.row() for name, stat in stats.items()}
+        return pd.DataFrame.from_dict(rows, orient='index').rename_axis(kind.title())
+
+    def session_frame(self):
+        import pandas as pd
+        with self._lock:
+            rows = {session: dict(entry) for session, entry in self.sessions.items()}
+        return pd.DataFrame.from_dict(rows, orient='index').rename_axis('Session')
+
+    # Prometheus text exposition of the current numbers
+    def metrics_text(self, cache=None):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label}}} {value}" if label else f"{name} {value}")
+
+        with self._lock:
+            for kind, stats in (('page', self.pages), ('section', self.sections)):
+                metric(f"crm_{kind}_runs_total", 'counter', f"Timed {kind} runs",
+                       [({kind: n}, s.count) for n, s in stats.items()])
+                metric(f"crm_{kind}_seconds_total", 'counter', f"Wall time spent in each {kind}",
+                       [({kind: n}, round(s.total, 6)) for n, s in stats.items()])
+                metric(f"crm_{kind}_seconds_max", 'gauge', f"Slowest run of each {kind}",
+                       [({kind: n}, round(s.max, 6)) for n, s in stats.items()])
+                metric(f"crm_{kind}_memory_bytes_max", 'gauge', f"Peak process memory allocated during each {kind}",
+                       [({kind: n}, s.max_memory) for n, s in stats.items()])
+            metric("crm_session_reruns_total", 'counter', "Reruns per browser session",
+                   [({'session': k, 'user': e['User']}, e['Reruns']) for k, e in self.sessions.items()])
+            metric("crm_session_state_bytes", 'gauge', "Estimated size of each session's session_state",
+                   [({'session': k, 'user': e['User']}, int(e.get('State (MB)', 0) * 1e6))
+                    for k, e in self.sessions.items()])
+        if cache is not None:
+            metric("crm_metrics_cache_hits_total", 'counter', "Metrics cache hits", [({}, cache.hits)])
+            metric("crm_metrics_cache_misses_total", 'counter', "Metrics cache misses", [({}, cache.misses)])
+            metric("crm_metrics_cache_entries", 'gauge', "Entries in the metrics cache", [({}, len(cache))])
+        return '\n'.join(lines) + '\n'
+
+    def write_metrics(self, path, cache=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as fileobj:
+            fileobj.write(self.metrics_text(cache))
+        os.replace(tmp, path)
+        self._written = time.time()
+
+    # Rewrite CRM_METRICS_FILE if it is set and the last write is old enough
+    def maybe_write_metrics(self, cache=None):
+        path = os.environ.get('CRM_METRICS_FILE')
+        if self.enabled and path and time.time() - self._written >= METRICS_INTERVAL:
+            self.write_metrics(path, cache)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Rough size in bytes of an object held in session_state: frames count their
+# data, a SessionData its uncommitted overlay (the shared snapshot is not the
+# session's), containers their items
+def state_size(value, depth=0):
+    import pandas as pd
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum()) if isinstance(value, pd.DataFrame) \
+            else int(value.memory_usage(deep=True))
+    if hasattr(value, '_rows') and hasattr(value, 'store'):
+        return sys.getsizeof(value) + sum(state_size(rows) for rows in value._rows.values())
+    if depth > 3:
+        return sys.getsizeof(value)
+    if isinstance(value, dict) or hasattr(value, 'to_dict'):
+        items = value.to_dict() if not isinstance(value, dict) else value
+        return sys.getsizeof(items) + sum(state_size(k, depth + 1) + state_size(v, depth + 1)
+                                          for k, v in items.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(state_size(v, depth + 1) for v in value)
+    return sys.getsizeof(value)
+
+
+PROFILER = Profiler(os.environ.get('CRM_PROFILE'))
+
+
+def page(name):
+    return PROFILER.timed('page', name)
+
+
+def section(name):
+    return PROFILER.timed('section', name)
+
+
+# Streamlit session ID of the current script run ('local' outside a server)
+def session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx is not None else 'local'
+    except ImportError:
+        return 'local'
@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+
+from crm.metrics import cached, incremental
+from crm.schema import ENGAGEMENT_STATUSES
+
+# Money differences up to this are rounding, not mismatches
+TOLERANCE = 0.5
+
+# A client's status as its engagements imply it: the first of these statuses
+# any of its engagements has
+STATUS_ORDER = ['Active', 'Proposal', 'Prospect', 'Completed']
+
+# Check -> description, in display order; the report flags each in a
+# '<check> Mismatch' column
+CHECKS = {
+    'Revenue': "Total Revenue differs from the sum of the engagements' revenue",
+    'MRR': "Monthly Recurring Revenue differs from the MRR of the active engagements",
+    'Status': "Status differs from the status the engagements imply",
+    'Consultant': "Consultant is not assigned to any of the client's engagements"
+}
+
+# Client columns that can be derived from the engagements
+DERIVED = {
+    'Total Revenue': 'Engagement Revenue',
+    'Monthly Recurring Revenue': 'Engagement MRR',
+    'Status': 'Engagement Status',
+    'Consultants': 'Main Consultant'
+}
+
+# (client, consultant) pairs are counted under one integer key:
+# client * PAIR_BASE + the consultant's number
+PAIR_BASE = 1 << 20
+
+
+# Numbers of some names, registering the new ones in codes (name -> number)
+def _codes(values, codes):
+    found, uniques = pd.factorize(values)
+    numbers = np.array([codes.setdefault(name, len(codes)) for name in uniques], dtype='int64')
+    return numbers[found] if len(numbers) else np.zeros(len(found), dtype='int64')
+
+
+# Per-client sums of some engagement rows (linked to a client), the number of
+# engagements per (client, consultant) pair, and the count of unlinked rows
+def _rollup(services_df, codes):
+    linked = services_df['Client ID'].notna().to_numpy()
+    rows = services_df[linked]
+    client = rows['Client ID'].to_numpy(dtype='int64')
+    status = rows['Status'].astype(object).to_numpy()
+    active = status == 'Active'
+    frame = pd.DataFrame({
+        'Engagements': np.ones(len(rows)),
+        'Revenue': rows['Revenue'].fillna(0).to_numpy(dtype='float64'),
+        'MRR': np.where(active, rows['Monthly Recurring Revenue'].fillna(0).to_numpy(dtype='float64'), 0.0),
+        **{name: (status == name).astype('float64') for name in ENGAGEMENT_STATUSES}
+    }, index=client)
+    totals = frame.groupby(level=0, sort=False).sum()
+    consultant = rows['Consultant Assigned'].astype(object)
+    assigned = consultant.notna().to_numpy()
+    keys = client[assigned] * PAIR_BASE + _codes(consultant[assigned].to_numpy(), codes)
+    pairs = pd.Series(np.ones(len(keys)), index=keys).groupby(level=0, sort=False).sum()
+    return totals, pairs, int((~linked).sum())
+
+
+# What the engagements say about each client, kept in step with the services
+# table: a commit re-rolls only the engagements it touched and adjusts the
+# client totals by the difference, so reconciling after an edit costs a lookup
+# per client rather than a regrouping of every engagement.
+class EngagementTotals:
+    def __init__(self, services_df):
+        self.codes = {}
+        self.totals, self.pairs, self.unlinked = _rollup(services_df, self.codes)
+        self._frame = services_df
+
+    def update(self, services_df, keys):
+        keys = pd.Index(keys)
+        if not len(keys):
+            return
+        old_totals, old_pairs, old_unlinked = _rollup(self._frame[self._frame.index.isin(keys)], self.codes)
+        new_totals, new_pairs, new_unlinked = _rollup(services_df[services_df.index.isin(keys)], self.codes)
+        totals = self.totals.add(new_totals, fill_value=0).sub(old_totals, fill_value=0)
+        self.totals = totals[totals['Engagements'].round() > 0]
+        pairs = self.pairs.add(new_pairs, fill_value=0).sub(old_pairs, fill_value=0)
+        self.pairs = pairs[pairs.round() > 0]
+        self.unlinked += new_unlinked - old_unlinked
+        self._frame = services_df
+
+    def view(self):
+        return EngagementView(self.totals, self.pairs, self.unlinked, dict(self.codes))
+
+
+# Read-only totals of one services version (updates replace the frames)
+class EngagementView:
+    def __init__(self, totals, pairs, unlinked, codes):
+        self.totals = totals
+        self.pairs = pairs
+        self.unlinked = unlinked
+        self.codes = codes
+        self.names = np.array(list(codes), dtype=object)
+
+    # Pair keys of clients and consultant names (-1 for names no engagement has)
+    def pair_keys(self, clients, names):
+        found, uniques = pd.factorize(names)
+        numbers = np.array([self.codes.get(name, -1) for name in uniques], dtype='int64')
+        numbers = np.append(numbers, -1)[found]
+        return np.where(numbers >= 0, np.asarray(clients, dtype='int64') * PAIR_BASE + numbers, -1)
+
+    # The consultant on most of each client's engagements (the first by name on a tie)
+    def main_consultant(self):
+        keys, counts = self.pairs.index.to_numpy(), self.pairs.to_numpy()
+        client, code = keys // PAIR_BASE, keys % PAIR_BASE
+        rank = np.empty(len(self.names), dtype='int64')
+        rank[np.argsort(self.names.astype(str), kind='stable')] = np.arange(len(self.names))
+        order = np.lexsort((rank[code], -counts, client))
+        first = order[np.r_[True, client[order][1:] != client[order][:-1]]] if len(order) else order
+        return pd.Series(self.names[code[first]] if len(first) else [], index=client[first], dtype=object)
+
+    # Consultants assigned to the given clients' engagements, joined by name
+    def consultants_of(self, clients):
+        keys = self.pairs.index.to_numpy()
+        keys = keys[pd.Index(keys // PAIR_BASE).isin(clients)]
+        names = pd.Series(self.names[keys % PAIR_BASE], index=keys // PAIR_BASE)
+        return names.groupby(level=0).agg(lambda values: ', '.join(sorted(values)))
+
+
+# Client figures against their engagements, one row per client with the client
+# value, the engagement value and a flag per check. Clients without engagements
+# are compared with zero revenue and MRR, and have no status or consultant to check.
+def reconcile(clients_df, engagements):
+    totals = engagements.totals.reindex(clients_df.index)
+    engaged = totals['Engagements'].fillna(0).to_numpy() > 0
+    counts = totals[STATUS_ORDER].fillna(0).to_numpy()
+    implied = np.select([counts[:, i] > 0 for i in range(len(STATUS_ORDER))], STATUS_ORDER, default=None)
+    implied = np.where(engaged, implied, None)
+    status = clients_df['Status'].astype(object).to_numpy()
+    consultant = clients_df['Consultants'].astype(object)
+    assigned = pd.Index(engagements.pair_keys(clients_df.index, consultant.to_numpy())).isin(
+        engagements.pairs.index)
+
+    out = pd.DataFrame({
+        'Client Name': clients_df['Client Name'],
+        'Engagements': totals['Engagements'].fillna(0).astype('int64'),
+        'Total Revenue': clients_df['Total Revenue'].fillna(0),
+        'Engagement Revenue': totals['Revenue'].fillna(0),
+        'Monthly Recurring Revenue': clients_df['Monthly Recurring Revenue'].fillna(0),
+        'Engagement MRR': totals['MRR'].fillna(0),
+        'Status': clients_df['Status'],
+        'Engagement Status': implied,
+        'Consultants': clients_df['Consultants'],
+        'Main Consultant': engagements.main_consultant().reindex(clients_df.index)
+    }, index=clients_df.index)
+    out['Revenue Mismatch'] = (out['Total Revenue'] - out['Engagement Revenue']).abs().to_numpy() > TOLERANCE
+    out['MRR Mismatch'] = (out['Monthly Recurring Revenue'] - out['Engagement MRR']).abs().to_numpy() > TOLERANCE
+    out['Status Mismatch'] = engaged & (status != implied)
+    out['Consultant Mismatch'] = engaged & consultant.notna().to_numpy() & ~assigned
+    return out
+
+
+# The clients failing any of the given checks (all by default)
+def mismatches(report, checks=None):
+    flags = report[[f'{check} Mismatch' for check in (checks or CHECKS)]]
+    return report[flags.any(axis=1).to_numpy()]
+
+
+# Set client columns (keys of DERIVED) to what the engagements say, for the given
+# clients. Revenue and MRR are derived for every client (zero without engagements),
+# status and consultant only where there are engagements. Returns the number of
+# cells changed; the caller commits.
+def derive(data, keys, columns):
+    report = reconciliation(data)
+    report = report[report.index.isin(keys)]
+    engaged = report['Engagements'].to_numpy() > 0
+    changes = {}
+    for col in columns:
+        values = report[DERIVED[col]]
+        differs = (values.astype(object) != report[col].astype(object)).to_numpy() & values.notna().to_numpy()
+        if col in ('Status', 'Consultants'):
+            differs &= engaged
+        changes[col] = values[differs]
+    return data.update_cells('clients', changes)
+
+
+# Engagement totals of a session's services, maintained incrementally as rows change
+def engagement_totals(data):
+    return incremental(data, 'engagement_totals', 'services', EngagementTotals, EngagementTotals.view)
+
+
+def reconciliation(data):
+    return cached(data, 'reconciliation', ('clients', 'services'),
+                  lambda clients, services: reconcile(clients, engagement_totals(data)))
@@ -0,0 +1,184 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from crm.metrics import cached, incremental
+
+# How free-text referral sources encode a chain, nearest referrer first:
+#   "Brenald Chinyowa from Mrs Phiri"   Brenald Chinyowa <- Mrs Phiri
+#   "Patience Mapeza - WBP connection"  Patience Mapeza <- WBP (organization)
+#   "Munja Nheta (UCPF)"                Munja Nheta <- UCPF (organization)
+CHAIN = re.compile(r'\s+(?:from|via|through|referred by)\s+', re.IGNORECASE)
+CONNECTION = re.compile(r'^(.+?)\s+-\s+(.+?)\s+connection$', re.IGNORECASE)
+AFFILIATION = re.compile(r'^(.+?)\s*\(([^()]+)\)$')
+
+PERSON = 'Person'
+ORGANIZATION = 'Organization'
+
+MEASURES = ['Clients', 'Total Revenue', 'Monthly Recurring Revenue']
+
+
+def _key(name):
+    return ' '.join(name.split()).casefold()
+
+
+# Referrers named in a source, nearest first, as (name, kind) pairs
+def parse_source(text):
+    if not isinstance(text, str) or not text.strip():
+        return ()
+    chain = []
+    for part in CHAIN.split(text.strip()):
+        match = CONNECTION.match(part) or AFFILIATION.match(part)
+        if match:
+            chain += [(match[1].strip(), PERSON), (match[2].strip(), ORGANIZATION)]
+        elif part.strip():
+            chain.append((part.strip(), PERSON))
+    return tuple(chain)
+
+
+# Who-referred-whom graph of the people and organizations named in the clients'
+# referral sources. Every client is credited directly to the nearest referrer in
+# its source and transitively to everyone upstream of that referrer, following
+# edges from all sources (so "A from B" also credits B with clients sourced just
+# "A"). Each distinct source string is parsed once; edges are counted per
+# string, so the graph changes only when a string first appears or last goes.
+class ReferralGraph:
+    def __init__(self, df):
+        self.names = {}
+        self.kinds = {}
+        self.sources = {}
+        self.edges = {}
+        self.direct = pd.DataFrame(columns=MEASURES, dtype='float64')
+        self.closure = None
+        self._frame = df.iloc[:0]
+        self.update(df, df.index)
+
+    def _chain(self, text):
+        chain = []
+        for name, kind in parse_source(text):
+            key = _key(name)
+            self.names.setdefault(key, name)
+            # Named as an organization anywhere makes it one
+            if self.kinds.get(key) != ORGANIZATION:
+                self.kinds[key] = kind
+            if key not in chain:
+                chain.append(key)
+        return chain
+
+    # Count the clients using each source string; returns whether edges changed
+    def _count_sources(self, col, sign):
+        changed = False
+        counts = col.value_counts()
+        for text, count in counts[counts > 0].items():
+            if text not in self.sources:
+                self.sources[text] = [0, self._chain(text)]
+            entry = self.sources[text]
+            before = entry[0]
+            entry[0] += sign * count
+            if (before > 0) != (entry[0] > 0):
+                chain = entry[1]
+                for edge in zip(chain, chain[1:]):
+                    self.edges[edge] = self.edges.get(edge, 0) + (1 if entry[0] > 0 else -1)
+                    if not self.edges[edge]:
+                        del self.edges[edge]
+                changed = changed or len(chain) > 1
+            if not entry[0]:
+                del self.sources[text]
+        return changed
+
+    # Measures per nearest referrer for some client rows
+    def _direct(self, df):
+        sources = df['Referral Source'].astype(object)
+        nearest = sources.map({text: self.sources[text][1][0] for text in sources.dropna().unique()
+                               if self.sources[text][1]})
+        rows = pd.DataFrame({
+            'Clients': np.ones(len(df)),
+            'Total Revenue': df['Total Revenue'].fillna(0).to_numpy(dtype='float64'),
+            'Monthly Recurring Revenue': df['Monthly Recurring Revenue'].fillna(0).to_numpy(dtype='float64')
+        }, index=df.index)
+        return rows[nearest.notna().to_numpy()].groupby(nearest.dropna().to_numpy()).sum()
+
+    # Apply the clients touched since the last version: the old rows' credit is
+    # taken back and the new rows' credit added, and the closure is rebuilt only
+    # if a chain appeared or disappeared
+    def update(self, df, keys):
+        keys = pd.Index(keys)
+        if not len(keys):
+            return
+        old = self._frame[self._frame.index.isin(keys)]
+        new = df[df.index.isin(keys)]
+        changed = self._count_sources(new['Referral Source'].dropna(), 1)
+        delta = self._direct(new).sub(self._direct(old), fill_value=0)
+        changed = self._count_sources(old['Referral Source'].dropna(), -1) or changed
+        direct = self.direct.add(delta, fill_value=0)
+        self.direct = direct[direct['Clients'].round() != 0]
+        if changed or self.closure is None:
+            self.closure = self._closure()
+        self._frame = df
+
+    def parents(self):
+        parents = {}
+        for child, parent in self.edges:
+            parents.setdefault(child, set()).add(parent)
+        return parents
+
+    # (referrer, upstream) pairs: every node with itself and everyone upstream of
+    # it. Walked per node with a visited set, so cycles in free text are harmless.
+    def _closure(self):
+        parents = self.parents()
+        nodes, upstream = [], []
+        for node in self.names:
+            seen, stack = {node}, [node]
+            while stack:
+                for parent in parents.get(stack.pop(), ()):
+                    if parent not in seen:
+                        seen.add(parent)
+                        stack.append(parent)
+            nodes += [node] * len(seen)
+            upstream += list(seen)
+        return pd.DataFrame({'node': nodes, 'upstream': upstream})
+
+    def view(self):
+        return ReferralView(self.direct, self.closure, dict(self.names), dict(self.kinds), self.parents())
+
+
+# Read-only attribution of one graph version
+class ReferralView:
+    def __init__(self, direct, closure, names, kinds, parents):
+        self.direct = direct
+        self.closure = closure
+        self.names = names
+        self.kinds = kinds
+        self._parents = parents
+
+    # Direct and attributed (direct plus everyone downstream) clients, revenue
+    # and MRR per referrer, in one join of the closure with the direct credit
+    def attribution(self):
+        credit = self.direct.reindex(self.closure['node'].to_numpy()).fillna(0)
+        attributed = credit.groupby(self.closure['upstream'].to_numpy()).sum()
+        keys = attributed.index[attributed['Clients'].round() > 0]
+        out = pd.DataFrame({
+            'Type': [self.kinds[k] for k in keys],
+            'Referred By': [', '.join(sorted(self.names[p] for p in self._parents.get(k, ()))) for k in keys]
+        }, index=pd.Index([self.names[k] for k in keys], name='Referrer'))
+        direct = self.direct.reindex(keys).fillna(0)
+        for col in MEASURES:
+            out[f'Direct {col}'] = direct[col].to_numpy()
+        for col in MEASURES:
+            out[f'Attributed {col}'] = attributed.loc[keys, col].to_numpy()
+        counts = [f'{kind} Clients' for kind in ('Direct', 'Attributed')]
+        return out.astype({col: 'int64' for col in counts}).sort_values('Attributed Total Revenue', ascending=False)
+
+    # Referrer -> the referrers directly upstream of it, by display name
+    def adjacency(self):
+        return {self.names[child]: sorted(self.names[p] for p in parents) for child, parents in self._parents.items()}
+
+
+# Referral graph of a session's clients, maintained incrementally as rows change
+def referral_graph(data):
+    return incremental(data, 'referral_graph', 'clients', ReferralGraph, ReferralGraph.view)
+
+
+def referral_attribution(data):
+    return cached(data, 'referral_attribution', ('clients',), lambda df: referral_graph(data).attribution())
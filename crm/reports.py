@@ -0,0 +1,208 @@
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from crm.cohorts import Cohorts
+from crm.cube import Cube
+from crm.export import SHEETS, write_excel
+from crm.metrics import (consultant_metrics, executive_kpis, mrr_by_tier, referral_metrics, revenue_breakdown,
+                         revenue_by_service, revenue_by_status, revenue_kpis, tier_counts)
+from crm.mrr import MRRSeries
+
+REPORT_KINDS = ['summary', 'consultants', 'clients']
+
+# Reports handed to a worker at a time; larger batches cut inter-process overhead
+BATCH_SIZE = 25
+
+KPI_LABELS = {
+    'total_clients': "Total Clients",
+    'active_clients': "Active Clients",
+    'total_mrr': "Monthly Recurring Revenue",
+    'total_arr': "Annual Recurring Revenue",
+    'total_revenue': "Total Revenue",
+    'total_project_revenue': "Total Project Revenue",
+    'recurring_clients': "Recurring Clients",
+    'avg_revenue_per_client': "Avg Revenue/Client"
+}
+
+
+def _kpi_frame(kpis):
+    return pd.DataFrame({'Value': [kpis[k] for k in KPI_LABELS]},
+                        index=pd.Index(list(KPI_LABELS.values()), name='KPI'))
+
+
+def _mrr_trend(services_df):
+    trend = MRRSeries(services_df).frame()
+    return trend.set_axis(trend.index.astype(str))
+
+
+def _by_cohort(frame):
+    return frame.set_axis(frame.index.astype(str))
+
+
+# Executive Summary, Revenue Analytics, Consultant Performance and Cohorts numbers
+# for a set of clients and engagements, as sheet name -> frame. Needs no Streamlit
+# session: the aggregates come from cubes built over exactly these rows.
+def analytics(clients_df, services_df):
+    clients, services = Cube('clients', clients_df).view(), Cube('services', services_df).view()
+    cohorts = Cohorts(clients_df, services_df)
+    return {
+        'KPIs': _kpi_frame({**executive_kpis(clients), **revenue_kpis(clients, services)}),
+        'MRR Trend': _mrr_trend(services_df),
+        'Cohorts': _by_cohort(cohorts.summary()),
+        'Cohort Retention': _by_cohort(cohorts.retention()),
+        'Clients by Tier': tier_counts(clients).to_frame('Clients'),
+        'Revenue by Service': revenue_by_service(services).to_frame(),
+        'MRR by Tier': mrr_by_tier(clients).to_frame(),
+        'Revenue by Status': revenue_by_status(clients).to_frame(),
+        'Revenue Breakdown': revenue_breakdown(clients),
+        'Consultants': consultant_metrics(clients),
+        'Referral Sources': referral_metrics(Cube('referrals', clients_df).view())
+    }
+
+
+# The full report: analytics over the whole book followed by every table
+def summary_report(tables):
+    sheets = analytics(tables['clients'], tables['services'])
+    sheets.update({SHEETS[name]: df for name, df in tables.items()})
+    return sheets
+
+
+def consultant_report(clients_df, services_df):
+    sheets = analytics(clients_df, services_df)
+    del sheets['Consultants']
+    sheets.update({'Clients': clients_df, 'Engagements': services_df})
+    return sheets
+
+
+def client_report(client_df, services_df):
+    return {
+        'Client': client_df.T.set_axis(['Value'], axis=1).rename_axis('Field'),
+        'MRR Trend': _mrr_trend(services_df),
+        'Engagements': services_df
+    }
+
+
+def slug(text):
+    return re.sub(r'[^A-Za-z0-9]+', '-', str(text)).strip('-')[:60] or 'unnamed'
+
+
+def write_report(sheets, path):
+    tmp = path + '.part'
+    with open(tmp, 'wb') as fileobj:
+        write_excel(sheets, fileobj)
+    os.replace(tmp, path)
+    return path
+
+
+# The parent process opens the store normally (seeding or migrating it if needed,
+# once, before any worker starts); workers only read it, so N processes never
+# race on rewriting the same files or snapshot marks
+def load_tables(read_only=False):
+    from crm.storage import TABLES, DataStore, backend_from_env, read_tables
+    if read_only:
+        return read_tables(backend_from_env())
+    store = DataStore(backend_from_env())
+    return {name: store.table(name) for name in TABLES}
+
+
+# Worker state: the tables are loaded once per process, with row groups by
+# consultant and client, rather than shipped with every task
+_WORKER = {}
+
+
+def _init_worker():
+    tables = load_tables(read_only=True)
+    clients_df, services_df = tables['clients'], tables['services']
+    _WORKER.update({
+        'clients': clients_df,
+        'services': services_df,
+        'clients_by_consultant': clients_df.groupby('Consultants', observed=True).indices,
+        'services_by_consultant': services_df.groupby('Consultant Assigned', observed=True).indices,
+        'services_by_client': services_df.groupby('Client ID').indices
+    })
+
+
+def _rows(df, groups, key):
+    positions = groups.get(key)
+    return df.iloc[positions] if positions is not None else df.iloc[:0]
+
+
+# Write one batch of (kind, key, path) reports in a worker; returns the paths written
+def _write_batch(batch):
+    clients_df, services_df = _WORKER['clients'], _WORKER['services']
+    written = []
+    for kind, key, path in batch:
+        if kind == 'consultants':
+            sheets = consultant_report(_rows(clients_df, _WORKER['clients_by_consultant'], key),
+                                       _rows(services_df, _WORKER['services_by_consultant'], key))
+        else:
+            sheets = client_report(clients_df.loc[[key]], _rows(services_df, _WORKER['services_by_client'], key))
+        written.append(write_report(sheets, path))
+    return written
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# Plan every report under out_dir: (kind, key, path) for consultants and clients
+def plan(tables, out_dir, kinds):
+    tasks = []
+    if 'consultants' in kinds:
+        os.makedirs(os.path.join(out_dir, 'consultants'), exist_ok=True)
+        names = pd.Index(tables['clients']['Consultants'].dropna().unique()).append(
+            pd.Index(tables['services']['Consultant Assigned'].dropna().unique())).unique().sort_values()
+        tasks += [('consultants', name, os.path.join(out_dir, 'consultants', f"{slug(name)}.xlsx"))
+                  for name in names]
+    if 'clients' in kinds:
+        os.makedirs(os.path.join(out_dir, 'clients'), exist_ok=True)
+        names = tables['clients']['Client Name']
+        tasks += [('clients', client_id, os.path.join(out_dir, 'clients', f"{client_id}-{slug(name)}.xlsx"))
+                  for client_id, name in names.items()]
+    return tasks
+
+
+# Generate the requested reports; per-consultant and per-client reports fan out
+# over a process pool whose workers load the store themselves
+def run(out_dir, kinds=REPORT_KINDS, workers=None, progress=None):
+    os.makedirs(out_dir, exist_ok=True)
+    tables = load_tables()
+    written = []
+    if 'summary' in kinds:
+        written.append(write_report(summary_report(tables), os.path.join(out_dir, 'CRM_Report.xlsx')))
+    tasks = plan(tables, out_dir, kinds)
+    del tables
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_write_batch, batch) for batch in _batches(tasks, BATCH_SIZE)]
+            for future in as_completed(futures):
+                written += future.result()
+                if progress:
+                    progress(len(written), len(tasks) + ('summary' in kinds))
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate CRM Excel reports without the web app")
+    parser.add_argument('--out', default='reports', help="output folder")
+    parser.add_argument('--only', nargs='+', choices=REPORT_KINDS, default=REPORT_KINDS,
+                        help="report kinds to generate (default: all)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    written = run(args.out, args.only, args.workers,
+                  progress=lambda done, total: print(f"  {done:,} of {total:,} reports", file=sys.stderr))
+    print(f"{len(written):,} reports written to {args.out} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
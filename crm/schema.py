@@ -0,0 +1,178 @@
+# Column layout, allowed values and typed schema of the CRM tables, shared by
+# the store, the forms, the data editor and the bulk importer
+import numpy as np
+import pandas as pd
+
+CLIENT_STATUSES = ["Active", "Proposal", "Prospect", "Completed"]
+ENGAGEMENT_STATUSES = ["Active", "Completed", "Proposal", "Prospect"]
+CLIENT_TIERS = ["Tier 1 - Premium", "Tier 2 - Standard", "Tier 4 - Project-based"]
+REVENUE_TYPES = ["One-time", "Recurring"]
+PRIORITIES = ["HIGH - Largest single opportunity",
+              "HIGH - Massive expansion potential",
+              "CRITICAL - Stabilize revenue",
+              "MEDIUM - Multiple services",
+              "MEDIUM - Policy Review"]
+
+COLUMNS = {
+    'clients': ['Client Name', 'Status', 'Client Tier', 'First Engagement', 'Service Categories',
+                'Monthly Recurring Revenue', 'Total Revenue', 'Lifetime Value', 'Consultants',
+                'Referral Source'],
+    'services': ['Client ID', 'Client Name', 'Service Category', 'Nature of Assignment',
+                 'Services Provided', 'Date Engaged', 'End Date', 'Status', 'Revenue Type',
+                 'Revenue', 'Monthly Recurring Revenue', 'Consultant Assigned'],
+    'issues': ['Issue', 'Impact', 'Recommendation'],
+    'opportunities': ['Opportunity', 'Potential Value', 'Priority']
+}
+
+# Columns a row must fill in
+REQUIRED = {
+    'clients': ['Client Name', 'Status', 'Client Tier'],
+    'services': ['Client Name', 'Status', 'Revenue Type', 'Date Engaged'],
+    'issues': ['Issue'],
+    'opportunities': ['Opportunity']
+}
+
+# Column -> allowed values
+CHOICES = {
+    'clients': {'Status': CLIENT_STATUSES, 'Client Tier': CLIENT_TIERS},
+    'services': {'Status': ENGAGEMENT_STATUSES, 'Revenue Type': REVENUE_TYPES},
+    'issues': {},
+    'opportunities': {}
+}
+
+MONEY = {
+    'clients': ['Monthly Recurring Revenue', 'Total Revenue', 'Lifetime Value'],
+    'services': ['Revenue', 'Monthly Recurring Revenue'],
+    'issues': [],
+    'opportunities': []
+}
+
+DATES = {
+    'clients': ['First Engagement'],
+    'services': ['Date Engaged'],
+    'issues': [],
+    'opportunities': []
+}
+
+# Dimension columns stored as categoricals (a handful of repeated values)
+CATEGORIES = {
+    'clients': ['Status', 'Client Tier', 'Service Categories', 'Consultants'],
+    'services': ['Service Category', 'Nature of Assignment', 'Status', 'Revenue Type', 'Consultant Assigned'],
+    'issues': [],
+    'opportunities': ['Priority', 'Value Basis']
+}
+
+# End dates may hold legacy text: 'Once off' (ended when engaged) or a month ('October 2025')
+LEGACY_DATES = {
+    'services': ['End Date']
+}
+
+ONCE_OFF = {'once off', 'once-off', 'one-off', 'one off'}
+MONTH_ONLY = r'^[A-Za-z]+\.?\s+\d{4}$'
+
+# Opportunities: 'Potential Value' is numeric; its legacy text ('TBD', '1000+ MRR')
+# is split into the amount, whether it is monthly, and whether it is a minimum
+VALUE_BASES = ["Total", "MRR"]
+COLUMNS['opportunities'] += ['Value Basis', 'Value Is Minimum']
+MONEY['opportunities'] = ['Potential Value']
+
+
+def _blank(col):
+    return col.isna() | (col.astype(str).str.strip() == '')
+
+
+# Parse dates, trying ISO 8601 first and free-form parsing only for the rest
+def parse_dates(col):
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col.astype('datetime64[ns]')
+    parsed = pd.to_datetime(col, errors='coerce', format='ISO8601')
+    retry = parsed.isna() & ~_blank(col)
+    if retry.any():
+        parsed[retry] = pd.to_datetime(col[retry].astype(str), errors='coerce', format='mixed')
+    return parsed.astype('datetime64[ns]')
+
+
+# Normalize legacy End Date text: 'Once off' -> the engagement date, a bare
+# month -> that month's last day, blank -> NaT (ongoing)
+def parse_end_date(end, engaged):
+    if pd.api.types.is_datetime64_any_dtype(end):
+        return end.astype('datetime64[ns]')
+    text = end.astype(object).where(end.notna(), '').astype(str).str.strip()
+    parsed = parse_dates(end.where(~text.str.lower().isin(ONCE_OFF)))
+    month_only = text.str.match(MONTH_ONLY)
+    parsed = parsed.where(~month_only, parsed + pd.offsets.MonthEnd(0))
+    return parsed.where(~text.str.lower().isin(ONCE_OFF), parse_dates(engaged))
+
+
+def parse_potential_value(values):
+    text = values.astype(object).where(values.notna(), '').astype(str).str.strip()
+    digits = text.str.replace(r'[^\d.]', '', regex=True)
+    amount = pd.to_numeric(digits.where(digits != '', None), errors='coerce').astype('float64')
+    basis = pd.Series(np.where(text.str.contains('MRR', case=False), 'MRR', 'Total'), index=values.index)
+    minimum = text.str.contains('+', regex=False)
+    return amount, basis, minimum
+
+
+def _categorical(col, known=()):
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return col
+    values = col.astype(object).where(col.notna(), None)
+    observed = pd.Index(values.dropna().unique())
+    categories = pd.Index(list(known)).append(observed.difference(pd.Index(list(known)))).unique()
+    return pd.Series(pd.Categorical(values, categories=categories), index=col.index, name=col.name)
+
+
+# Enforce the typed schema on a frame: categoricals for dimensions, float64 money,
+# datetime64 dates (legacy strings normalized) and a nullable integer client key
+def apply_schema(table, df):
+    df = df.copy()
+    if table == 'opportunities' and 'Potential Value' in df.columns and 'Value Basis' not in df.columns:
+        amount, basis, minimum = parse_potential_value(df['Potential Value'])
+        df['Potential Value'] = amount
+        df['Value Basis'] = basis
+        df['Value Is Minimum'] = minimum
+    for col in MONEY.get(table, []):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    for col in DATES.get(table, []):
+        if col in df.columns:
+            df[col] = parse_dates(df[col])
+    for col in LEGACY_DATES.get(table, []):
+        if col in df.columns:
+            df[col] = parse_end_date(df[col], df['Date Engaged'])
+    for col in CATEGORIES.get(table, []):
+        if col in df.columns:
+            known = CHOICES.get(table, {}).get(col, VALUE_BASES if col == 'Value Basis' else ())
+            df[col] = _categorical(df[col], known)
+    if 'Value Is Minimum' in df.columns:
+        df['Value Is Minimum'] = df['Value Is Minimum'].fillna(False).astype(bool)
+    if table == 'services' and 'Client ID' in df.columns:
+        df['Client ID'] = pd.to_numeric(df['Client ID'], errors='coerce').astype('Int64')
+    return df
+
+
+# Cast new or edited rows to the dtypes of the table they are merged into. New
+# categories are added to both sides so the concatenated column stays categorical.
+# Returns (rows, base); base is only rebuilt when a categorical grows.
+def conform(rows, base):
+    rows = rows.copy()
+    for col in base.columns:
+        if col not in rows.columns:
+            continue
+        dtype = base[col].dtype
+        if rows[col].dtype == dtype:
+            # Rows staged from the table itself already match (the usual edit)
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            values = rows[col].astype(object).where(rows[col].notna(), None)
+            new = pd.Index(values.dropna().unique()).difference(dtype.categories)
+            if len(new):
+                base = base.assign(**{col: base[col].cat.add_categories(new)})
+                dtype = base[col].dtype
+            rows[col] = values.astype(dtype)
+        elif rows[col].dtype != dtype:
+            try:
+                rows[col] = rows[col].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+    return rows, base
@@ -0,0 +1,153 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from crm.cube import CUBES, cube, cube_for
+from crm.metrics import cached, incremental
+
+# Table -> text columns searched by the search box
+SEARCH_FIELDS = {
+    'clients': ['Client Name', 'Referral Source', 'Service Categories'],
+    'services': ['Client Name', 'Services Provided', 'Service Category']
+}
+
+# Matches offered in a pick list (rename, delete, add engagement)
+SEARCH_LIMIT = 50
+
+# Words added since the sorted word list was last rebuilt are scanned linearly;
+# past this many the list is rebuilt
+MERGE_AT = 1024
+
+TOKEN = r'\w+'
+
+
+def _tokens(text):
+    return re.findall(TOKEN, text.lower()) if isinstance(text, str) else []
+
+
+# Prefix search over one text column. Each distinct value is numbered once and
+# split into lowercased words; the words are kept sorted, so the values having
+# a word that starts with a term are one binary search away.
+class TextIndex:
+    def __init__(self, col):
+        codes, uniques = pd.factorize(col)
+        values = pd.Index(uniques).astype(object)
+        self.ids = dict(zip(values.tolist(), range(len(values))))
+        words = pd.Series(values).str.lower().str.findall(TOKEN).explode().dropna()
+        order = np.argsort(words.to_numpy(dtype=str), kind='stable')
+        self.words = words.to_numpy(dtype=str)[order]
+        self.word_ids = words.index.to_numpy()[order]
+        self.pending = []
+        self.codes = codes
+
+    # Number of a value, registering it (and its words) when new; -1 for missing
+    def code(self, value):
+        if not isinstance(value, str):
+            return -1
+        if value not in self.ids:
+            self.ids[value] = len(self.ids)
+            self.pending += [(word, self.ids[value]) for word in _tokens(value)]
+        return self.ids[value]
+
+    def _merge(self):
+        words = np.concatenate([self.words, np.array([w for w, _ in self.pending], dtype=str)])
+        ids = np.concatenate([self.word_ids, np.array([i for _, i in self.pending], dtype=self.word_ids.dtype)])
+        order = np.argsort(words, kind='stable')
+        self.words, self.word_ids, self.pending = words[order], ids[order], []
+
+    # Replace the codes of the rows at positions keep, then append codes for values
+    def update(self, keep, values):
+        codes = np.fromiter((self.code(v) for v in values), dtype=np.int64, count=len(values))
+        self.codes = np.concatenate([self.codes[keep], codes])
+        if len(self.pending) > MERGE_AT:
+            self._merge()
+
+    def view(self):
+        return TextView(self.codes, self.words, self.word_ids, tuple(self.pending))
+
+
+# Read-only state of a TextIndex. Updates replace the arrays rather than write
+# into them, so a view stays consistent while the index moves on.
+class TextView:
+    def __init__(self, codes, words, word_ids, pending):
+        self.codes = codes
+        self.words = words
+        self.word_ids = word_ids
+        self.pending = pending
+
+    # Numbers of the values with a word starting with term
+    def prefix(self, term):
+        lo, hi = np.searchsorted(self.words, [term, term + '\U0010ffff'])
+        ids = self.word_ids[lo:hi]
+        if self.pending:
+            ids = np.concatenate([ids, [i for word, i in self.pending if word.startswith(term)]])
+        return np.unique(ids)
+
+
+# Search index of one table: a TextIndex per searched column, with row codes
+# kept in step with the table's row keys. A query matches the rows where every
+# term starts a word in at least one of the columns.
+class SearchIndex:
+    def __init__(self, table, df):
+        self.table = table
+        self.keys = df.index
+        self.fields = {col: TextIndex(df[col]) for col in SEARCH_FIELDS[table]}
+
+    # Rows touched since the last version: drop their old entries and append the
+    # current values of those still present
+    def update(self, df, keys):
+        keys = pd.Index(keys)
+        if not len(keys):
+            return
+        keep = ~self.keys.isin(keys)
+        current = df.index[df.index.isin(keys)]
+        rows = df.loc[current]
+        for col, index in self.fields.items():
+            index.update(keep, rows[col].tolist())
+        self.keys = self.keys[keep].append(current)
+
+    def view(self):
+        return SearchView(self.keys, [index.view() for index in self.fields.values()])
+
+
+class SearchView:
+    def __init__(self, keys, fields):
+        self.keys = keys
+        self.fields = fields
+
+    # Row keys matching the query, in key order
+    def match(self, query):
+        mask = np.ones(len(self.keys), dtype=bool)
+        for term in _tokens(query):
+            hit = np.zeros(len(self.keys), dtype=bool)
+            for index in self.fields:
+                hit |= np.isin(index.codes, index.prefix(term))
+            mask &= hit
+        return self.keys[mask].sort_values()
+
+
+# Search index of a table for a session, maintained incrementally as rows change
+def search_index(data, table):
+    return incremental(data, ('search', table), table, lambda df: SearchIndex(table, df), SearchIndex.view)
+
+
+# Row keys of a table matching a search query, in key order; None for an empty query
+def search(data, table, query):
+    terms = tuple(_tokens(query))
+    if not terms:
+        return None
+    return cached(data, ('search_match', table, terms), (table,),
+                  lambda df: search_index(data, table).match(query))
+
+
+# Rows per value of a column, for filter widgets. Cube dimensions are read from
+# a cube over the table, which follows edits incrementally; other columns are counted.
+def facet_counts(data, table, column):
+    name = cube_for(table, column)
+    if name is not None:
+        count = CUBES[name][2]
+        return cached(data, ('facets', table, column), (table,),
+                      lambda df: cube(data, name).rollup([column])[count].astype('int64').sort_index())
+    return cached(data, ('facets', table, column), (table,),
+                  lambda df: df[column].value_counts(sort=False).loc[lambda counts: counts > 0].sort_index())
@@ -0,0 +1,644 @@
+import json
+import os
+import sqlite3
+import threading
+import weakref
+from collections import deque
+
+import pandas as pd
+
+from crm.changelog import ChangeLog, row_events
+from crm.clients import link_client_ids
+from crm.demo import demo_tables
+from crm.schema import apply_schema, conform
+
+# Tables held by the store, in export order
+TABLES = ('clients', 'services', 'issues', 'opportunities')
+
+# Stable primary key of each table, held as the frame index and persisted as
+# its first column. Keys are never reused, so they survive deletes and renames.
+KEYS = {
+    'clients': 'Client ID',
+    'services': 'Engagement ID',
+    'issues': 'Issue ID',
+    'opportunities': 'Opportunity ID'
+}
+
+# Key column used by stores created before tables had named IDs
+LEGACY_KEY = '_key'
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+# SQLite limits the number of bound parameters per statement
+SQLITE_CHUNK = 500
+
+# Commits remembered per table for incremental consumers (see DataStore.changes_since)
+JOURNAL_LENGTH = 256
+
+# Commit notices held per session until it reads them (see ChangeFeed)
+FEED_LENGTH = 256
+
+# Parquet tables are rewritten once per this many commits; the commits in between
+# only append to the change log, and are replayed on top of the file when loaded
+SNAPSHOT_EVERY = 50
+
+
+def key_name(table):
+    return KEYS.get(table, LEGACY_KEY)
+
+
+# Give a freshly seeded or imported frame stable integer row keys
+def with_row_keys(df, table, start=0):
+    df = df.reset_index(drop=True)
+    df.index = pd.RangeIndex(start, start + len(df), name=key_name(table))
+    return df
+
+
+# Parquet/Arrow cannot hold object columns that mix numbers and strings
+def arrow_safe(df):
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].map(lambda v: v if v is None or isinstance(v, str) else str(v))
+    return df
+
+
+# SQLite backend (default): one table per frame, row key as an indexed column
+class SQLiteBackend:
+    def __init__(self, path):
+        self.path = path
+        self.log_path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _connect(self):
+        # Streamlit sessions run on different threads, so connect per call
+        return sqlite3.connect(self.path)
+
+    def exists(self, table):
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)
+            ).fetchone()
+        return row is not None
+
+    # Persisted columns, key first
+    def columns(self, table):
+        con = self._connect()
+        try:
+            cursor = con.execute(f'SELECT * FROM "{table}" LIMIT 0')
+            return [d[0] for d in cursor.description]
+        finally:
+            con.close()
+
+    def load(self, table):
+        if not self.exists(table):
+            return None
+        key = self.columns(table)[0]
+        con = self._connect()
+        try:
+            return pd.read_sql_query(f'SELECT * FROM "{table}" ORDER BY "{key}"', con, index_col=key)
+        finally:
+            con.close()
+
+    def save(self, table, df):
+        con = self._connect()
+        try:
+            with con:
+                df.to_sql(table, con, if_exists='replace', index=True, index_label=df.index.name)
+                con.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "ix_{table}_key" ON "{table}" ("{df.index.name}")')
+        finally:
+            con.close()
+
+    # Write only the changed rows: delete stale rows (edited or deleted keys that
+    # were persisted before) by key, then insert the current values of changed rows.
+    # Returns True: the table on disk is now up to date.
+    def apply(self, table, frame, changed_keys, stale_keys):
+        # A schema change (new or renamed columns) needs a full rewrite
+        if self.columns(table) != [frame.index.name] + list(frame.columns):
+            self.save(table, frame)
+            return True
+        stale = [int(k) for k in stale_keys]
+        con = self._connect()
+        try:
+            with con:
+                for i in range(0, len(stale), SQLITE_CHUNK):
+                    chunk = stale[i:i + SQLITE_CHUNK]
+                    marks = ','.join('?' * len(chunk))
+                    con.execute(f'DELETE FROM "{table}" WHERE "{frame.index.name}" IN ({marks})', chunk)
+                rows = frame.loc[frame.index.isin(list(changed_keys))]
+                if len(rows):
+                    rows.to_sql(table, con, if_exists='append', index=True, index_label=frame.index.name)
+        finally:
+            con.close()
+        return True
+
+
+# Parquet backend: one file per table, rewritten every SNAPSHOT_EVERY commits;
+# the store's change log holds the commits since
+class ParquetBackend:
+    def __init__(self, directory):
+        self.directory = directory
+        self.log_path = os.path.join(directory, 'changelog.db')
+        self._commits = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, table):
+        return os.path.join(self.directory, f'{table}.parquet')
+
+    def exists(self, table):
+        return os.path.exists(self._path(table))
+
+    def load(self, table):
+        if not self.exists(table):
+            return None
+        df = pd.read_parquet(self._path(table))
+        return df.set_index(df.columns[0])
+
+    def save(self, table, df):
+        tmp = self._path(table) + '.tmp'
+        # Arrow drops the name of a RangeIndex, so always store the key as a column
+        arrow_safe(df).reset_index().to_parquet(tmp, index=False)
+        os.replace(tmp, self._path(table))
+        self._commits[table] = 0
+
+    # Returns whether the file was rewritten (otherwise the commit lives in the log only)
+    def apply(self, table, frame, changed_keys, stale_keys):
+        self._commits[table] = self._commits.get(table, 0) + 1
+        if self._commits[table] < SNAPSHOT_EVERY:
+            return False
+        self.save(table, frame)
+        return True
+
+
+# Pick the backend from CRM_STORAGE ('sqlite' or 'parquet') and CRM_DATA_PATH
+def backend_from_env():
+    kind = os.environ.get('CRM_STORAGE', 'sqlite').lower()
+    if kind == 'sqlite':
+        path = os.environ.get('CRM_DATA_PATH', os.path.join(DEFAULT_DATA_DIR, 'crm.db'))
+        return SQLiteBackend(path)
+    if kind == 'parquet':
+        path = os.environ.get('CRM_DATA_PATH', os.path.join(DEFAULT_DATA_DIR, 'parquet'))
+        return ParquetBackend(path)
+    raise ValueError(f"Unknown CRM_STORAGE backend '{kind}' (expected 'sqlite' or 'parquet')")
+
+
+# Raised by a commit when rows it edits or deletes were changed by another commit
+# after the session read them. Nothing is written; keys is {table: row keys}.
+class ConflictError(Exception):
+    def __init__(self, keys):
+        self.keys = keys
+        rows = ", ".join(f"{len(k):,} {table}" for table, k in keys.items())
+        super().__init__(f"Another user changed the same rows ({rows}) after you opened them, so your "
+                         "changes were not saved. Review the latest data and try again.")
+
+
+# One commit as other sessions hear of it: the change set, who made it, and the
+# row keys it touched per table (None for a table replaced whole)
+class ChangeNotice:
+    def __init__(self, change, user, origin, tables):
+        self.change = change
+        self.user = user
+        self.origin = origin
+        self.tables = tables
+
+
+# Commit notices pushed to one session, oldest first, skipping its own commits.
+# At most FEED_LENGTH are held; a session that stops reading only loses the oldest.
+class ChangeFeed:
+    def __init__(self, owner):
+        self.owner = owner
+        self._notices = deque(maxlen=FEED_LENGTH)
+        self._lock = threading.Lock()
+
+    def push(self, notice):
+        if notice.origin != self.owner:
+            with self._lock:
+                self._notices.append(notice)
+
+    # Notices received since the last call
+    def drain(self):
+        with self._lock:
+            notices = list(self._notices)
+            self._notices.clear()
+        return notices
+
+
+# Process-wide store: tables load lazily on first access and are shared by every
+# session as read-only snapshots. A commit builds a new snapshot rather than
+# mutating the old one, so readers holding the previous frame are unaffected.
+# The store is also the single writer for all sessions: commits are serialized
+# under one lock, each row carries the table version of the commit that last
+# changed it (its stamp), and every commit is pushed to the other sessions'
+# change feeds.
+class DataStore:
+    def __init__(self, backend, seed=demo_tables):
+        self.backend = backend
+        self.seed = seed
+        self.log = ChangeLog(backend.log_path)
+        self.version = 0
+        self.table_versions = {}
+        self._tables = {}
+        self._next_key = {}
+        self._journal = {}
+        self._stamps = {}
+        self._floors = {}
+        # Last logged change each table was brought up to, and the change sets
+        # logged by this store since (the others come from other processes)
+        self._synced = {}
+        self._own = set()
+        self._feeds = weakref.WeakSet()
+        self._lock = threading.RLock()
+
+    def table(self, name):
+        frame = self._tables.get(name)
+        if frame is not None:
+            return frame
+        with self._lock:
+            if name not in self._tables:
+                self._synced[name] = self.log.last_id()
+                frame = self.backend.load(name)
+                if frame is None:
+                    frame = apply_schema(name, self._migrate(name, with_row_keys(self.seed()[name], name)))
+                    self._save(name, frame)
+                elif frame.index.name != key_name(name) or self._needs_migration(name, frame):
+                    frame = apply_schema(name, self._migrate(name, frame.rename_axis(key_name(name))))
+                    self._save(name, frame)
+                else:
+                    frame = self._replay(name, apply_schema(name, frame))
+                self._tables[name] = frame
+                self._next_key[name] = int(frame.index.max()) + 1 if len(frame) else 0
+                self.table_versions.setdefault(name, 0)
+            return self._tables[name]
+
+    # Write a whole table and note that it holds every change logged so far
+    def _save(self, name, frame):
+        self.backend.save(name, frame)
+        self.log.mark_snapshot(name, self.log.last_id())
+
+    # Bring a loaded table up to date with the changes logged after its snapshot,
+    # folding each row's events into its final state first
+    def _replay(self, name, frame):
+        since = self.log.snapshot_of(name)
+        if since is None:
+            # A store from before the change log: the table is all there is
+            self.log.mark_snapshot(name, self.log.last_id())
+            return frame
+        events = self.log.events_since(name, since)
+        if not events:
+            return frame
+        frame = replay_events(frame, events)
+        self._save(name, frame)
+        return frame
+
+    def _needs_migration(self, name, frame):
+        return name == 'services' and 'Client ID' not in frame.columns
+
+    # Engagements reference their client by ID; older stores only had the name
+    def _migrate(self, name, frame):
+        if self._needs_migration(name, frame):
+            frame = link_client_ids(frame, self.table('clients'))
+        return frame
+
+    # Reserve globally unique row keys so concurrent sessions, and other processes
+    # writing the same store (command-line imports), never collide
+    def allocate_keys(self, name, count):
+        with self._lock:
+            self.table(name)
+            start = self.log.reserve_keys(name, count, floor=self._next_key[name])
+            self._next_key[name] = start + count
+        return pd.RangeIndex(start, start + count, name=key_name(name))
+
+    # Publish a session's overlay as one change set, atomically across its tables.
+    # changes: {table: (rows, deleted keys, {row key: table version it was read at})}.
+    # Raises ConflictError, writing nothing, when a row to be written was changed
+    # by a commit after the version it was read at; inserted rows never conflict.
+    # Every table's new rows and events are worked out first and the change set is
+    # logged in one transaction; if persisting a table then fails, the tables
+    # already written are restored and the change set removed before anything in
+    # memory (tables, versions, stamps, journal) has moved.
+    def commit_changes(self, changes, user=None, undoes=None, origin=None):
+        with self._lock:
+            conflicts = {name: keys for name, (_, _, read) in changes.items()
+                         if (keys := self.conflicting(name, read))}
+            for name in changes:
+                self._sync(name)
+            conflicts = {name: keys for name, (_, _, read) in changes.items()
+                         if (keys := self.conflicting(name, read))}
+            if conflicts:
+                raise ConflictError(conflicts)
+            staged = {name: self._stage(name, rows, deleted) for name, (rows, deleted, _) in changes.items()}
+            change = self.log.record(user, undoes, {name: stage[4] for name, stage in staged.items()})
+            self._own.add(change)
+            written = []
+            try:
+                for name, (base, frame, changed, stale, _, _) in staged.items():
+                    written.append(name)
+                    if self.backend.apply(name, frame, changed, stale):
+                        # Changes other processes logged after the sync are not in
+                        # the frame: the snapshot only vouches for those before it
+                        self.log.mark_snapshot(name, self._synced[name])
+            except BaseException:
+                self._rollback(change, {name: staged[name][0] for name in written})
+                raise
+            for name, (_, frame, _, _, _, touched) in staged.items():
+                self._advance(name, frame, touched)
+            self._publish(ChangeNotice(change, user, origin, {name: stage[5] for name, stage in staged.items()}))
+            return change
+
+    # Take in the changes other processes sharing the store (command-line imports)
+    # logged for a table since it was loaded or last synced, as if committed here.
+    # Without this the table would later be rewritten whole from a copy that
+    # never saw them, and the snapshot mark would skip them for good.
+    def _sync(self, name):
+        self.table(name)
+        events = [event for change, *event in self.log.changes_after(name, self._synced[name])
+                  if change not in self._own]
+        self._synced[name] = self.log.last_id()
+        # Own change sets every table has been synced past are never looked up again
+        self._own = {change for change in self._own if change > min(self._synced.values())}
+        if not events:
+            return
+        frame = replay_events(self._tables[name], events)
+        touched = pd.Index([key for _, key, _, _ in events]).unique()
+        self._advance(name, frame, touched)
+        self._publish(ChangeNotice(None, None, None, {name: touched}))
+
+    # Make a new version of a table current, its touched rows stamped with it
+    def _advance(self, name, frame, touched):
+        self._tables[name] = frame
+        self.table_versions[name] = self.table_versions.get(name, 0) + 1
+        self.version += 1
+        journal = self._journal.setdefault(name, deque(maxlen=JOURNAL_LENGTH))
+        journal.append((self.table_versions[name], touched))
+        self._stamps.setdefault(name, {}).update(dict.fromkeys(touched.tolist(), self.table_versions[name]))
+
+    # A session's row overlay on top of the latest snapshot of a table, without
+    # writing anything: (base, new frame, changed keys, stale persisted keys,
+    # log events, every key touched)
+    def _stage(self, name, rows, deleted):
+        base = self.table(name)
+        changed = rows.index if rows is not None else pd.Index([])
+        removed = pd.Index(list(deleted))
+        return (base, apply_overlay(base, rows, deleted), changed,
+                base.index.intersection(changed.append(removed)),
+                row_events(base, rows, deleted), changed.append(removed).unique())
+
+    # Put back the persisted tables of a commit that failed part way, and its change set
+    def _rollback(self, change, bases):
+        self.log.remove(change)
+        for name, base in bases.items():
+            self.backend.save(name, base)
+            self.log.mark_snapshot(name, self._synced[name])
+
+    # Version stamp of each row: the table version of the commit that last changed it
+    def row_versions(self, name, keys):
+        stamps, floor = self._stamps.get(name, {}), self._floors.get(name, 0)
+        return pd.Series([stamps.get(key, floor) for key in keys], index=pd.Index(keys), dtype='int64')
+
+    # Row keys changed after the version each was read at (read: {key: version})
+    def conflicting(self, name, read):
+        with self._lock:
+            stamps, floor = self._stamps.get(name, {}), self._floors.get(name, 0)
+            return [key for key, version in read.items() if stamps.get(key, floor) > version]
+
+    # Change feed of a session (owner: the id its commits are published under)
+    def subscribe(self, owner):
+        feed = ChangeFeed(owner)
+        self._feeds.add(feed)
+        return feed
+
+    def _publish(self, notice):
+        for feed in list(self._feeds):
+            feed.push(notice)
+
+    # Latest snapshot of a table together with its version
+    def snapshot(self, name):
+        with self._lock:
+            frame = self.table(name)
+            return frame, self.table_versions.get(name, 0)
+
+    # Row keys inserted, edited or deleted in a table since the given version, or
+    # None when the journal no longer reaches back that far (or the table was replaced)
+    def changes_since(self, name, version):
+        with self._lock:
+            current = self.table_versions.get(name, 0)
+            entries = [keys for v, keys in self._journal.get(name, ()) if v > version]
+            if version > current or len(entries) != current - version:
+                return None
+            return pd.Index([]).append(entries).unique() if entries else pd.Index([])
+
+    # Replace a whole table (bulk loads and resets)
+    def replace(self, name, frame):
+        frame = apply_schema(name, frame)
+        with self._lock:
+            self._save(name, frame)
+            self._tables[name] = frame
+            self._next_key[name] = int(frame.index.max()) + 1 if len(frame) else 0
+            self.table_versions[name] = self.table_versions.get(name, 0) + 1
+            self.version += 1
+            self._journal.pop(name, None)
+            # Every row counts as changed by the replacement
+            self._stamps.pop(name, None)
+            self._floors[name] = self.table_versions[name]
+            self._publish(ChangeNotice(None, None, None, {name: None}))
+
+
+# Logged events (op, key, columns, after) applied on top of a frame, each row's
+# events folded into its final state first
+def replay_events(frame, events):
+    rows, deleted = {}, set()
+    for op, key, columns, after in events:
+        if op == 'delete':
+            rows.pop(key, None)
+            deleted.add(key)
+        elif op == 'insert':
+            rows[key] = json.loads(after)
+            deleted.discard(key)
+        else:
+            if key not in rows:
+                rows[key] = frame.loc[key].to_dict() if key in frame.index else {}
+            rows[key].update(json.loads(after))
+    changed = pd.DataFrame.from_records(list(rows.values()), index=pd.Index(list(rows), name=frame.index.name)) \
+        if rows else None
+    return apply_overlay(frame, changed, deleted)
+
+
+# The tables as a DataStore would serve them, read without writing anything: no
+# seeding, no migration or replay written back, no snapshot marks. For worker
+# processes, which would otherwise race the app (and each other) on the same
+# files. Logged commits newer than a table's snapshot are replayed in memory.
+def read_tables(backend, names=TABLES):
+    log = ChangeLog(backend.log_path, read_only=True) if os.path.exists(backend.log_path) else None
+    tables = {}
+    for name in names:
+        frame = backend.load(name)
+        if frame is None:
+            raise ValueError(f"The '{name}' table has not been created yet; open the dashboard once first")
+        frame = frame.rename_axis(key_name(name))
+        if name == 'services' and 'Client ID' not in frame.columns:
+            clients = tables.get('clients')
+            frame = link_client_ids(frame, clients if clients is not None else read_tables(backend, ['clients'])['clients'])
+        frame = apply_schema(name, frame)
+        try:
+            since = log.snapshot_of(name) if log is not None else None
+            events = log.events_since(name, since) if since is not None else []
+        except sqlite3.OperationalError:
+            # A log without the change tables yet has nothing to replay
+            events = []
+        tables[name] = replay_events(frame, events) if events else frame
+    return tables
+
+
+# Arrow-backed string columns grow one chunk per concat; past this many chunks
+# row lookups slow down noticeably, so the column is rewritten as one chunk
+MAX_CHUNKS = 64
+
+
+def _rechunk(frame):
+    for col in frame.columns:
+        to_arrow = getattr(frame[col].array, '__arrow_array__', None)
+        if to_arrow is not None and getattr(to_arrow(), 'num_chunks', 1) > MAX_CHUNKS:
+            frame[col] = frame[col].astype(object).astype(frame[col].dtype)
+    return frame
+
+
+# Merge edited/inserted rows and deletions into a base frame without touching it
+def apply_overlay(base, rows, deleted):
+    drop = base.index.intersection(pd.Index(list(deleted)))
+    if rows is not None and len(rows):
+        drop = drop.union(base.index.intersection(rows.index))
+    if rows is not None and len(rows):
+        rows, base = conform(rows, base)
+    out = base.drop(drop) if len(drop) else base
+    if rows is not None and len(rows):
+        out = pd.concat([out, rows.reindex(columns=base.columns) if len(base.columns) else rows])
+        out = _rechunk(out.sort_index().rename_axis(base.index.name))
+    return out
+
+
+# Per-session view of the store. Reads return the shared snapshot directly; only
+# rows the session inserts, edits or deletes are copied into a private overlay
+# until commit() publishes them. The table version each overlay row was read at
+# is kept with it, so a commit over rows another session changed since is refused
+# (optimistic locking) instead of overwriting that change.
+class SessionData:
+    def __init__(self, store, user=None):
+        self.store = store
+        self.user = user
+        self.feed = store.subscribe(id(self))
+        self._rows = {}
+        self._deleted = {}
+        self._read = {}
+        self._edits = 0
+
+    def table(self, name):
+        base = self.store.table(name)
+        if name not in self._rows and name not in self._deleted:
+            return base
+        return apply_overlay(base, self._rows.get(name), self._deleted.get(name, set()))
+
+    @property
+    def version(self):
+        if self.dirty:
+            return (self.store.version, id(self))
+        return self.store.version
+
+    @property
+    def dirty(self):
+        return bool(self._rows) or bool(self._deleted)
+
+    # Cache key component for derived data: the shared table versions, or a
+    # session-private key while this session holds uncommitted edits to them
+    def version_of(self, *names):
+        versions = tuple(self.store.table_versions.get(name, 0) for name in names)
+        if any(name in self._rows or name in self._deleted for name in names):
+            return (versions, id(self), self._edits)
+        return versions
+
+    # Table version reads of a table see now (the version the overlay rows are based on)
+    def read_version(self, name):
+        return self.store.table_versions.get(name, 0)
+
+    # Remember the version rows were read at; a row staged again keeps its first one
+    def _mark_read(self, name, keys, since):
+        self._read[name] = {**dict.fromkeys(pd.Index(keys).tolist(), since), **self._read.get(name, {})}
+
+    def _stage(self, name, rows, since=None):
+        self._mark_read(name, rows.index, self.read_version(name) if since is None else since)
+        self._edits += 1
+        staged = self._rows.get(name)
+        if staged is None:
+            self._rows[name] = rows
+        else:
+            self._rows[name] = pd.concat([staged.drop(staged.index.intersection(rows.index)), rows])
+
+    def insert(self, name, rows):
+        rows = apply_schema(name, rows.reset_index(drop=True))
+        rows.index = self.store.allocate_keys(name, len(rows))
+        self._stage(name, rows)
+        return rows.index
+
+    # values: frame indexed by row key holding the new values of some columns
+    def update(self, name, values):
+        since = self.read_version(name)
+        current = self.table(name)
+        keys = current.index.intersection(values.index)
+        rows = current.loc[keys].copy()
+        for col in values.columns:
+            rows[col] = values.loc[keys, col]
+        self._stage(name, rows, since)
+        return len(keys)
+
+    # changes: {column: Series of new values indexed by row key}; only the rows
+    # named in changes are copied into the overlay, and each column is written
+    # with one vectorized assignment. since: the table version the new values were
+    # decided from (e.g. when an editor was rendered), if older than now.
+    def update_cells(self, name, changes, since=None):
+        changes = {col: values for col, values in changes.items() if len(values)}
+        if not changes:
+            return 0
+        since = self.read_version(name) if since is None else since
+        current = self.table(name)
+        keys = pd.Index([]).append([values.index for values in changes.values()]).unique()
+        rows = current.loc[current.index.isin(keys)].copy()
+        changed = 0
+        for col, values in changes.items():
+            values = values[values.index.isin(rows.index)]
+            if isinstance(rows[col].dtype, pd.CategoricalDtype):
+                new = pd.Index(values.dropna().unique()).difference(rows[col].cat.categories)
+                rows[col] = rows[col].cat.add_categories(new)
+            # mask() upcasts the column when needed (e.g. a cleared number cell)
+            rows[col] = rows[col].mask(rows.index.isin(values.index), values.reindex(rows.index))
+            changed += len(values)
+        self._stage(name, rows, since)
+        return changed
+
+    # Put deleted rows back under their original keys (keys are never reused)
+    def restore(self, name, rows):
+        rows = apply_schema(name, rows).rename_axis(key_name(name))
+        self._stage(name, rows)
+        return rows.index
+
+    def delete(self, name, keys):
+        keys = set(keys)
+        self._mark_read(name, list(keys), self.read_version(name))
+        self._edits += 1
+        staged = self._rows.get(name)
+        if staged is not None:
+            self._rows[name] = staged.drop(staged.index.intersection(pd.Index(list(keys))))
+        self._deleted.setdefault(name, set()).update(keys)
+
+    # Publish the overlay as one change set, logged under this session's user.
+    # On a ConflictError nothing is written and the overlay is kept.
+    def commit(self, undoes=None):
+        names = set(self._rows) | set(self._deleted)
+        if names:
+            self.store.commit_changes(
+                {name: (self._rows.get(name), self._deleted.get(name, set()), self._read.get(name, {}))
+                 for name in names}, self.user, undoes, origin=id(self))
+        self.discard()
+
+    def discard(self):
+        self._rows = {}
+        self._deleted = {}
+        self._read = {}
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from crm.schema import CLIENT_STATUSES, CLIENT_TIERS, ENGAGEMENT_STATUSES, PRIORITIES, REVENUE_TYPES
+
+# Benchmark sizes (rows per table)
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+SERVICE_CATEGORIES = ['HR Administration', 'Training & Development', 'Business Consulting',
+                      'Payroll Services', 'Recruitment', 'Policy Design', 'Performance Management',
+                      'Organisational Development', 'Labour Relations', 'Pension Fund Advisory',
+                      'Strategic Planning', 'Job Evaluation']
+
+NAME_WORDS = ['Acacia', 'Baobab', 'Cobalt', 'Delta', 'Eagle', 'Falcon', 'Granite', 'Harvest',
+              'Impala', 'Jacaranda', 'Kudu', 'Lion', 'Msasa', 'Nyala', 'Onyx', 'Pioneer',
+              'Quartz', 'River', 'Savanna', 'Tiger', 'Unity', 'Victoria', 'Zambezi', 'Summit']
+NAME_SUFFIXES = ['Capital', 'Media', 'Holdings', 'Logistics', 'Pension Fund', 'Foods', 'Mining',
+                 'Insurance', 'Motors', 'Hotels', 'Pharmaceuticals', 'Trust']
+
+# Share of clients per tier and status, roughly as in the real book
+TIER_WEIGHTS = [0.2, 0.5, 0.3]
+STATUS_WEIGHTS = [0.45, 0.15, 0.15, 0.25]
+
+
+# Draws from a fixed set of values, as a categorical (the store's dtype for dimensions)
+def _choice(rng, values, size, p=None):
+    return pd.Categorical.from_codes(rng.choice(len(values), size=size, p=p), categories=values)
+
+
+# Power-law (Zipf-like) draws: a few values are very common, most are rare
+def _zipf_choice(rng, values, size, exponent=1.1):
+    weights = 1.0 / np.arange(1, len(values) + 1) ** exponent
+    return _choice(rng, values, size, weights / weights.sum())
+
+
+# Seeded book of rows clients and rows engagements, shaped like demo_tables().
+# Referral sources and consultants grow with the book (a long tail of free-text
+# sources, some naming a chain of referrers, and about one consultant per 2,000
+# clients); money columns on clients are rolled up from their engagements. The
+# same seed always gives the same tables.
+def synthetic_tables(rows=1_000, seed=0):
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp.today().normalize()
+
+    consultants = [f"Consultant {i + 1}" for i in range(max(5, rows // 2_000))]
+    referrals = [f"Referral {i + 1}" for i in range(max(20, rows // 20))]
+    # Every tenth source names who referred the referrer, as "A from B"
+    referrals = [f"{name} from Referral {i // 10}" if i and i % 10 == 0 else name
+                 for i, name in enumerate(referrals)]
+    names = (pd.Series(rng.choice(NAME_WORDS, rows)) + ' ' + pd.Series(rng.choice(NAME_SUFFIXES, rows))
+             + ' ' + pd.Series(np.arange(1, rows + 1)).astype(str))
+
+    # Engagements: each picks a client, larger clients getting more work
+    size = rng.lognormal(0.0, 1.0, rows)
+    client = rng.choice(rows, size=rows, p=size / size.sum())
+    engaged = today - pd.to_timedelta(rng.integers(0, 5 * 365, rows), unit='D')
+    recurring = rng.random(rows) < 0.4
+    status = rng.choice(len(ENGAGEMENT_STATUSES), rows, p=[0.4, 0.4, 0.1, 0.1])
+    months = rng.integers(1, 36, rows)
+    # Completed engagements ended in the past
+    end = pd.Series((engaged + pd.to_timedelta(months * 30, unit='D')).where(status == 1))
+    end = end.where(end <= today, today)
+    mrr = np.where(recurring, rng.integers(1, 50, rows) * 100.0, 0.0)
+    revenue = np.where(recurring, mrr, rng.integers(1, 200, rows) * 100.0)
+    category = _zipf_choice(rng, SERVICE_CATEGORIES, rows, 0.8)
+    active_mrr = np.where(status == 0, mrr, 0.0)
+    services_df = pd.DataFrame({
+        'Client ID': pd.array(client, dtype='Int64'),
+        'Client Name': names.to_numpy()[client],
+        'Service Category': category,
+        'Nature of Assignment': category,
+        'Services Provided': category,
+        'Date Engaged': engaged,
+        'End Date': end.to_numpy(),
+        'Status': pd.Categorical.from_codes(status, categories=ENGAGEMENT_STATUSES),
+        'Revenue Type': pd.Categorical.from_codes(recurring.astype(int), categories=REVENUE_TYPES),
+        'Revenue': revenue,
+        'Monthly Recurring Revenue': active_mrr,
+        'Consultant Assigned': _zipf_choice(rng, consultants, rows)
+    })
+
+    client_mrr = np.bincount(client, weights=active_mrr, minlength=rows)
+    client_revenue = np.bincount(client, weights=revenue, minlength=rows)
+    first = (pd.Series(engaged).groupby(client).min()
+             .reindex(np.arange(rows)).fillna(today).to_numpy())
+    clients_df = pd.DataFrame({
+        'Client Name': names,
+        'Status': _choice(rng, CLIENT_STATUSES, rows, STATUS_WEIGHTS),
+        'Client Tier': _choice(rng, CLIENT_TIERS, rows, TIER_WEIGHTS),
+        'First Engagement': first,
+        'Service Categories': _zipf_choice(rng, SERVICE_CATEGORIES, rows, 0.8),
+        'Monthly Recurring Revenue': client_mrr,
+        'Total Revenue': client_revenue,
+        'Lifetime Value': client_mrr * 12 + client_revenue,
+        'Consultants': _zipf_choice(rng, consultants, rows),
+        'Referral Source': _zipf_choice(rng, referrals, rows)
+    })
+
+    issues = max(4, rows // 1_000)
+    issues_df = pd.DataFrame({
+        'Issue': [f"Issue {i + 1}" for i in range(issues)],
+        'Impact': rng.choice(['Revenue at risk', 'Client churn', 'Delivery delay'], issues),
+        'Recommendation': rng.choice(['Retention call', 'Escalate to partner', 'Review pricing'], issues)
+    })
+    opportunities_df = pd.DataFrame({
+        'Opportunity': [f"Opportunity {i + 1}" for i in range(issues)],
+        'Potential Value': rng.integers(5, 500, issues) * 100.0,
+        'Priority': _choice(rng, PRIORITIES, issues)
+    })
+
+    return {
+        'clients': clients_df,
+        'services': services_df,
+        'issues': issues_df,
+        'opportunities': opportunities_df
+    }